@@ -0,0 +1,120 @@
+from escritura_segura import escribir_atomico, sincronizar_directorio
+from hashlib import sha256
+from typing import Optional
+import os
+
+
+class AlmacenContenidos:
+    """
+    Almacén de contenidos de archivos direccionado por su hash (sha256).
+
+    Cada contenido distinto se guarda una sola vez en 'ruta/<2 primeros caracteres
+    del hash>/<hash>', así los archivos con el mismo contenido comparten el mismo
+    blob y la unidad solo guarda la referencia.
+    """
+
+    def __init__(self, ruta: str) -> None:
+        """
+        Constructor de la clase AlmacenContenidos.
+
+        Parámetros:
+        - ruta (str): La carpeta donde se guardan los contenidos.
+        """
+        self.ruta = ruta
+        # Si es True (modo script), los blobs no se sincronizan con el disco al
+        # escribirse sino todos juntos en sincronizar.
+        self.diferido = False
+        self.pendientes: list[str] = []
+
+    def ruta_blob(self, hash: str) -> str:
+        """
+        Devuelve la ruta del blob correspondiente a un hash.
+
+        Parámetros:
+        - hash (str): El hash sha256 (hexadecimal) del contenido.
+
+        Retorna:
+        - str: La ruta del blob.
+        """
+        return os.path.join(self.ruta, hash[:2], hash)
+
+    def guardar(self, contenido: str) -> tuple[str, int]:
+        """
+        Guarda un contenido en el almacén si todavía no existe.
+
+        El blob se escribe en un archivo temporal que luego se renombra, así nunca
+        queda un blob incompleto con el nombre definitivo.
+
+        Parámetros:
+        - contenido (str): El contenido a guardar.
+
+        Retorna:
+        - tuple[str, int]: El hash del contenido y su tamaño en bytes.
+        """
+        datos = contenido.encode('utf-8')
+        hash = sha256(datos).hexdigest()
+        ruta_blob = self.ruta_blob(hash)
+
+        if not os.path.exists(ruta_blob):
+            os.makedirs(os.path.dirname(ruta_blob), exist_ok=True)
+            escribir_atomico(ruta_blob, datos, sincronizar=not self.diferido)
+            if self.diferido:
+                self.pendientes.append(ruta_blob)
+
+        return hash, len(datos)
+
+    def tomar_pendientes(self) -> list[str]:
+        """
+        Quita y devuelve los blobs guardados en modo diferido que faltan sincronizar,
+        para sincronizarlos después con sincronizar (por ejemplo fuera del candado del
+        escritor en segundo plano).
+
+        Retorna:
+        - list[str]: Las rutas de los blobs.
+        """
+        pendientes, self.pendientes = self.pendientes, []
+        return pendientes
+
+    def sincronizar(self, pendientes: Optional[list[str]] = None) -> None:
+        """
+        Escribe en el disco los blobs guardados en modo diferido. Debe llamarse antes
+        de sincronizar la bitácora que los referencia.
+
+        Se sincroniza cada blob y después cada carpeta donde se renombró alguno (y la
+        del almacén, donde pudo crearse la carpeta del blob): os.sync sincronizaría
+        todos los sistemas de archivos y no informa los errores.
+
+        Parámetros:
+        - pendientes (list[str] | None): Los blobs tomados con tomar_pendientes, o None
+          para sincronizar todos los pendientes.
+
+        Retorna:
+        - None
+        """
+        if pendientes is None:
+            pendientes = self.tomar_pendientes()
+        if not pendientes:
+            return
+        try:
+            for ruta_blob in pendientes:
+                with open(ruta_blob, 'rb+') as f:
+                    os.fsync(f.fileno())
+            for carpeta in {os.path.dirname(ruta_blob) for ruta_blob in pendientes}:
+                sincronizar_directorio(carpeta)
+            sincronizar_directorio(self.ruta)
+        except OSError:
+            self.pendientes.extend(pendientes)  # Se reintentan en el próximo guardado
+            raise
+
+    def leer(self, hash: str) -> str:
+        """
+        Lee un contenido del almacén.
+
+        Parámetros:
+        - hash (str): El hash del contenido.
+
+        Retorna:
+        - str: El contenido.
+        """
+        with open(self.ruta_blob(hash), 'rb') as f:
+            return f.read().decode('utf-8')
@@ -1,66 +1,136 @@
-import json
-
-
-class Archivo:
-    def __init__(self, nombre: str, contenido: str, fecha_hora: str):
-        """
-        Constructor de la clase Archivo.
-
-        Parámetros:
-        - nombre (str): El nombre del archivo.
-        - contenido (str): El contenido del archivo.
-        - fecha_hora (str): La fecha y hora (creación o modificación)
-        """
-        self.nombre = nombre
-        self.contenido = contenido
-        self.fecha_hora = fecha_hora
-
-    def to_dict(self) -> dict:
-        """
-        Convierte el archivo a un diccionario.
-
-        Retorna:
-        - dict: El archivo convertido a un diccionario.
-        """
-        return {'nombre': self.nombre, 'contenido': self.contenido, 'fecha_hora': self.fecha_hora}
-
-    @classmethod
-    def from_dict(cls, data: dict):
-        """
-        Crea una instancia de Archivo a partir de un diccionario.
-
-        Parámetros:
-        - data (dict): El diccionario que contiene los datos del archivo.
-
-        Retorna:
-        - Archivo: Una nueva instancia de Archivo creada a partir del diccionario.
-        """
-        return cls(data['nombre'], data['contenido'], data['fecha_hora'])
-
-    def guardar_json(self, filename: str) -> None:
-        """
-        Guarda el archivo en formato JSON.
-
-        Parámetros:
-        - filename (str): El nombre del archivo JSON donde se va a guardar el archivo.
-
-        Retorna:
-        - None
-        """
-        with open(filename, 'w') as f:
-            json.dump(self.to_dict(), f, indent=4)
-
-    @classmethod
-    def cargar_json(cls, filename: str):
-        """
-        Carga un archivo desde un archivo JSON.
-
-        Parámetros:
-        - filename (str): El nombre del archivo JSON desde donde se va a cargar el archivo.
-
-        Retorna:
-        - Archivo: Una nueva instancia de Archivo cargada desde el archivo JSON.
-        """
-        with open(filename) as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+from almacen_contenidos import AlmacenContenidos
+from escritura_segura import cargar_json, guardar_json
+from fecha import convertir_a_marca, formatear_fecha
+from typing import Optional, Union
+
+
+class Archivo:
+    __slots__ = ('nombre', '_contenido', 'marca_tiempo', 'hash', 'tamano')
+
+    def __init__(self, nombre: str, contenido: Optional[str], fecha_hora: Union[int, str],
+                 hash: Optional[str] = None, tamano: Optional[int] = None,
+                 almacen: Optional[AlmacenContenidos] = None):
+        """
+        Constructor de la clase Archivo.
+
+        Parámetros:
+        - nombre (str): El nombre del archivo.
+        - contenido (str | None): El contenido del archivo. Si se pasa un almacén se guarda
+          en él y el archivo solo conserva la referencia. None si se pasa el hash.
+        - fecha_hora (int | str): La fecha y hora (creación o modificación), como marca
+          de tiempo entera o como texto con el formato de la consola.
+        - hash (str | None): El hash de un contenido que ya está en el almacén.
+        - tamano (int | None): El tamaño en bytes de ese contenido.
+        - almacen (AlmacenContenidos | None): El almacén de la unidad. Si es None el
+          contenido se guarda dentro del archivo (y dentro del JSON de la unidad).
+        """
+        self.nombre = nombre
+        self.marca_tiempo = convertir_a_marca(fecha_hora)
+
+        if contenido is not None and almacen is not None:
+            hash, tamano = almacen.guardar(contenido)
+            contenido = None
+
+        self._contenido = contenido
+        self.hash = hash
+        self.tamano = tamano if contenido is None else len(contenido.encode('utf-8'))
+
+    def leer_contenido(self, almacen: Optional[AlmacenContenidos]) -> str:
+        """
+        El contenido del archivo. Si está en el almacén se lee recién al consultarlo.
+
+        Parámetros:
+        - almacen (AlmacenContenidos | None): El almacén de la unidad del archivo.
+
+        Retorna:
+        - str: El contenido.
+
+        Lanza:
+        - FileNotFoundError: Si el contenido está en un almacén y no se pasa ninguno, o no está en él.
+        """
+        if self._contenido is not None:
+            return self._contenido
+        return Archivo.leer_almacen(almacen, self.hash)
+
+    @staticmethod
+    def leer_almacen(almacen: Optional[AlmacenContenidos], hash: str) -> str:
+        """
+        Lee un contenido guardado en el almacén de contenidos.
+
+        Parámetros:
+        - almacen (AlmacenContenidos | None): El almacén de la unidad.
+        - hash (str): El hash del contenido.
+
+        Retorna:
+        - str: El contenido.
+
+        Lanza:
+        - FileNotFoundError: Si no hay un almacén configurado o el contenido no está en él.
+        """
+        if almacen is None:
+            raise FileNotFoundError(
+                f"El contenido {hash} está en el almacén de contenidos, pero no hay un almacén configurado.")
+        return almacen.leer(hash)
+
+    @property
+    def fecha_hora(self) -> Optional[str]:
+        """
+        La fecha y hora del archivo como texto. Se formatea solo al consultarla.
+        """
+        return formatear_fecha(self.marca_tiempo)
+
+    def to_dict(self) -> dict:
+        """
+        Convierte el archivo a un diccionario.
+
+        Retorna:
+        - dict: El archivo convertido a un diccionario.
+        """
+        if self.hash is not None:
+            return {'nombre': self.nombre, 'hash': self.hash, 'tamano': self.tamano,
+                    'fecha_hora': self.fecha_hora}
+        return {'nombre': self.nombre, 'contenido': self._contenido, 'fecha_hora': self.fecha_hora}
+
+    @classmethod
+    def from_dict(cls, data: dict, almacen: Optional[AlmacenContenidos] = None):
+        """
+        Crea una instancia de Archivo a partir de un diccionario.
+
+        Acepta el contenido en línea ('contenido') o una referencia al almacén ('hash'
+        y 'tamano'). Un contenido en línea se pasa al almacén si se indica uno.
+
+        Parámetros:
+        - data (dict): El diccionario que contiene los datos del archivo.
+        - almacen (AlmacenContenidos | None): El almacén de la unidad.
+
+        Retorna:
+        - Archivo: Una nueva instancia de Archivo creada a partir del diccionario.
+        """
+        return cls(data['nombre'], data.get('contenido'), data['fecha_hora'],
+                   data.get('hash'), data.get('tamano'), almacen)
+
+    def guardar_json(self, filename: str) -> None:
+        """
+        Guarda el archivo en formato JSON.
+
+        Parámetros:
+        - filename (str): El nombre del archivo JSON donde se va a guardar el archivo.
+
+        Retorna:
+        - None
+        """
+        # Escritura atómica con suma de verificación (ver escritura_segura)
+        guardar_json(filename, self.to_dict())
+
+    @classmethod
+    def cargar_json(cls, filename: str):
+        """
+        Carga un archivo desde un archivo JSON.
+
+        Parámetros:
+        - filename (str): El nombre del archivo JSON desde donde se va a cargar el archivo.
+
+        Retorna:
+        - Archivo: Una nueva instancia de Archivo cargada desde el archivo JSON.
+        """
+        return cls.from_dict(cargar_json(filename))
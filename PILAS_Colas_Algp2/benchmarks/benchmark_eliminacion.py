@@ -0,0 +1,102 @@
+"""
+Benchmark de eliminación masiva de entradas en una sola Carpeta.
+
+Compara la eliminación actual (nodos doblemente enlazados, O(1) por entrada)
+con el recorrido lineal que se usaba antes (O(n) por entrada, O(n²) en total).
+
+Uso (desde la carpeta PILAS_Colas_Algp2):
+    python benchmarks/benchmark_eliminacion.py [cantidad] [cantidad_legado]
+
+El recorrido lineal es cuadrático, por eso se mide por defecto con menos
+entradas; el tiempo por eliminación permite comparar ambas cifras.
+"""
+import os
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carpeta import Carpeta  # noqa: E402
+
+
+def crear_carpeta_llena(cantidad: int) -> Carpeta:
+    """
+    Crea una carpeta con la cantidad de archivos indicada.
+
+    Parámetros:
+    - cantidad (int): La cantidad de archivos a crear.
+
+    Retorna:
+    - Carpeta: La carpeta creada.
+    """
+    carpeta = Carpeta("C:", "01/01/2024 12:00 AM")
+    for i in range(cantidad):
+        carpeta.crear_archivo(f"archivo{i}.txt", "", "01/01/2024 12:00 AM")
+    return carpeta
+
+
+def eliminar_legado(carpeta: Carpeta, nombre: str) -> bool:
+    """
+    Reproduce la eliminación anterior: recorre la cola llevando el nodo anterior.
+
+    Parámetros:
+    - carpeta (Carpeta): La carpeta de la que se elimina.
+    - nombre (str): El nombre del archivo a eliminar.
+
+    Retorna:
+    - bool: True si el archivo fue eliminado, False en caso contrario.
+    """
+    nodo_actual = carpeta.primer_archivo
+    nodo_anterior = None
+    while nodo_actual:
+        if nodo_actual.dato.nombre == nombre:
+            if nodo_anterior:
+                nodo_anterior.siguiente = nodo_actual.siguiente
+                if nodo_actual == carpeta.ultimo_archivo:
+                    carpeta.ultimo_archivo = nodo_anterior
+            else:
+                carpeta.primer_archivo = nodo_actual.siguiente
+                if nodo_actual == carpeta.ultimo_archivo:
+                    carpeta.ultimo_archivo = None
+            del carpeta.indice_archivos[nombre]
+            return True
+        nodo_anterior = nodo_actual
+        nodo_actual = nodo_actual.siguiente
+    return False
+
+
+def medir(cantidad: int, eliminar) -> float:
+    """
+    Mide el tiempo de eliminar todas las entradas de una carpeta en orden aleatorio.
+
+    Parámetros:
+    - cantidad (int): La cantidad de entradas de la carpeta.
+    - eliminar: Función (carpeta, nombre) que elimina una entrada.
+
+    Retorna:
+    - float: Los segundos que tomó eliminar todas las entradas.
+    """
+    carpeta = crear_carpeta_llena(cantidad)
+    nombres = [f"archivo{i}.txt" for i in range(cantidad)]
+    random.Random(0).shuffle(nombres)
+
+    inicio = perf_counter()
+    for nombre in nombres:
+        eliminar(carpeta, nombre)
+    duracion = perf_counter() - inicio
+
+    assert carpeta.primer_archivo is None and carpeta.ultimo_archivo is None
+    return duracion
+
+
+if __name__ == "__main__":
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cantidad_legado = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    actual = medir(cantidad, lambda carpeta, nombre: carpeta.eliminar_archivo(nombre))
+    legado = medir(cantidad_legado, eliminar_legado)
+
+    print(f"{'Método':<22}{'Entradas':>10}{'Total (s)':>12}{'Por entrada (µs)':>18}")
+    print(f"{'Doble enlace (actual)':<22}{cantidad:>10}{actual:>12.3f}{actual / cantidad * 1e6:>18.2f}")
+    print(f"{'Recorrido lineal':<22}{cantidad_legado:>10}{legado:>12.3f}{legado / cantidad_legado * 1e6:>18.2f}")
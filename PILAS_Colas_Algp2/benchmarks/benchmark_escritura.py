@@ -0,0 +1,79 @@
+"""
+Benchmark del costo de la escritura atómica con suma de verificación.
+
+Compara, para unidades sintéticas de distintos tamaños:
+- directa: open('w') y json.dump, como se guardaba antes (sin fsync ni crc32).
+- atómica: escritura_segura.guardar_json (cabecera crc32, temporal, fsync y os.replace).
+
+También mide la carga con json.load frente a escritura_segura.cargar_json (que verifica
+el largo y el crc32 antes de analizar el JSON), y el costo de muchas escrituras chicas,
+donde domina el fsync.
+
+Uso (desde la carpeta PILAS_Colas_Algp2):
+    python benchmarks/benchmark_escritura.py [tamaño ...]
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_formatos import crear_unidad, medir  # noqa: E402
+from escritura_segura import cargar_json, guardar_json  # noqa: E402
+
+ESCRITURAS_CHICAS = 1000
+
+
+def guardar_directo(filename: str, data) -> None:
+    """
+    Guarda un JSON truncando el archivo en el lugar (forma anterior).
+
+    Parámetros:
+    - filename (str): El archivo de destino.
+    - data: El objeto a guardar.
+
+    Retorna:
+    - None
+    """
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+def cargar_directo(filename: str):
+    """
+    Carga un JSON sin verificarlo (forma anterior).
+
+    Parámetros:
+    - filename (str): El archivo a cargar.
+
+    Retorna:
+    - El objeto cargado.
+    """
+    with open(filename) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    tamanos = [int(t) for t in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    print(f"{'Entradas':>10} {'Escritura':<10} {'Guardar (s)':>12} {'Cargar (s)':>11}")
+    with tempfile.TemporaryDirectory() as directorio:
+        filename = os.path.join(directorio, 'unidad.json')
+        for cantidad in tamanos:
+            data = crear_unidad(cantidad).to_dict()
+
+            guardar = medir(lambda: guardar_directo(filename, data))
+            cargar = medir(lambda: cargar_directo(filename))
+            print(f"{cantidad:>10} {'directa':<10} {guardar:>12.3f} {cargar:>11.3f}")
+
+            guardar = medir(lambda: guardar_json(filename, data))
+            cargar = medir(lambda: cargar_json(filename))
+            print(f"{cantidad:>10} {'atómica':<10} {guardar:>12.3f} {cargar:>11.3f}")
+
+        data = crear_unidad(10).to_dict()
+        print(f"\n{ESCRITURAS_CHICAS} escrituras de una unidad de 10 entradas:")
+        for nombre, funcion in (('directa', guardar_directo), ('atómica', guardar_json)):
+            segundos = medir(lambda: [funcion(filename, data) for _ in range(ESCRITURAS_CHICAS)])
+            print(f"{nombre:<10} {segundos * 1e6 / ESCRITURAS_CHICAS:>10.1f} µs por escritura")
@@ -0,0 +1,89 @@
+"""
+Benchmark de guardado y carga de unidades en formato JSON y binario.
+
+Para cada tamaño construye una unidad sintética (carpetas de 100 entradas) y mide
+el tiempo de guardar y cargar en ambos formatos, y el tamaño de cada archivo.
+
+Uso (desde la carpeta PILAS_Colas_Algp2):
+    python benchmarks/benchmark_formatos.py [tamaño ...]
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carpeta import Carpeta  # noqa: E402
+from formato_binario import cargar_binario, guardar_binario  # noqa: E402
+
+ENTRADAS_POR_CARPETA = 100
+
+
+def crear_unidad(cantidad: int) -> Carpeta:
+    """
+    Crea una unidad sintética con la cantidad de entradas indicada.
+
+    Cada carpeta tiene hasta ENTRADAS_POR_CARPETA entradas: una de cada diez es
+    una subcarpeta y el resto son archivos con un contenido corto.
+
+    Parámetros:
+    - cantidad (int): La cantidad de entradas (archivos y carpetas).
+
+    Retorna:
+    - Carpeta: La raíz de la unidad.
+    """
+    marca = 1704067200
+    raiz = Carpeta("C:", marca)
+    carpetas = [raiz]
+    creadas = 0
+    indice = 0
+    while creadas < cantidad:
+        carpeta = carpetas[indice]
+        indice += 1
+        for i in range(min(ENTRADAS_POR_CARPETA, cantidad - creadas)):
+            if i % 10 == 0:
+                carpeta.crear_carpeta(f"carpeta{creadas}", marca)
+                carpetas.append(carpeta.buscar_carpeta(f"carpeta{creadas}"))
+            else:
+                carpeta.crear_archivo(f"archivo{creadas}.txt", f"contenido {creadas}", marca)
+            creadas += 1
+    return raiz
+
+
+def medir(funcion) -> float:
+    """
+    Mide el tiempo de ejecutar una función sin argumentos.
+
+    Parámetros:
+    - funcion: La función a medir.
+
+    Retorna:
+    - float: Los segundos que tomó.
+    """
+    inicio = perf_counter()
+    funcion()
+    return perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    tamanos = [int(t) for t in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    print(f"{'Entradas':>10} {'Formato':<8} {'Guardar (s)':>12} {'Cargar (s)':>11} "
+          f"{'Diferida (s)':>13} {'Tamaño (MB)':>12}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for cantidad in tamanos:
+            unidad = crear_unidad(cantidad)
+            filename_json = os.path.join(directorio, 'unidad.json')
+            filename_binario = os.path.join(directorio, 'unidad.bin')
+
+            guardar = medir(lambda: unidad.guardar_json(filename_json))
+            cargar = medir(lambda: Carpeta.cargar_json(filename_json))
+            tamano = os.path.getsize(filename_json) / 2**20
+            print(f"{cantidad:>10} {'json':<8} {guardar:>12.3f} {cargar:>11.3f} {'-':>13} {tamano:>12.2f}")
+
+            guardar = medir(lambda: guardar_binario(unidad, filename_binario))
+            cargar = medir(lambda: cargar_binario(filename_binario))
+            diferida = medir(lambda: cargar_binario(filename_binario, diferida=True))
+            tamano = os.path.getsize(filename_binario) / 2**20
+            print(f"{cantidad:>10} {'binario':<8} {guardar:>12.3f} {cargar:>11.3f} {diferida:>13.4f} {tamano:>12.2f}")
@@ -0,0 +1,93 @@
+"""
+Benchmark de memoria al cargar una unidad sintética grande.
+
+Genera un JSON con el formato de las unidades (por defecto 1.000.000 de entradas),
+lo carga con Carpeta.cargar_json y reporta la memoria residente (RSS) del proceso.
+
+Uso (desde la carpeta PILAS_Colas_Algp2):
+    python benchmarks/benchmark_memoria.py [cantidad_entradas]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carpeta import Carpeta  # noqa: E402
+
+ENTRADAS_POR_CARPETA = 1000
+
+
+def rss_mb() -> float:
+    """
+    Devuelve la memoria residente actual del proceso en MB.
+
+    Usa /proc/self/statm cuando existe (Linux); en otros sistemas usa el pico
+    de memoria reportado por el módulo resource.
+
+    Retorna:
+    - float: La memoria residente en MB.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == 'darwin' else pico / 2**10
+
+
+def generar_unidad(filename: str, cantidad: int) -> None:
+    """
+    Escribe una unidad sintética con carpetas de ENTRADAS_POR_CARPETA archivos.
+
+    Parámetros:
+    - filename (str): El archivo JSON a generar.
+    - cantidad (int): La cantidad aproximada de entradas (archivos y carpetas).
+
+    Retorna:
+    - None
+    """
+    fecha = "01/01/2024 12:00 AM"
+    with open(filename, 'w') as f:
+        f.write(f'{{"nombre": "C:", "fecha_hora": "{fecha}", "archivos": [')
+        creadas = 0
+        numero_carpeta = 0
+        while creadas < cantidad:
+            if numero_carpeta:
+                f.write(',')
+            f.write(f'{{"nombre": "carpeta{numero_carpeta}", "fecha_hora": "{fecha}", "archivos": [')
+            archivos = min(ENTRADAS_POR_CARPETA - 1, cantidad - creadas - 1)
+            f.write(','.join(
+                json.dumps({'nombre': f'archivo{i}.txt', 'contenido': f'contenido {i}', 'fecha_hora': fecha})
+                for i in range(archivos)))
+            f.write(']}')
+            creadas += archivos + 1
+            numero_carpeta += 1
+        f.write(']}')
+
+
+if __name__ == "__main__":
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as directorio:
+        filename = os.path.join(directorio, 'unidad.json')
+        generar_unidad(filename, cantidad)
+
+        gc.collect()
+        antes = rss_mb()
+        inicio = perf_counter()
+        unidad = Carpeta.cargar_json(filename)
+        duracion = perf_counter() - inicio
+        gc.collect()
+        despues = rss_mb()
+
+    print(f"Entradas:           {cantidad}")
+    print(f"Tiempo de carga:    {duracion:.2f} s")
+    print(f"RSS antes de cargar: {antes:.1f} MB")
+    print(f"RSS con la unidad:   {despues:.1f} MB")
+    print(f"Bytes por entrada:   {(despues - antes) * 2**20 / cantidad:.0f}")
@@ -0,0 +1,603 @@
+from almacen_contenidos import AlmacenContenidos
+from carga_diferida import FormatoNoDiferible, LectorDiferido, serializar_json
+from carpeta import Carpeta, Instantanea
+from escritura_segura import ArchivoDaniado, cargar_json, escribir_atomico, sincronizar_directorio
+from formato_binario import LectorBinario, serializar
+from indice_contenidos import IndiceContenidos
+from indice_nombres import IndiceNombres
+from typing import NamedTuple, Optional, Union
+from zlib import crc32
+import json
+import os
+import threading
+
+
+class Corte(NamedTuple):
+    """
+    Un punto de control tomado con sellar, para guardarlo con guardar_corte.
+    """
+    secuencia: int
+    unidad: Instantanea
+    indices: list[tuple]  # (copia del índice, su archivo) de cada índice activo
+
+
+class Bitacora:
+    """
+    Bitácora de operaciones (journal) de una unidad.
+
+    Cada comando que modifica la unidad agrega una línea al final de la bitácora
+    en lugar de reescribir el JSON completo. Cada cierto número de operaciones se
+    hace un punto de control: se escribe la unidad completa y se vacía la bitácora.
+
+    Formato de cada línea: '<crc32 en hexadecimal> <operación en JSON>'. Una línea
+    cuyo crc no coincide (escritura interrumpida) marca el final de la bitácora.
+
+    Si se indexa, la bitácora mantiene también el índice de nombres de la unidad
+    (ver indice_nombres): lo actualiza con cada operación y lo guarda en cada punto
+    de control en '<unidad>.indice', con la misma secuencia que la unidad. El índice
+    de contenidos (ver indice_contenidos) se mantiene igual, en '<unidad>.contenidos'.
+
+    El escritor en segundo plano hace los puntos de control en dos pasos (ver sellar
+    y guardar_corte): con el candado de los comandos se sella la bitácora en
+    '<unidad>.bitacora.sellada' y se toma una instantánea de la unidad y una copia de
+    los índices, y después, sin el candado, se escriben.
+    """
+
+    # Archivo de la unidad -> candado que toman la carga, los puntos de control y
+    # guardar_corte, así una unidad que se vuelve a montar no lee sus archivos mientras
+    # el escritor en segundo plano los reemplaza
+    _candados: dict[str, threading.RLock] = {}
+
+    def __init__(self, filename_unidad: str, intervalo_checkpoint: int = 500,
+                 carga_diferida: bool = False, formato: str = 'json', indexar: bool = False,
+                 indexar_contenidos: bool = False, almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Constructor de la clase Bitacora.
+
+        Parámetros:
+        - filename_unidad (str): El archivo JSON con la unidad completa.
+        - intervalo_checkpoint (int): Cantidad de operaciones entre puntos de control.
+        - carga_diferida (bool): Si es True, las subcarpetas se cargan al usarlas por primera vez.
+        - formato (str): 'json' o 'binario' (ver formato_binario). En formato binario la
+          unidad se guarda con la extensión '.bin' en lugar de '.json'.
+        - indexar (bool): Si es True se mantiene el índice de nombres de la unidad.
+        - indexar_contenidos (bool): Si es True se mantiene el índice de contenidos de la unidad.
+        - almacen (AlmacenContenidos | None): El almacén de los contenidos de la unidad (None
+          para guardarlos dentro de la unidad).
+        """
+        if formato not in ('json', 'binario'):
+            raise ValueError(f"Formato de unidad desconocido: {formato}")
+
+        base = os.path.splitext(filename_unidad)[0]
+        self.formato = formato
+        self.almacen = almacen
+        self.filename_json = filename_unidad
+        self.filename_unidad = base + '.bin' if formato == 'binario' else filename_unidad
+        self.carga_diferida = carga_diferida
+        self.lector: Union[LectorDiferido, LectorBinario, None] = None
+        self.filename = base + '.bitacora'
+        # Bitácora sellada por sellar, hasta que guardar_corte guarda la unidad
+        self.filename_sellada = self.filename + '.sellada'
+        self._candado = Bitacora._candados.setdefault(
+            os.path.abspath(self.filename_unidad), threading.RLock())
+        self.indexar = indexar
+        self.filename_indice = base + '.indice'
+        self.indice: Optional[IndiceNombres] = None
+        self.indexar_contenidos = indexar_contenidos
+        self.filename_indice_contenidos = base + '.contenidos'
+        self.indice_contenidos: Optional[IndiceContenidos] = None
+        # Archivo de cada índice -> secuencia con la que se guardó
+        self._secuencias_indices: dict[str, int] = {}
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.secuencia = 0  # Número de la última operación registrada.
+        self.operaciones_sin_checkpoint = 0
+        # Si es True (modo script), registrar no sincroniza con el disco ni hace puntos de
+        # control: se hace explícitamente con sincronizar y checkpoint.
+        self.diferida = False
+        self._archivo = None
+        # Cortes sellados que todavía no terminaron de guardarse: sus instantáneas pueden
+        # leer del lector, así que cerrar lo deja abierto hasta que terminen (ver soltar_corte)
+        self._cortes_en_curso = 0
+        self._cerrada = False
+        self._candado_cortes = threading.Lock()
+
+    def cargar(self) -> Carpeta:
+        """
+        Carga la unidad y le aplica las operaciones pendientes de la bitácora.
+
+        Retorna:
+        - Carpeta: La unidad con todas las operaciones registradas aplicadas.
+
+        Lanza:
+        - FileNotFoundError: Si no existe el archivo de la unidad.
+        - ArchivoDaniado: Si el archivo de la unidad está incompleto o dañado.
+        """
+        with self._candado:
+            migrar = False
+            if self.formato == 'binario':
+                try:
+                    self.lector = LectorBinario(self.filename_unidad, self.almacen)
+                except FileNotFoundError:
+                    # Unidad todavía en JSON: se carga y se guarda en binario
+                    unidad, data = self._cargar_json()
+                    migrar = True
+                else:
+                    unidad, data = self.lector.cargar_raiz(self.carga_diferida)
+                    if not self.carga_diferida:
+                        self.lector.cerrar()
+                        self.lector = None
+            else:
+                unidad, data = self._cargar_json()
+
+            self.secuencia = data.get('secuencia', 0)
+            if self.indexar:
+                self.indice = self._cargar_indice(IndiceNombres, self.filename_indice, unidad)
+            if self.indexar_contenidos:
+                self.indice_contenidos = self._cargar_indice(
+                    IndiceContenidos, self.filename_indice_contenidos, unidad, self.almacen)
+            self.reproducir(unidad)
+            if migrar:
+                self.checkpoint(unidad)
+            return unidad
+
+    def _cargar_json(self) -> tuple[Carpeta, dict]:
+        """
+        Carga la unidad desde su archivo JSON, de forma diferida si está configurado.
+
+        Retorna:
+        - tuple[Carpeta, dict]: La unidad y el JSON de la raíz (o sus claves adicionales).
+        """
+        if self.carga_diferida:
+            try:
+                self.lector = LectorDiferido(self.filename_json, self.almacen)
+                return self.lector.cargar_raiz()
+            except FormatoNoDiferible:
+                self.lector = None
+
+        data = cargar_json(self.filename_json)
+        return Carpeta.from_dict(data, self.almacen), data
+
+    def _cargar_indice(self, clase: type, filename: str, unidad: Carpeta, *argumentos):
+        """
+        Carga un índice guardado en el último punto de control. Si no existe, está
+        dañado o no corresponde a la unidad cargada, lo construye recorriendo la
+        unidad (una sola vez: se guarda enseguida).
+
+        Parámetros:
+        - clase (type): IndiceNombres o IndiceContenidos.
+        - filename (str): El archivo del índice.
+        - unidad (Carpeta): La unidad cargada, antes de aplicarle la bitácora.
+        - argumentos: Los argumentos adicionales de cargar y construir (el almacén, en
+          el índice de contenidos).
+
+        Retorna:
+        - IndiceNombres | IndiceContenidos: El índice.
+        """
+        try:
+            indice, secuencia = clase.cargar(filename, *argumentos)
+        except (FileNotFoundError, ArchivoDaniado, ValueError, KeyError):
+            secuencia = None
+        if secuencia != self.secuencia:
+            indice = clase.construir(unidad, *argumentos)
+            indice.guardar(filename, self.secuencia)
+        self._secuencias_indices[filename] = self.secuencia
+        return indice
+
+    def _guardar_indice(self, indice, filename: str) -> None:
+        """
+        Guarda un índice en el punto de control si cambió o si se guardó con otra secuencia.
+
+        Parámetros:
+        - indice (IndiceNombres | IndiceContenidos): El índice.
+        - filename (str): El archivo del índice.
+
+        Retorna:
+        - None
+        """
+        if indice.modificado or self._secuencias_indices.get(filename) != self.secuencia:
+            indice.guardar(filename, self.secuencia)
+            self._secuencias_indices[filename] = self.secuencia
+
+    def indices(self) -> list:
+        """
+        Los índices que mantiene la bitácora.
+
+        Retorna:
+        - list: El índice de nombres y el de contenidos, los que estén activos.
+        """
+        return [indice for indice in (self.indice, self.indice_contenidos) if indice is not None]
+
+    def reproducir(self, unidad: Carpeta) -> int:
+        """
+        Aplica a la unidad las operaciones de la bitácora posteriores al último punto de control.
+
+        Primero se lee la bitácora sellada, si quedó una (ver sellar), y después la actual.
+        Las líneas ya incluidas en el JSON (número de secuencia menor o igual al cargado)
+        se ignoran. Si la última línea está incompleta o dañada se descarta (junto con la
+        bitácora actual, si la dañada es la sellada).
+
+        Parámetros:
+        - unidad (Carpeta): La unidad cargada desde el JSON.
+
+        Retorna:
+        - int: La cantidad de operaciones aplicadas.
+        """
+        aplicadas = 0
+        completa = True
+        for filename in (self.filename_sellada, self.filename):
+            if not completa:
+                # Las operaciones que siguen a una perdida ya no pueden aplicarse
+                self._truncar(filename, 0)
+                continue
+            fin_valido = 0
+            try:
+                with open(filename, 'rb') as f:
+                    for linea in f:
+                        operacion = self._decodificar(linea)
+                        if operacion is None:
+                            break
+                        fin_valido += len(linea)
+                        if operacion['secuencia'] <= self.secuencia:
+                            continue
+                        self.aplicar(unidad, operacion, self.indices(), self.almacen)
+                        self.secuencia = operacion['secuencia']
+                        aplicadas += 1
+                    tamano = f.seek(0, os.SEEK_END)
+            except FileNotFoundError:
+                continue
+
+            if fin_valido < tamano:
+                # Se descarta la cola dañada para que las próximas líneas queden legibles.
+                completa = False
+                self._truncar(filename, fin_valido)
+
+        self.operaciones_sin_checkpoint = aplicadas
+        return aplicadas
+
+    @staticmethod
+    def _truncar(filename: str, tamano: int) -> None:
+        """
+        Trunca un archivo de bitácora, si existe.
+
+        Parámetros:
+        - filename (str): El archivo.
+        - tamano (int): El tamaño en bytes con que queda.
+
+        Retorna:
+        - None
+        """
+        try:
+            with open(filename, 'r+b') as f:
+                f.truncate(tamano)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def aplicar(unidad: Carpeta, operacion: dict, indices: Optional[list] = None,
+                almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Aplica una operación de la bitácora sobre la unidad.
+
+        Parámetros:
+        - unidad (Carpeta): La unidad sobre la que se aplica la operación.
+        - operacion (dict): La operación ('mkdir', 'type', 'rmdir' o 'restore') con su ruta y datos.
+        - indices (list | None): Los índices a actualizar (ver indices), si hay.
+        - almacen (AlmacenContenidos | None): El almacén de los contenidos de la unidad.
+
+        Retorna:
+        - None
+        """
+        nodo = unidad
+        for parte in operacion['ruta']:
+            nodo = nodo.buscar_carpeta(parte)
+            if nodo is None:
+                raise ValueError(
+                    f"Bitácora inconsistente: no existe la ruta de la operación {operacion['secuencia']}.")
+
+        if operacion['op'] == 'mkdir':
+            nodo.crear_carpeta(operacion['nombre'], operacion['fecha'])
+        elif operacion['op'] == 'type':
+            nodo.crear_archivo(operacion['nombre'], operacion.get('contenido'), operacion['fecha'],
+                               operacion.get('hash'), operacion.get('tamano'), almacen)
+        elif operacion['op'] == 'rmdir':
+            eliminada = nodo.buscar_carpeta(operacion['nombre'])
+            nodo.eliminar_carpeta(operacion['nombre'])
+            if eliminada is not None:
+                for indice in indices or ():
+                    indice.aplicar(operacion, eliminada)
+            return
+        elif operacion['op'] == 'restore':
+            nodo.agregar_carpeta(Carpeta.from_dict(operacion['carpeta'], almacen))
+        else:
+            raise ValueError(f"Operación desconocida en la bitácora: {operacion['op']}")
+        for indice in indices or ():
+            indice.aplicar(operacion)
+
+    def registrar(self, unidad: Carpeta, operacion: dict, eliminada: Optional[Carpeta] = None) -> None:
+        """
+        Agrega una operación (ya aplicada en memoria) al final de la bitácora y a los índices.
+
+        Al alcanzar el intervalo de puntos de control se guarda la unidad completa.
+
+        Parámetros:
+        - unidad (Carpeta): La unidad a la que pertenece la operación.
+        - operacion (dict): La operación a registrar, sin número de secuencia.
+        - eliminada (Carpeta | None): En 'rmdir', la carpeta eliminada (para quitarla de los índices).
+
+        Retorna:
+        - None
+        """
+        self.secuencia += 1
+        operacion['secuencia'] = self.secuencia
+        for indice in self.indices():
+            indice.aplicar(operacion, eliminada)
+
+        if self._archivo is None:
+            self._archivo = open(self.filename, 'ab')
+        self._archivo.write(self._codificar(operacion))
+        self.operaciones_sin_checkpoint += 1
+        if self.diferida:
+            return
+
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        if self.operaciones_sin_checkpoint >= self.intervalo_checkpoint:
+            self.checkpoint(unidad)
+
+    def sincronizar(self) -> None:
+        """
+        Escribe en el disco las operaciones registradas en modo diferido.
+
+        Retorna:
+        - None
+        """
+        if self._archivo is not None:
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+
+    def checkpoint(self, unidad: Carpeta) -> None:
+        """
+        Guarda la unidad completa de forma atómica y vacía la bitácora.
+
+        La unidad (en JSON o en binario, según el formato) se escribe en un archivo
+        temporal que luego reemplaza al original, por lo que una interrupción deja
+        siempre una unidad completa, y con su crc32 en la cabecera. La unidad guarda
+        la secuencia de la última operación, así una bitácora que no llegó a vaciarse
+        no se vuelve a aplicar.
+
+        Parámetros:
+        - unidad (Carpeta): La unidad a guardar.
+
+        Retorna:
+        - None
+        """
+        with self._candado:
+            self._liberar_lector(unidad)
+            self._escribir_unidad(unidad.instantanea(), self.secuencia)
+
+            if self.indexar:
+                if self.indice is None:  # Unidad nueva
+                    self.indice = IndiceNombres.construir(unidad)
+                self._guardar_indice(self.indice, self.filename_indice)
+            if self.indexar_contenidos:
+                if self.indice_contenidos is None:
+                    self.indice_contenidos = IndiceContenidos.construir(unidad, self.almacen)
+                self._guardar_indice(self.indice_contenidos, self.filename_indice_contenidos)
+
+            if self._archivo is None:
+                self._archivo = open(self.filename, 'ab')
+            self._archivo.truncate(0)
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            try:
+                os.remove(self.filename_sellada)  # Ya incluida en la unidad
+            except FileNotFoundError:
+                pass
+            self.operaciones_sin_checkpoint = 0
+
+    def preparar_sincronizacion(self) -> Optional[int]:
+        """
+        Vacía el búfer de la bitácora y devuelve un duplicado de su descriptor, para
+        sincronizarla con el disco (os.fsync) sin el candado de los comandos. Quien lo
+        recibe debe cerrarlo.
+
+        Retorna:
+        - int | None: El descriptor, o None si la bitácora no está abierta.
+        """
+        if self._archivo is None:
+            return None
+        self._archivo.flush()
+        return os.dup(self._archivo.fileno())
+
+    def sellar(self, unidad: Carpeta) -> Optional[Corte]:
+        """
+        Toma el corte de un punto de control en segundo plano, si se alcanzó el intervalo:
+        la bitácora actual pasa a ser la bitácora sellada, las operaciones siguientes van
+        a una nueva, y se toman una instantánea de la unidad (ver Carpeta.instantanea) y
+        una copia de los índices (ver IndiceNombres.copia), que guardar_corte escribe
+        después sin el candado. La bitácora sellada permite recuperar el corte si se
+        interrumpe antes de escribirse.
+
+        Se llama con el candado de los comandos: no recorre la unidad ni los índices (la
+        instantánea copia solo las carpetas que cambiaron desde la anterior) ni espera al
+        disco (salvo en Windows con carga diferida, ver checkpoint). Si el corte anterior
+        no se pudo guardar, las operaciones nuevas se agregan a su bitácora sellada.
+
+        Quien recibe el corte debe llamar a soltar_corte cuando termina con él, lo haya
+        guardado o no.
+
+        Parámetros:
+        - unidad (Carpeta): La unidad.
+
+        Retorna:
+        - Corte | None: El corte, o None si no hace falta un punto de control.
+        """
+        pendiente = os.path.exists(self.filename_sellada)
+        if self.operaciones_sin_checkpoint < self.intervalo_checkpoint and not pendiente:
+            return None
+
+        self._liberar_lector(unidad)
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        if pendiente:
+            try:
+                with open(self.filename, 'rb') as f:
+                    operaciones = f.read()
+            except FileNotFoundError:
+                operaciones = b''
+            with open(self.filename_sellada, 'ab') as f:
+                f.write(operaciones)
+            self._truncar(self.filename, 0)
+        else:
+            try:
+                os.replace(self.filename, self.filename_sellada)
+            except FileNotFoundError:
+                open(self.filename_sellada, 'wb').close()
+        self.operaciones_sin_checkpoint = 0
+
+        indices = []
+        if self.indice is not None:
+            indices.append((self.indice.copia(), self.filename_indice))
+        if self.indice_contenidos is not None:
+            indices.append((self.indice_contenidos.copia(), self.filename_indice_contenidos))
+        with self._candado_cortes:
+            self._cortes_en_curso += 1
+        return Corte(self.secuencia, unidad.instantanea(), indices)
+
+    def guardar_corte(self, corte: Corte) -> None:
+        """
+        Hace el punto de control de un corte tomado con sellar, sin el candado de los
+        comandos: escribe la instantánea de la unidad y las copias de los índices con la
+        secuencia del corte, sin volver a cargar la unidad ni a construir los índices.
+        Las carpetas que siguen como en el archivo de la unidad se copian desde él. Al
+        terminar se borra la bitácora sellada.
+
+        Parámetros:
+        - corte (Corte): El corte.
+
+        Retorna:
+        - None
+        """
+        with self._candado:
+            try:
+                with open(self.filename_sellada, 'r+b') as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                return  # Ya la incluyó un punto de control posterior (ver checkpoint)
+            sincronizar_directorio(os.path.dirname(self.filename_sellada))
+
+            self._escribir_unidad(corte.unidad, corte.secuencia)
+            for indice, filename in corte.indices:
+                indice.guardar(filename, corte.secuencia)
+                self._secuencias_indices[filename] = corte.secuencia
+            os.remove(self.filename_sellada)
+
+    def soltar_corte(self) -> None:
+        """
+        Indica que terminó el guardado de un corte tomado con sellar (se haya guardado o
+        no). Si la bitácora ya se cerró y era el último, libera el archivo de la unidad.
+
+        Retorna:
+        - None
+        """
+        with self._candado_cortes:
+            self._cortes_en_curso -= 1
+            if self._cerrada and self._cortes_en_curso == 0:
+                self._cerrar_lector()
+
+    def _escribir_unidad(self, unidad: Instantanea, secuencia: int) -> None:
+        """
+        Escribe la unidad completa de forma atómica, en el formato configurado.
+
+        Parámetros:
+        - unidad (Instantanea): La instantánea de la unidad.
+        - secuencia (int): La secuencia de la última operación incluida.
+
+        Retorna:
+        - None
+        """
+        if self.formato == 'binario':
+            escribir_atomico(self.filename_unidad, serializar(unidad, secuencia))
+        else:
+            escribir_atomico(self.filename_unidad, serializar_json(unidad, secuencia), suma=True)
+
+    def _liberar_lector(self, unidad: Carpeta) -> None:
+        """
+        En Windows no se puede reemplazar un archivo mapeado en memoria: antes de escribir
+        la unidad se cargan las carpetas pendientes y se libera el mapeo.
+
+        Parámetros:
+        - unidad (Carpeta): La unidad.
+
+        Retorna:
+        - None
+        """
+        if self.lector is not None and os.name == 'nt':
+            unidad.materializar_todo()
+            self.lector.cerrar()
+            self.lector = None
+
+    def cerrar(self) -> None:
+        """
+        Cierra el archivo de la bitácora y libera el archivo de la unidad si quedó
+        abierto por una carga diferida (sus carpetas pendientes ya no podrán cargarse).
+        Si hay cortes guardándose, el archivo de la unidad se libera cuando terminan
+        (ver soltar_corte).
+
+        Retorna:
+        - None
+        """
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        with self._candado_cortes:
+            self._cerrada = True
+            if self._cortes_en_curso == 0:
+                self._cerrar_lector()
+
+    def _cerrar_lector(self) -> None:
+        """
+        Libera el archivo de la unidad, si quedó abierto por una carga diferida.
+
+        Retorna:
+        - None
+        """
+        if self.lector is not None:
+            self.lector.cerrar()
+            self.lector = None
+
+    @staticmethod
+    def _codificar(operacion: dict) -> bytes:
+        """
+        Convierte una operación en una línea de la bitácora con su crc32.
+
+        Parámetros:
+        - operacion (dict): La operación a convertir.
+
+        Retorna:
+        - bytes: La línea lista para escribir.
+        """
+        cuerpo = json.dumps(operacion, ensure_ascii=False).encode('utf-8')
+        return b'%08x ' % crc32(cuerpo) + cuerpo + b'\n'
+
+    @staticmethod
+    def _decodificar(linea: bytes):
+        """
+        Convierte una línea de la bitácora en una operación, verificando su crc32.
+
+        Parámetros:
+        - linea (bytes): La línea leída de la bitácora.
+
+        Retorna:
+        - dict | None: La operación, o None si la línea está incompleta o dañada.
+        """
+        if not linea.endswith(b'\n') or len(linea) < 10:
+            return None
+        cuerpo = linea[9:-1]
+        try:
+            if int(linea[:8], 16) != crc32(cuerpo):
+                return None
+        except ValueError:
+            return None
+        return json.loads(cuerpo)
@@ -0,0 +1,319 @@
+from almacen_contenidos import AlmacenContenidos
+from archivo import Archivo
+from carpeta import Carpeta, Instantanea, Resumen
+from escritura_segura import ArchivoDaniado, verificar
+from fecha import convertir_a_marca, formatear_fecha
+from json.encoder import encode_basestring_ascii
+from nodo import Nodo
+from typing import Optional, Union
+import json
+import mmap
+
+
+class FormatoNoDiferible(Exception):
+    """
+    El JSON de la unidad no tiene el formato que permite cargarlo de forma diferida.
+    """
+
+
+class LectorDiferido:
+    """
+    Carga una unidad materializando cada subcarpeta solo cuando se accede a ella.
+
+    Trabaja sobre el JSON que escriben guardar_json y los puntos de control de la
+    bitácora (json.dump con indent=4). En ese formato cada objeto de nivel n empieza
+    en una línea con 4*n espacios y termina en una línea con la misma sangría y '}',
+    y las cadenas nunca contienen saltos de línea. Eso permite ubicar cada hijo con
+    búsquedas de bytes sobre el archivo mapeado en memoria (mmap), sin analizar el
+    contenido de las subcarpetas hasta que se necesitan.
+
+    Si el archivo lo escribió serializar_json, cada carpeta termina con sus totales
+    (clave 'resumen', ver Resumen.to_dict), que se asignan al dejarla pendiente: así
+    consultarlos no obliga a leer la carpeta.
+    """
+
+    def __init__(self, filename: str, almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Constructor de la clase LectorDiferido.
+
+        Parámetros:
+        - filename (str): El archivo JSON de la unidad.
+        - almacen (AlmacenContenidos | None): El almacén de la unidad (ver Archivo.from_dict).
+        """
+        self.almacen = almacen
+        # Si las carpetas tienen sus totales guardados (se sabe al leer la raíz)
+        self.con_resumen = False
+        self._archivo = open(filename, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Archivo vacío
+            self._archivo.close()
+            raise FormatoNoDiferible(filename)
+
+    def cargar_raiz(self) -> tuple[Carpeta, dict]:
+        """
+        Carga la raíz de la unidad dejando pendientes sus subcarpetas.
+
+        Retorna:
+        - tuple[Carpeta, dict]: La raíz y las claves adicionales del JSON (por ejemplo 'secuencia').
+
+        Lanza:
+        - FormatoNoDiferible: Si el archivo no tiene el formato con sangría de 4 espacios.
+        - ArchivoDaniado: Si el archivo está incompleto o no coincide con su crc32.
+        """
+        buffer = self.buffer
+        try:
+            inicio = verificar(buffer, self._archivo.name)
+        except ArchivoDaniado:
+            self.cerrar()
+            raise
+        clave = b'\n    "archivos": '
+        posicion_clave = buffer.find(clave, inicio)
+        if buffer[inicio:inicio + 7] != b'{\n    "' or posicion_clave < 0:
+            self.cerrar()
+            raise FormatoNoDiferible(self._archivo.name)
+
+        cabecera = json.loads(buffer[inicio:posicion_clave] + b'\n"archivos": []}')
+        raiz = Carpeta(cabecera['nombre'], cabecera.get('fecha_hora'))
+
+        inicio_arreglo = posicion_clave + len(clave)
+        if buffer[inicio_arreglo:inicio_arreglo + 2] == b'[]':
+            fin_arreglo = inicio_arreglo + 2
+        else:
+            fin_arreglo = buffer.find(b'\n    ]', inicio_arreglo) + len(b'\n    ]')
+
+        resto = buffer[fin_arreglo:].strip()
+        adicionales = json.loads(b'{' + resto[1:]) if resto.startswith(b',') else {}
+        if 'resumen' in adicionales:
+            self.con_resumen = True
+            raiz._asignar(Resumen.from_dict(adicionales.pop('resumen')))
+
+        raiz._pendiente = (self, inicio, len(buffer), inicio_arreglo, 0)
+        raiz._materializar()
+        return raiz, adicionales
+
+    def cargar_hijos(self, carpeta: Carpeta, inicio_arreglo: int, sangria: int) -> None:
+        """
+        Crea los nodos hijos de una carpeta pendiente. Los archivos se crean completos
+        y las subcarpetas quedan a su vez pendientes.
+
+        Parámetros:
+        - carpeta (Carpeta): La carpeta a completar.
+        - inicio_arreglo (int): La posición del '[' de su lista 'archivos'.
+        - sangria (int): La sangría (en espacios) de la línea que abre la carpeta.
+
+        Retorna:
+        - None
+        """
+        buffer = self.buffer
+        if buffer[inicio_arreglo + 1:inicio_arreglo + 2] == b']':
+            return
+
+        sangria_hijo = sangria + 8
+        fin_hijo = b'\n' + b' ' * sangria_hijo + b'}'
+        clave_archivos = b'\n' + b' ' * (sangria_hijo + 4) + b'"archivos": '
+
+        posicion = inicio_arreglo + 1
+        while True:
+            inicio = posicion + 1 + sangria_hijo
+            fin = buffer.find(fin_hijo, inicio)
+            if buffer[inicio:inicio + 1] != b'{' or fin < 0:
+                raise ValueError(
+                    f"Formato inesperado en la unidad cerca del byte {inicio}.")
+            fin += len(fin_hijo)
+
+            posicion_clave = buffer.find(clave_archivos, inicio, fin)
+            if posicion_clave < 0:  # Es un archivo
+                carpeta._encolar(Nodo(Archivo.from_dict(json.loads(buffer[inicio:fin]), self.almacen)))
+            else:  # Es una subcarpeta, se deja pendiente
+                cabecera = json.loads(buffer[inicio:posicion_clave] + b'\n"archivos": []}')
+                subcarpeta = Carpeta(cabecera['nombre'], cabecera.get('fecha_hora'))
+                subcarpeta._pendiente = (
+                    self, inicio, fin, posicion_clave + len(clave_archivos), sangria_hijo)
+                if self.con_resumen:
+                    subcarpeta._asignar(self._resumen_guardado(inicio, fin, sangria_hijo))
+                carpeta._encolar(Nodo(subcarpeta))
+
+            if buffer[fin:fin + 1] != b',':
+                break
+            posicion = fin + 1
+
+    def a_dict(self, inicio: int, fin: int) -> dict:
+        """
+        Convierte a diccionario una carpeta pendiente sin crear sus nodos.
+
+        Parámetros:
+        - inicio (int): La posición donde empieza la carpeta en el archivo.
+        - fin (int): La posición donde termina la carpeta en el archivo.
+
+        Retorna:
+        - dict: La carpeta como diccionario, igual que Carpeta.to_dict (sin los totales).
+        """
+        if self.con_resumen:
+            return json.loads(self.buffer[inicio:fin], object_hook=_sin_resumen)
+        return json.loads(self.buffer[inicio:fin])
+
+    def resumen(self, inicio: int, fin: int) -> Resumen:
+        """
+        Los totales de una carpeta pendiente sin crear sus nodos: los guardados si los
+        hay, O(1), o calculados desde su diccionario.
+
+        Parámetros:
+        - inicio (int): La posición donde empieza la carpeta en el archivo.
+        - fin (int): La posición donde termina la carpeta en el archivo.
+
+        Retorna:
+        - Resumen: Los totales de la carpeta (ver Carpeta.resumen).
+        """
+        if self.con_resumen:
+            # La sangría de la carpeta es la de la línea donde empieza
+            return self._resumen_guardado(inicio, fin, inicio - self.buffer.rfind(b'\n', 0, inicio) - 1)
+        return Carpeta.resumen_dict(self.a_dict(inicio, fin))
+
+    def _resumen_guardado(self, inicio: int, fin: int, sangria: int) -> Resumen:
+        """
+        Lee los totales guardados al final de una carpeta (la última clave, antes del '}'
+        que la cierra), buscando desde el final, así no depende del tamaño de la carpeta.
+
+        Parámetros:
+        - inicio (int): La posición donde empieza la carpeta en el archivo.
+        - fin (int): La posición donde termina la carpeta en el archivo.
+        - sangria (int): La sangría (en espacios) de la línea que abre la carpeta.
+
+        Retorna:
+        - Resumen: Los totales guardados.
+        """
+        clave = b'\n' + b' ' * (sangria + 4) + b'"resumen": '
+        posicion = self.buffer.rfind(clave, inicio, fin)
+        if posicion < 0:
+            raise ValueError(f"Formato inesperado en la unidad cerca del byte {inicio}.")
+        return Resumen.from_dict(json.loads(self.buffer[posicion + len(clave):fin - sangria - 2]))
+
+    def cerrar(self) -> None:
+        """
+        Libera el mapeo en memoria y cierra el archivo. Las carpetas que sigan
+        pendientes ya no podrán materializarse.
+
+        Retorna:
+        - None
+        """
+        self.buffer.close()
+        self._archivo.close()
+
+
+def _sin_resumen(data: dict) -> dict:
+    """
+    Quita los totales guardados de un objeto del JSON (object_hook de LectorDiferido.a_dict).
+    """
+    data.pop('resumen', None)
+    return data
+
+
+def serializar_json(raiz: Instantanea, secuencia: int) -> bytearray:
+    """
+    Convierte una unidad al JSON que lee LectorDiferido, con el mismo texto que
+    json.dumps(indent=4) de su to_dict con los totales de cada carpeta ('resumen', ver
+    Resumen.to_dict) después de sus hijos, y la secuencia, sin recursión.
+
+    Trabaja sobre una instantánea (ver Carpeta.instantanea), así puede llamarse sin el
+    candado de los comandos. Los totales de cada carpeta se suman mientras se escriben
+    sus hijos. Las subcarpetas que siguen como en el archivo de un LectorDiferido con
+    totales se copian tal cual desde él: cada carpeta conserva su profundidad, y por lo
+    tanto su sangría. Las de otro lector se escriben desde su diccionario.
+
+    Parámetros:
+    - raiz (Instantanea): La instantánea de la unidad.
+    - secuencia (int): La secuencia de la última operación incluida.
+
+    Retorna:
+    - bytearray: El JSON en UTF-8, sin la cabecera de escritura_segura.
+    """
+    salida = bytearray()
+    # Por cada carpeta abierta: [iterador de sus hijos, su sangría, hijos ya escritos, totales]
+    pendientes = [_abrir_carpeta(salida, raiz, 0)]
+    while pendientes:
+        tope = pendientes[-1]
+        hijos, sangria, escritos, total = tope
+        hijo = next(hijos, None)
+        if hijo is None:
+            pendientes.pop()
+            adentro = b'\n' + b' ' * (sangria + 4)
+            if escritos:
+                salida += adentro
+            salida += b'],' + adentro + b'"resumen": ' + _objeto_json(total.to_dict(), sangria + 4)
+            if pendientes:
+                pendientes[-1][3] = pendientes[-1][3].sumar(total._replace(carpetas=total.carpetas + 1))
+            else:
+                salida += b',\n    "secuencia": %d' % secuencia
+            salida += b'\n' + b' ' * sangria + b'}'
+            continue
+
+        tope[2] += 1
+        salida += b',\n' if escritos else b'\n'
+        salida += b' ' * (sangria + 8)
+        if isinstance(hijo, Archivo) or (isinstance(hijo, dict) and 'archivos' not in hijo):
+            salida += _objeto_json(hijo if isinstance(hijo, dict) else hijo.to_dict(), sangria + 8)
+            tope[3] = total.sumar(Carpeta.resumen_archivo(hijo))
+        elif isinstance(hijo, Instantanea) and hijo.origen is not None:
+            lector, inicio, fin = hijo.origen
+            if isinstance(lector, LectorDiferido) and lector.con_resumen:
+                salida += lector.buffer[inicio:fin]
+                copiada = lector.resumen(inicio, fin)
+                tope[3] = total.sumar(copiada._replace(carpetas=copiada.carpetas + 1))
+            else:
+                pendientes.append(_abrir_carpeta(salida, lector.a_dict(inicio, fin), sangria + 8))
+        else:
+            pendientes.append(_abrir_carpeta(salida, hijo, sangria + 8))
+    return salida
+
+
+def _texto_json(valor) -> str:
+    """
+    Un valor simple (texto, entero o None) en JSON, igual que json.dumps.
+    """
+    if valor is None:
+        return 'null'
+    if isinstance(valor, str):
+        return encode_basestring_ascii(valor)
+    return str(valor)
+
+
+def _objeto_json(data: dict, sangria: int) -> bytes:
+    """
+    Un diccionario de valores simples (un archivo de to_dict) en JSON con sangría de 4 espacios.
+
+    Parámetros:
+    - data (dict): El diccionario.
+    - sangria (int): La sangría (en espacios) de la línea donde empieza.
+
+    Retorna:
+    - bytes: El objeto, desde '{' hasta '}'.
+    """
+    adentro = '\n' + ' ' * (sangria + 4)
+    campos = (',' + adentro).join(f'{_texto_json(clave)}: {_texto_json(valor)}' for clave, valor in data.items())
+    return f"{{{adentro}{campos}\n{' ' * sangria}}}".encode('ascii')
+
+
+def _abrir_carpeta(salida: bytearray, carpeta: Union[Instantanea, dict], sangria: int) -> list:
+    """
+    Escribe el comienzo de una carpeta, hasta el '[' de su lista 'archivos' (serializar_json
+    escribe después los hijos, los totales y el cierre).
+
+    Parámetros:
+    - salida (bytearray): Donde se escribe.
+    - carpeta (Instantanea | dict): La carpeta, como instantánea o como diccionario de to_dict.
+    - sangria (int): La sangría (en espacios) de la línea donde empieza.
+
+    Retorna:
+    - list: [iterador de sus hijos, sangría, 0, totales sin los hijos] para la pila de serializar_json.
+    """
+    if isinstance(carpeta, dict):
+        campos = [(clave, valor) for clave, valor in carpeta.items() if clave not in ('archivos', 'resumen')]
+        hijos, marca = carpeta['archivos'], convertir_a_marca(carpeta.get('fecha_hora'))
+    else:
+        campos = [('nombre', carpeta.nombre), ('fecha_hora', formatear_fecha(carpeta.marca_tiempo))]
+        hijos, marca = carpeta.hijos, carpeta.marca_tiempo
+    adentro = '\n' + ' ' * (sangria + 4)
+    texto = ''.join(f'{_texto_json(clave)}: {_texto_json(valor)},{adentro}' for clave, valor in campos)
+    salida += f'{{{adentro}{texto}"archivos": ['.encode('ascii')
+    return [iter(hijos), sangria, 0, Resumen(0, 0, 0, marca)]
@@ -1,266 +1,795 @@
-from nodo import Nodo
-from archivo import Archivo
-import json
-from typing import Optional
-
-
-class Carpeta:
-    def __init__(self, nombre: str, fecha_hora: str):
-        """
-        Constructor de la clase Carpeta.
-
-        Parámetros:
-        - nombre (str): El nombre de la carpeta.
-        - fecha_hora (str): La fecha y hora (creación o modificación)
-        """
-        self.nombre = nombre
-        self.fecha_hora = fecha_hora
-        self.primer_archivo = None  # Referencia al primer archivo en la lista.
-        self.ultimo_archivo = None  # Referencia al último archivo en la lista.
-
-    def crear_archivo(self, nombre: str, contenido: str, fecha_hora: str) -> None:
-        """
-        Método para crear un nuevo archivo y agregarlo al final de la cola.
-
-        Parámetros:
-        - nombre (str): El nombre del archivo.
-        - contenido (str): El contenido del archivo.
-        - fecha_hora (str): La fecha y hora (creación o modificación)
-
-        Retorna:
-        - None
-        """
-        archivo = Archivo(nombre, contenido, fecha_hora)
-        nodo = Nodo(archivo)
-        if self.primer_archivo is None:
-            self.primer_archivo = nodo
-            self.ultimo_archivo = nodo
-        else:
-            self.ultimo_archivo.siguiente = nodo
-            self.ultimo_archivo = nodo
-
-    def buscar_archivo(self, nombre: str) -> Optional['Archivo']:
-        """
-        Busca un archivo por su nombre dentro de la carpeta actual.
-
-        Parámetros:
-        - nombre (str): El nombre del archivo que se está buscando.
-
-        Retorna:
-        - Archivo | None: El archivo encontrado si existe, None si no se encuentra.
-        """
-        # Comenzamos desde el primer archivo en la carpeta
-        nodo_actual = self.primer_archivo
-
-        # Iteramos sobre cada archivo en la carpeta
-        while nodo_actual:
-            # Verificamos si el nodo actual contiene un archivo y si su nombre coincide con el buscado
-            if isinstance(nodo_actual.dato, Archivo) and nodo_actual.dato.nombre == nombre:
-                return nodo_actual.dato  # Devolvemos el archivo si lo encontramos
-            # Avanzamos al siguiente nodo en la lista
-            nodo_actual = nodo_actual.siguiente
-
-        # Si no se encontró el archivo, retornamos None
-        return None
-
-    def crear_carpeta(self, nombre: str, fecha_hora: str) -> None:
-        """
-        Método para crear una nueva carpeta y agregarla al final de la cola.
-
-        Parámetros:
-        - nombre (str): El nombre de la carpeta.
-        - fecha_hora (str): La fecha y hora (creación o modificación)
-
-        Retorna:
-        - None
-        """
-        nueva_carpeta = Carpeta(nombre, fecha_hora)
-        nodo = Nodo(nueva_carpeta)
-        if self.primer_archivo is None:
-            self.primer_archivo = nodo
-            self.ultimo_archivo = nodo
-        else:
-            self.ultimo_archivo.siguiente = nodo
-            self.ultimo_archivo = nodo
-
-    def buscar_carpeta(self, nombre: str) -> Optional['Carpeta']:
-        """
-        Busca una carpeta por su nombre dentro de la carpeta actual de forma recursiva.
-
-        Parámetros:
-        - nombre (str): El nombre de la carpeta que se está buscando.
-
-        Retorna:
-        - Carpeta | None: La carpeta encontrada si existe, None si no se encuentra.
-        """
-        # Comenzamos desde el primer archivo en la carpeta
-        nodo_actual = self.primer_archivo
-
-        # Iteramos sobre cada archivo en la carpeta
-        while nodo_actual:
-            # Verificamos si el nodo actual contiene una carpeta y si su nombre coincide con el buscado
-            if isinstance(nodo_actual.dato, Carpeta) and nodo_actual.dato.nombre == nombre:
-                return nodo_actual.dato  # Devolvemos la carpeta si la encontramos
-            # Avanzamos al siguiente nodo en la lista
-            nodo_actual = nodo_actual.siguiente
-
-        # Si no se encontró la carpeta, retornamos None
-        return None
-
-    def eliminar_archivo(self, nombre: str) -> bool:
-        """
-        Método para eliminar un archivo de la carpeta.
-
-        Parámetros:
-        - nombre (str): El nombre del archivo a eliminar.
-
-        Retorna:
-        - bool: True si el archivo fue eliminado exitosamente, False en caso contrario.
-        """
-        nodo_actual = self.primer_archivo
-        nodo_anterior = None
-        while nodo_actual:
-            if isinstance(nodo_actual.dato, Archivo) and nodo_actual.dato.nombre == nombre:
-                if nodo_anterior:
-                    nodo_anterior.siguiente = nodo_actual.siguiente
-                    if nodo_actual == self.ultimo_archivo:
-                        self.ultimo_archivo = nodo_anterior
-                else:
-                    self.primer_archivo = nodo_actual.siguiente
-                    if nodo_actual == self.ultimo_archivo:
-                        self.ultimo_archivo = None
-                return True
-            nodo_anterior = nodo_actual
-            nodo_actual = nodo_actual.siguiente
-        return False
-
-    def eliminar_carpeta(self, nombre: str) -> bool:
-        """
-        Método para eliminar una carpeta de la carpeta.
-
-        Parámetros:
-        - nombre (str): El nombre de la carpeta a eliminar.
-
-        Retorna:
-        - bool: True si la carpeta fue eliminada exitosamente, False en caso contrario.
-        """
-        nodo_actual = self.primer_archivo
-        nodo_anterior = None
-        while nodo_actual:
-            if isinstance(nodo_actual.dato, Carpeta) and nodo_actual.dato.nombre == nombre:
-                if nodo_anterior:
-                    nodo_anterior.siguiente = nodo_actual.siguiente
-                    if nodo_actual == self.ultimo_archivo:
-                        self.ultimo_archivo = nodo_anterior
-                else:
-                    self.primer_archivo = nodo_actual.siguiente
-                    if nodo_actual == self.ultimo_archivo:
-                        self.ultimo_archivo = None
-                return True
-            nodo_anterior = nodo_actual
-            nodo_actual = nodo_actual.siguiente
-        return False
-
-    def mostrar_contenido(self, ruta: str) -> None:
-        """
-        Método que muestra el contenido de la carpeta en la ruta especificada.
-
-        Parámetros:
-        - ruta (str): La ruta de la carpeta a mostrar.
-
-        Retorna:
-        - None
-        """
-        nodo_actual = self.primer_archivo
-        if nodo_actual:
-            print(f"\n\nDirectorio {ruta}\n\n")
-            print("Mode                 LastWriteTime         Length Name")
-            print("----                 -------------         ------ ----")
-
-            carpetas = ''
-            archivos = ''
-            while nodo_actual:
-                if isinstance(nodo_actual.dato, Archivo):
-                    archivos += f"-a---- {nodo_actual.dato.fecha_hora:>27} {' '*14} {nodo_actual.dato.nombre}\n"
-                elif isinstance(nodo_actual.dato, Carpeta):
-                    carpetas += f"d----- {nodo_actual.dato.fecha_hora:>27} {' '*14} {nodo_actual.dato.nombre}\n"
-                nodo_actual = nodo_actual.siguiente
-
-            print(carpetas[:-1])
-            print(archivos[:-1]+"\n\n")
-
-    def to_dict(self) -> dict:
-        """
-        Convierte la carpeta a un diccionario.
-
-        Retorna:
-        - dict: La carpeta convertida a un diccionario.
-        """
-        archivos = []
-        nodo_actual = self.primer_archivo
-        while nodo_actual:
-            archivos.append(nodo_actual.dato.to_dict())
-            nodo_actual = nodo_actual.siguiente
-        return {'nombre': self.nombre, 'fecha_hora': self.fecha_hora, 'archivos': archivos}
-
-    @classmethod
-    def from_dict(cls, data: dict):
-        """
-        Crea una instancia de Carpeta a partir de un diccionario.
-
-        Parámetros:
-        - data (dict): El diccionario que contiene los datos de la carpeta.
-
-        Retorna:
-        - Carpeta: Una nueva instancia de Carpeta creada a partir del diccionario.
-        """
-        carpeta = cls(data['nombre'], data.get('fecha_hora')
-                      )  # Asegurarse de incluir fecha_hora
-        for archivo_data in data['archivos']:
-            if 'contenido' in archivo_data:  # Es un archivo
-                archivo = Archivo.from_dict(archivo_data)
-                nodo = Nodo(archivo)
-                if not carpeta.primer_archivo:
-                    carpeta.primer_archivo = nodo
-                    carpeta.ultimo_archivo = nodo
-                else:
-                    carpeta.ultimo_archivo.siguiente = nodo
-                    carpeta.ultimo_archivo = nodo
-            else:  # Es una subcarpeta
-                subcarpeta = cls.from_dict(archivo_data)
-                nodo = Nodo(subcarpeta)
-                if not carpeta.primer_archivo:
-                    carpeta.primer_archivo = nodo
-                    carpeta.ultimo_archivo = nodo
-                else:
-                    carpeta.ultimo_archivo.siguiente = nodo
-                    carpeta.ultimo_archivo = nodo
-        return carpeta
-
-    def guardar_json(self, filename: str) -> None:
-        """
-        Guarda la carpeta y sus archivos en formato JSON.
-
-        Parámetros:
-        - filename (str): El nombre del archivo JSON donde se va a guardar la carpeta.
-
-        Retorna:
-        - None
-        """
-        with open(filename, 'w') as f:
-            json.dump(self.to_dict(), f, indent=4)
-
-    @classmethod
-    def cargar_json(cls, filename: str):
-        """
-        Carga una carpeta y sus archivos desde un archivo JSON.
-
-        Parámetros:
-        - filename (str): El nombre del archivo JSON desde donde se va a cargar la carpeta.
-
-        Retorna:
-        - Carpeta: Una nueva instancia de Carpeta cargada desde el archivo JSON.
-        """
-        with open(filename) as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+from nodo import Nodo
+from almacen_contenidos import AlmacenContenidos
+from archivo import Archivo
+from escritura_segura import cargar_json, guardar_json
+from fecha import convertir_a_marca, formatear_fecha
+from typing import Callable, Iterator, NamedTuple, Optional, Union
+
+# Largo máximo de un nombre en bytes UTF-8: el formato binario lo guarda en 2 bytes (ver formato_binario)
+LARGO_MAXIMO_NOMBRE = 0xFFFF
+
+
+class Resumen(NamedTuple):
+    """
+    Totales de una carpeta y todas sus subcarpetas.
+    """
+    archivos: int
+    carpetas: int  # Sin contar la carpeta misma
+    bytes: int  # Tamaño de los contenidos
+    # Marca más reciente de la carpeta y sus descendientes (en segundos; si la unidad se
+    # cargó de un JSON, las marcas guardadas quedaron truncadas al minuto, ver fecha.py)
+    ultima: Optional[int]
+
+    def sumar(self, otro: 'Resumen') -> 'Resumen':
+        """
+        Los totales de dos partes de una carpeta juntas.
+
+        Parámetros:
+        - otro (Resumen): Los totales de la otra parte.
+
+        Retorna:
+        - Resumen: La suma, con la marca más reciente de las dos.
+        """
+        return Resumen(self.archivos + otro.archivos, self.carpetas + otro.carpetas,
+                       self.bytes + otro.bytes, _mas_reciente(self.ultima, otro.ultima))
+
+    def to_dict(self) -> dict:
+        """
+        Convierte los totales a un diccionario para guardarlos junto a la carpeta, con la
+        marca como texto igual que las fechas del JSON.
+
+        Retorna:
+        - dict: Los totales.
+        """
+        return {'archivos': self.archivos, 'carpetas': self.carpetas, 'bytes': self.bytes,
+                'ultima': formatear_fecha(self.ultima)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Resumen':
+        """
+        Crea los totales a partir de un diccionario de to_dict.
+
+        Parámetros:
+        - data (dict): Los totales guardados.
+
+        Retorna:
+        - Resumen: Los totales.
+        """
+        return cls(data['archivos'], data['carpetas'], data['bytes'], convertir_a_marca(data['ultima']))
+
+
+def _mas_reciente(marca: Optional[int], otra: Optional[int]) -> Optional[int]:
+    """
+    La mayor de dos marcas de tiempo, ignorando las que faltan.
+    """
+    if marca is None or (otra is not None and otra > marca):
+        return otra
+    return marca
+
+
+class Instantanea:
+    """
+    Copia inmutable de una carpeta tal como estaba al tomarla (ver Carpeta.instantanea),
+    para guardarla sin el candado de los comandos mientras la carpeta sigue cambiando.
+
+    Los archivos no se copian: un Archivo no cambia después de creado. Una carpeta que
+    no cambió desde que se cargó de un archivo no se copia: 'origen' indica dónde están
+    sus bytes en ese archivo, que los escritores copian tal cual.
+    """
+    __slots__ = ('nombre', 'marca_tiempo', 'hijos', 'origen')
+
+    def __init__(self, nombre: str, marca_tiempo: Optional[int], hijos: Optional[tuple],
+                 origen: Optional[tuple] = None) -> None:
+        """
+        Constructor de la clase Instantanea.
+
+        Parámetros:
+        - nombre (str): El nombre de la carpeta.
+        - marca_tiempo (int | None): La marca de tiempo de la carpeta.
+        - hijos (tuple | None): Los hijos en el orden de la cola (Archivo o Instantanea), o
+          None si la carpeta se copia desde su archivo.
+        - origen (tuple | None): (lector, inicio, fin) de la carpeta en el archivo de la
+          unidad (ver Carpeta._pendiente), o None.
+        """
+        self.nombre = nombre
+        self.marca_tiempo = marca_tiempo
+        self.hijos = hijos
+        self.origen = origen
+
+
+class Carpeta:
+    __slots__ = ('nombre', 'marca_tiempo', 'primer_archivo', 'ultimo_archivo',
+                 'indice_archivos', 'indice_carpetas', '_pendiente', 'padre',
+                 'total_archivos', 'total_carpetas', 'total_bytes', 'ultima_marca', '_instantanea')
+
+    def __init__(self, nombre: str, fecha_hora: Union[int, str]):
+        """
+        Constructor de la clase Carpeta.
+
+        Parámetros:
+        - nombre (str): El nombre de la carpeta.
+        - fecha_hora (int | str): La fecha y hora (creación o modificación), como marca
+          de tiempo entera o como texto con el formato de la consola.
+        """
+        self.nombre = nombre
+        self.marca_tiempo = convertir_a_marca(fecha_hora)
+        self.primer_archivo = None  # Referencia al primer archivo en la lista.
+        self.ultimo_archivo = None  # Referencia al último archivo en la lista.
+        # Índices nombre -> nodo para búsquedas en O(1). Archivos y carpetas
+        # tienen espacios de nombres separados, igual que en la cola.
+        self.indice_archivos: dict[str, Nodo] = {}
+        self.indice_carpetas: dict[str, Nodo] = {}
+        # Datos para cargar el contenido de la carpeta cuando se use por primera vez
+        # (ver carga_diferida.LectorDiferido y formato_binario.LectorBinario).
+        # None si ya está cargado.
+        self._pendiente = None
+        self.padre: Optional[Carpeta] = None  # Carpeta que la contiene (None en la raíz)
+        # Totales de la carpeta y sus descendientes (ver resumen). Cada cambio los
+        # actualiza en todas las carpetas de la ruta hasta la raíz; None mientras no
+        # se calcularon (los cargadores asignan los guardados en el archivo, si los hay,
+        # y las demás carpetas se calculan al consultarlas).
+        self.total_archivos: Optional[int] = None
+        self.total_carpetas: Optional[int] = None
+        self.total_bytes: Optional[int] = None
+        self.ultima_marca: Optional[int] = None
+        # Última instantánea de la carpeta (ver instantanea); None si cambió desde entonces
+        self._instantanea: Optional[Instantanea] = None
+
+    @property
+    def fecha_hora(self) -> Optional[str]:
+        """
+        La fecha y hora de la carpeta como texto. Se formatea solo al consultarla.
+        """
+        return formatear_fecha(self.marca_tiempo)
+
+    def _materializar(self) -> None:
+        """
+        Carga el contenido de la carpeta si quedó pendiente en una carga diferida.
+
+        Retorna:
+        - None
+        """
+        if self._pendiente is not None:
+            # (lector, inicio, fin, posición de los hijos, dato propio del formato)
+            lector, inicio, fin, posicion_hijos, detalle = self._pendiente
+            self._pendiente = None
+            if self._instantanea is None:
+                # Hasta que cambie, la carpeta sigue siendo la que está en el archivo
+                self._instantanea = Instantanea(self.nombre, self.marca_tiempo, None, (lector, inicio, fin))
+            lector.cargar_hijos(self, posicion_hijos, detalle)
+
+    def materializar_todo(self) -> None:
+        """
+        Carga todas las subcarpetas que hayan quedado pendientes en una carga diferida,
+        para poder cerrar su archivo. Por eso también descarta las instantáneas, que
+        pueden apuntar a ese archivo (ver Instantanea).
+
+        Retorna:
+        - None
+        """
+        pendientes = [self]
+        while pendientes:
+            carpeta = pendientes.pop()
+            carpeta._materializar()
+            carpeta._instantanea = None
+            pendientes.extend(nodo.dato for nodo in carpeta.indice_carpetas.values())
+
+    def instantanea(self) -> Instantanea:
+        """
+        Toma una instantánea de la carpeta y todo su contenido (ver Instantanea).
+
+        Solo se copian las carpetas que cambiaron desde la instantánea anterior: cada
+        cambio descarta la instantánea de la carpeta y las de su ruta hasta la raíz (ver
+        _descartar_instantanea) y las demás se reutilizan. Las carpetas que siguen como
+        están en el archivo de la unidad solo indican dónde están sus bytes. Así cuesta
+        O(carpetas cambiadas y sus hijos directos) y no O(unidad), sin recursión.
+
+        Retorna:
+        - Instantanea: La instantánea, con sus hijos (nunca solo el origen).
+        """
+        if self._instantanea is not None and self._instantanea.hijos is not None:
+            return self._instantanea
+        self._materializar()
+        # Las carpetas a copiar en preorden: recorridas al revés, cada una va después de sus subcarpetas
+        faltan = [self]
+        pila = [self]
+        while pila:
+            for nodo in pila.pop().indice_carpetas.values():
+                subcarpeta = nodo.dato
+                if subcarpeta._instantanea is None and subcarpeta._pendiente is None:
+                    faltan.append(subcarpeta)
+                    pila.append(subcarpeta)
+
+        for carpeta in reversed(faltan):
+            hijos = []
+            nodo = carpeta.primer_archivo
+            while nodo:
+                dato = nodo.dato
+                if isinstance(dato, Carpeta):
+                    if dato._instantanea is None:  # Sin cargar: se copia desde el archivo
+                        lector, inicio, fin, _, _ = dato._pendiente
+                        dato._instantanea = Instantanea(dato.nombre, dato.marca_tiempo, None, (lector, inicio, fin))
+                    dato = dato._instantanea
+                hijos.append(dato)
+                nodo = nodo.siguiente
+            carpeta._instantanea = Instantanea(carpeta.nombre, carpeta.marca_tiempo, tuple(hijos))
+        return self._instantanea
+
+    def _descartar_instantanea(self) -> None:
+        """
+        Descarta la instantánea de la carpeta y las de su ruta hasta la raíz, después de
+        un cambio: O(profundidad), igual que _propagar.
+
+        Retorna:
+        - None
+        """
+        carpeta = self
+        while carpeta is not None:
+            carpeta._instantanea = None
+            carpeta = carpeta.padre
+
+    def _encolar(self, nodo: Nodo) -> None:
+        """
+        Agrega un nodo al final de la cola y lo registra en el índice que le corresponde.
+
+        Parámetros:
+        - nodo (Nodo): El nodo a agregar. Su dato debe ser un Archivo o una Carpeta.
+
+        Retorna:
+        - None
+        """
+        self._materializar()
+        if self.primer_archivo is None:
+            self.primer_archivo = nodo
+            self.ultimo_archivo = nodo
+        else:
+            nodo.anterior = self.ultimo_archivo
+            self.ultimo_archivo.siguiente = nodo
+            self.ultimo_archivo = nodo
+
+        if isinstance(nodo.dato, Archivo):
+            self.indice_archivos[nodo.dato.nombre] = nodo
+        else:
+            self.indice_carpetas[nodo.dato.nombre] = nodo
+            nodo.dato.padre = self
+
+    def _desencolar(self, nodo: Nodo) -> None:
+        """
+        Quita un nodo de la cola en O(1) usando sus enlaces hacia ambos lados,
+        manteniendo las referencias al primer y último nodo.
+
+        Parámetros:
+        - nodo (Nodo): El nodo a quitar. Debe pertenecer a esta carpeta.
+
+        Retorna:
+        - None
+        """
+        if nodo.anterior:
+            nodo.anterior.siguiente = nodo.siguiente
+        else:
+            self.primer_archivo = nodo.siguiente
+
+        if nodo.siguiente:
+            nodo.siguiente.anterior = nodo.anterior
+        else:
+            self.ultimo_archivo = nodo.anterior
+
+        nodo.anterior = None
+        nodo.siguiente = None
+
+    def crear_archivo(self, nombre: str, contenido: Optional[str], fecha_hora: Union[int, str],
+                      hash: Optional[str] = None, tamano: Optional[int] = None,
+                      almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Método para crear un nuevo archivo y agregarlo al final de la cola.
+
+        Parámetros:
+        - nombre (str): El nombre del archivo.
+        - contenido (str | None): El contenido del archivo, o None si se pasa su hash.
+        - fecha_hora (int | str): La fecha y hora (creación o modificación)
+        - hash (str | None): El hash de un contenido que ya está en el almacén de contenidos.
+        - tamano (int | None): El tamaño en bytes de ese contenido.
+        - almacen (AlmacenContenidos | None): El almacén de la unidad, donde se guarda el
+          contenido (None para guardarlo dentro del archivo).
+
+        Retorna:
+        - None
+
+        Lanza:
+        - ValueError: Si el nombre supera LARGO_MAXIMO_NOMBRE bytes.
+        """
+        Carpeta._validar_largo(nombre)
+        archivo = Archivo(nombre, contenido, fecha_hora, hash, tamano, almacen)
+        self._encolar(Nodo(archivo))
+        self._descartar_instantanea()
+        self._propagar(Carpeta.resumen_archivo(archivo), 1)
+
+    def buscar_archivo(self, nombre: str) -> Optional['Archivo']:
+        """
+        Busca un archivo por su nombre dentro de la carpeta actual.
+
+        Parámetros:
+        - nombre (str): El nombre del archivo que se está buscando.
+
+        Retorna:
+        - Archivo | None: El archivo encontrado si existe, None si no se encuentra.
+        """
+        self._materializar()
+        nodo = self.indice_archivos.get(nombre)
+        return nodo.dato if nodo else None
+
+    def crear_carpeta(self, nombre: str, fecha_hora: Union[int, str]) -> None:
+        """
+        Método para crear una nueva carpeta y agregarla al final de la cola.
+
+        Parámetros:
+        - nombre (str): El nombre de la carpeta.
+        - fecha_hora (int | str): La fecha y hora (creación o modificación)
+
+        Retorna:
+        - None
+
+        Lanza:
+        - ValueError: Si el nombre supera LARGO_MAXIMO_NOMBRE bytes.
+        """
+        Carpeta._validar_largo(nombre)
+        nueva_carpeta = Carpeta(nombre, fecha_hora)
+        nueva_carpeta._asignar(Resumen(0, 0, 0, nueva_carpeta.marca_tiempo))
+        self._encolar(Nodo(nueva_carpeta))
+        self._descartar_instantanea()
+        self._propagar(Resumen(0, 1, 0, nueva_carpeta.marca_tiempo), 1)
+
+    @staticmethod
+    def _validar_largo(nombre: str) -> None:
+        """
+        Verifica que un nombre nuevo entre en el formato de las unidades.
+
+        Parámetros:
+        - nombre (str): El nombre del archivo o la carpeta.
+
+        Retorna:
+        - None
+
+        Lanza:
+        - ValueError: Si el nombre supera LARGO_MAXIMO_NOMBRE bytes en UTF-8.
+        """
+        if len(nombre.encode('utf-8')) > LARGO_MAXIMO_NOMBRE:
+            raise ValueError(f"El nombre es demasiado largo (máximo {LARGO_MAXIMO_NOMBRE} bytes).")
+
+    def agregar_carpeta(self, carpeta: 'Carpeta') -> None:
+        """
+        Agrega una carpeta ya armada (con su contenido) al final de la cola.
+
+        Parámetros:
+        - carpeta (Carpeta): La carpeta a agregar.
+
+        Retorna:
+        - None
+        """
+        self._encolar(Nodo(carpeta))
+        self._descartar_instantanea()
+        if self._con_totales():
+            resumen = carpeta.resumen()
+            self._propagar(resumen._replace(carpetas=resumen.carpetas + 1), 1)
+
+    def buscar_carpeta(self, nombre: str) -> Optional['Carpeta']:
+        """
+        Busca una carpeta por su nombre dentro de la carpeta actual.
+
+        Parámetros:
+        - nombre (str): El nombre de la carpeta que se está buscando.
+
+        Retorna:
+        - Carpeta | None: La carpeta encontrada si existe, None si no se encuentra.
+        """
+        self._materializar()
+        nodo = self.indice_carpetas.get(nombre)
+        return nodo.dato if nodo else None
+
+    def eliminar_archivo(self, nombre: str) -> bool:
+        """
+        Método para eliminar un archivo de la carpeta.
+
+        Parámetros:
+        - nombre (str): El nombre del archivo a eliminar.
+
+        Retorna:
+        - bool: True si el archivo fue eliminado exitosamente, False en caso contrario.
+        """
+        self._materializar()
+        nodo = self.indice_archivos.pop(nombre, None)
+        if nodo is None:
+            return False
+        self._desencolar(nodo)
+        self._descartar_instantanea()
+        self._propagar(Carpeta.resumen_archivo(nodo.dato), -1)
+        return True
+
+    def eliminar_carpeta(self, nombre: str) -> bool:
+        """
+        Método para eliminar una carpeta de la carpeta.
+
+        Parámetros:
+        - nombre (str): El nombre de la carpeta a eliminar.
+
+        Retorna:
+        - bool: True si la carpeta fue eliminada exitosamente, False en caso contrario.
+        """
+        self._materializar()
+        nodo = self.indice_carpetas.pop(nombre, None)
+        if nodo is None:
+            return False
+        self._desencolar(nodo)
+        nodo.dato.padre = None
+        self._descartar_instantanea()
+        if self._con_totales():
+            # Los totales de la carpeta eliminada solo se calculan si alguna carpeta de la ruta los usa
+            resumen = nodo.dato.resumen()
+            self._propagar(resumen._replace(carpetas=resumen.carpetas + 1), -1)
+        return True
+
+    def resumen(self) -> Resumen:
+        """
+        Los totales de la carpeta y sus subcarpetas. Se calculan una sola vez (las
+        carpetas que quedaron sin cargar en una carga diferida se calculan desde el
+        archivo, sin cargarlas) y después cada cambio los mantiene, así consultarlos
+        es O(1). Las carpetas con los totales guardados en el archivo de la unidad ya
+        los tienen al cargarse (ver Resumen.to_dict).
+
+        Las carpetas a calcular se juntan con recorrer y se calculan en el orden inverso
+        (así cada una después de sus subcarpetas), sin recursión.
+
+        Retorna:
+        - Resumen: Cantidad de archivos y subcarpetas, bytes y marca más reciente.
+        """
+        if self.total_archivos is None:
+            faltan = [self]
+            if self._pendiente is None:
+                faltan.extend(carpeta for _, carpeta, _ in self.recorrer(descender=Carpeta._sin_resumen, archivos=False)
+                              if carpeta.total_archivos is None)
+            for carpeta in reversed(faltan):
+                if carpeta._pendiente is not None:
+                    # Sin cargar: el lector calcula los totales desde el archivo
+                    lector, inicio, fin, _, _ = carpeta._pendiente
+                    carpeta._asignar(lector.resumen(inicio, fin))
+                else:
+                    carpeta._calcular_con_hijos()
+        return Resumen(self.total_archivos, self.total_carpetas, self.total_bytes, self.ultima_marca)
+
+    def _sin_resumen(self) -> bool:
+        """
+        True si hay que entrar en la carpeta para calcular sus totales (ver resumen).
+        """
+        return self._pendiente is None and self.total_archivos is None
+
+    def _asignar(self, resumen: Resumen) -> None:
+        """
+        Guarda los totales de la carpeta.
+
+        Parámetros:
+        - resumen (Resumen): Los totales.
+
+        Retorna:
+        - None
+        """
+        self.total_archivos, self.total_carpetas, self.total_bytes, self.ultima_marca = resumen
+
+    def _calcular_con_hijos(self) -> None:
+        """
+        Calcula los totales a partir de los hijos directos, que deben tener los suyos calculados.
+
+        Retorna:
+        - None
+        """
+        archivos = carpetas = tamano = 0
+        ultima = self.marca_tiempo
+        nodo = self.primer_archivo
+        while nodo:
+            dato = nodo.dato
+            if isinstance(dato, Archivo):
+                archivos += 1
+                tamano += dato.tamano or 0
+                ultima = _mas_reciente(ultima, dato.marca_tiempo)
+            else:
+                archivos += dato.total_archivos
+                carpetas += dato.total_carpetas + 1
+                tamano += dato.total_bytes
+                ultima = _mas_reciente(ultima, dato.ultima_marca)
+            nodo = nodo.siguiente
+        self._asignar(Resumen(archivos, carpetas, tamano, ultima))
+
+    @staticmethod
+    def resumen_archivo(archivo: Union[Archivo, dict]) -> Resumen:
+        """
+        Los totales con los que un archivo contribuye a su carpeta.
+
+        Parámetros:
+        - archivo (Archivo | dict): El archivo, como objeto o como diccionario de to_dict.
+
+        Retorna:
+        - Resumen: Un archivo, su tamaño y su marca.
+        """
+        if isinstance(archivo, Archivo):
+            return Resumen(1, 0, archivo.tamano or 0, archivo.marca_tiempo)
+        if archivo.get('tamano') is not None:
+            tamano = archivo['tamano']
+        else:
+            tamano = len((archivo.get('contenido') or '').encode('utf-8'))
+        return Resumen(1, 0, tamano, convertir_a_marca(archivo.get('fecha_hora')))
+
+    @staticmethod
+    def resumen_dict(data: dict) -> Resumen:
+        """
+        Calcula los totales de una carpeta en forma de diccionario (ver to_dict).
+
+        Parámetros:
+        - data (dict): La carpeta.
+
+        Retorna:
+        - Resumen: Los totales de la carpeta.
+        """
+        archivos = carpetas = tamano = 0
+        ultima = convertir_a_marca(data.get('fecha_hora'))
+        pendientes = list(data['archivos'])
+        while pendientes:
+            hijo = pendientes.pop()
+            ultima = _mas_reciente(ultima, convertir_a_marca(hijo.get('fecha_hora')))
+            if 'archivos' in hijo:
+                carpetas += 1
+                pendientes.extend(hijo['archivos'])
+            else:
+                archivos += 1
+                tamano += Carpeta.resumen_archivo(hijo).bytes
+        return Resumen(archivos, carpetas, tamano, ultima)
+
+    def _con_totales(self) -> bool:
+        """
+        True si la carpeta o alguna carpeta de su ruta hasta la raíz tiene sus totales
+        calculados (y por lo tanto hay que mantenerlos con cada cambio).
+        """
+        carpeta = self
+        while carpeta is not None:
+            if carpeta.total_archivos is not None:
+                return True
+            carpeta = carpeta.padre
+        return False
+
+    def _propagar(self, cambio: Resumen, signo: int) -> None:
+        """
+        Suma (o resta) un cambio a los totales de la carpeta y de todas las carpetas de
+        su ruta hasta la raíz: O(profundidad).
+
+        Al agregar, la marca más reciente de cada carpeta es la mayor entre la suya y la
+        del cambio. Al quitar lo que tenía la marca más reciente de una carpeta, esa marca
+        se recalcula con los totales de sus hijos directos (ver _recalcular_ultima); si la
+        carpeta la conserva (otro hijo tiene la misma), las de más arriba tampoco cambian
+        y no se recalculan. Así, en el peor caso, quitar cuesta O(profundidad * hijos
+        directos de las carpetas de la ruta).
+
+        Parámetros:
+        - cambio (Resumen): Los totales de lo que se agregó o se quitó.
+        - signo (int): 1 si se agregó, -1 si se quitó.
+
+        Retorna:
+        - None
+        """
+        recalcular = signo < 0 and cambio.ultima is not None
+        carpeta = self
+        while carpeta is not None:
+            if carpeta.total_archivos is not None:
+                carpeta.total_archivos += signo * cambio.archivos
+                carpeta.total_carpetas += signo * cambio.carpetas
+                carpeta.total_bytes += signo * cambio.bytes
+                if signo > 0:
+                    carpeta.ultima_marca = _mas_reciente(carpeta.ultima_marca, cambio.ultima)
+                elif recalcular and carpeta.ultima_marca == cambio.ultima:
+                    carpeta._recalcular_ultima()
+                    recalcular = carpeta.ultima_marca != cambio.ultima
+            carpeta = carpeta.padre
+
+    def _recalcular_ultima(self) -> None:
+        """
+        Recalcula la marca más reciente con la marca propia y las de los hijos directos,
+        usando los totales de las subcarpetas: O(hijos directos) si ya los tienen.
+
+        Retorna:
+        - None
+        """
+        ultima = self.marca_tiempo
+        for hijo in self.listar():
+            ultima = _mas_reciente(ultima, hijo.marca_tiempo if isinstance(hijo, Archivo) else hijo.resumen().ultima)
+        self.ultima_marca = ultima
+
+    def listar(self) -> Iterator[Union[Archivo, 'Carpeta']]:
+        """
+        Recorre los archivos y carpetas de la carpeta en el orden en que fueron creados.
+
+        Retorna:
+        - Iterator[Archivo | Carpeta]: Los elementos de la cola.
+        """
+        self._materializar()
+        nodo_actual = self.primer_archivo
+        while nodo_actual:
+            yield nodo_actual.dato
+            nodo_actual = nodo_actual.siguiente
+
+    def listar_carpetas(self) -> Iterator['Carpeta']:
+        """
+        Recorre solo las subcarpetas, en el orden en que fueron creadas (el índice
+        conserva el orden de la cola), sin pasar por los archivos.
+
+        Retorna:
+        - Iterator[Carpeta]: Las subcarpetas.
+        """
+        self._materializar()
+        for nodo in self.indice_carpetas.values():
+            yield nodo.dato
+
+    def listar_archivos(self) -> Iterator[Archivo]:
+        """
+        Recorre solo los archivos, en el orden en que fueron creados.
+
+        Retorna:
+        - Iterator[Archivo]: Los archivos.
+        """
+        self._materializar()
+        for nodo in self.indice_archivos.values():
+            yield nodo.dato
+
+    def recorrer(self, profundidad_maxima: Optional[int] = None,
+                 descender: Optional[Callable[['Carpeta'], bool]] = None,
+                 archivos: bool = True) -> Iterator[tuple[int, Union[Archivo, 'Carpeta'], bool]]:
+        """
+        Recorre en profundidad (preorden) el contenido de la carpeta, sin recursión: cada
+        carpeta aparece antes que su contenido y cada nivel en el orden de la cola.
+
+        Por cada nivel abierto solo se guarda el próximo nodo a visitar, así la memoria
+        depende de la profundidad y no de la cantidad de elementos, y no hay límite de
+        profundidad. Las carpetas pendientes de una carga diferida se cargan al entrar
+        en ellas, salvo que 'descender' lo evite.
+
+        Parámetros:
+        - profundidad_maxima (int | None): No se entra en las carpetas de esa profundidad
+          (1 recorre solo los hijos directos); None para recorrer todo.
+        - descender (Callable[[Carpeta], bool] | None): Si se indica, solo se entra en las
+          carpetas para las que devuelve True (las demás se visitan igual).
+        - archivos (bool): Si es False solo se recorren las carpetas.
+
+        Retorna:
+        - Iterator[tuple[int, Archivo | Carpeta, bool]]: (profundidad, elemento, es el último
+          de su carpeta) de cada elemento; la profundidad es 1 para los hijos directos. Son
+          tuplas simples y no NamedTuple porque se crea una por elemento.
+        """
+        self._materializar()
+        nodo = self.primer_archivo
+        while not archivos and nodo is not None and isinstance(nodo.dato, Archivo):
+            nodo = nodo.siguiente
+        pila = [nodo]  # Por cada nivel abierto, el próximo nodo a visitar
+        while pila:
+            nodo = pila[-1]
+            if nodo is None:
+                pila.pop()
+                continue
+            siguiente = nodo.siguiente
+            while not archivos and siguiente is not None and isinstance(siguiente.dato, Archivo):
+                siguiente = siguiente.siguiente
+            pila[-1] = siguiente
+
+            dato = nodo.dato
+            profundidad = len(pila)
+            yield profundidad, dato, siguiente is None
+            if isinstance(dato, Carpeta) and (profundidad_maxima is None or profundidad < profundidad_maxima) \
+                    and (descender is None or descender(dato)):
+                dato._materializar()
+                nodo = dato.primer_archivo
+                while not archivos and nodo is not None and isinstance(nodo.dato, Archivo):
+                    nodo = nodo.siguiente
+                pila.append(nodo)
+
+    def to_dict(self) -> dict:
+        """
+        Convierte la carpeta a un diccionario, sin recursión: las subcarpetas se visitan
+        con recorrer y cada una arma la lista de sus hijos directos.
+
+        Retorna:
+        - dict: La carpeta convertida a un diccionario.
+        """
+        if self._pendiente is not None:
+            # Sin cargar: se convierte directamente desde el archivo, sin crear nodos
+            lector, inicio, fin, _, _ = self._pendiente
+            return lector.a_dict(inicio, fin)
+
+        data = {'nombre': self.nombre, 'fecha_hora': self.fecha_hora, 'archivos': []}
+        listas = {self: data['archivos']}  # Carpetas cargadas por visitar -> lista de sus hijos
+        self._dict_hijos(listas)
+        # Las carpetas pendientes ya quedaron convertidas desde el archivo: no se entra en ellas
+        for _, carpeta, _ in self.recorrer(descender=Carpeta._cargada, archivos=False):
+            if carpeta._pendiente is None:
+                carpeta._dict_hijos(listas)
+        return data
+
+    def _dict_hijos(self, listas: dict) -> None:
+        """
+        Agrega los hijos directos de la carpeta a su lista de to_dict. Las subcarpetas
+        cargadas se agregan vacías y sus listas quedan en 'listas' para completarlas al
+        visitarlas.
+
+        Parámetros:
+        - listas (dict): Carpeta -> lista de sus hijos en el diccionario.
+
+        Retorna:
+        - None
+        """
+        lista = listas.pop(self)
+        nodo = self.primer_archivo
+        while nodo:
+            dato = nodo.dato
+            if isinstance(dato, Archivo) or dato._pendiente is not None:
+                lista.append(dato.to_dict())
+            else:
+                hijos = listas[dato] = []
+                lista.append({'nombre': dato.nombre, 'fecha_hora': dato.fecha_hora, 'archivos': hijos})
+            nodo = nodo.siguiente
+
+    def _cargada(self) -> bool:
+        """
+        True si la carpeta no quedó pendiente de una carga diferida (para usar como
+        'descender' en recorrer y no cargar las carpetas pendientes).
+        """
+        return self._pendiente is None
+
+    @classmethod
+    def from_dict(cls, data: dict, almacen: Optional[AlmacenContenidos] = None):
+        """
+        Crea una instancia de Carpeta a partir de un diccionario, sin recursión (igual
+        que to_dict): cada carpeta arma su cola con sus hijos directos y las subcarpetas
+        quedan en una pila hasta armar la suya, así no hay límite de profundidad.
+
+        Parámetros:
+        - data (dict): El diccionario que contiene los datos de la carpeta.
+        - almacen (AlmacenContenidos | None): El almacén de la unidad, al que se pasan los
+          contenidos en línea (ver Archivo.from_dict).
+
+        Retorna:
+        - Carpeta: Una nueva instancia de Carpeta creada a partir del diccionario.
+        """
+        raiz = cls(data['nombre'], data.get('fecha_hora'))
+        pendientes = [(raiz, data)]  # Carpetas creadas a las que les falta su contenido
+        while pendientes:
+            carpeta, data = pendientes.pop()
+            if 'resumen' in data:  # Totales guardados (ver Resumen.to_dict)
+                carpeta._asignar(Resumen.from_dict(data['resumen']))
+            for archivo_data in data['archivos']:
+                if 'archivos' not in archivo_data:  # Es un archivo
+                    carpeta._encolar(Nodo(Archivo.from_dict(archivo_data, almacen)))
+                else:  # Es una subcarpeta
+                    subcarpeta = cls(archivo_data['nombre'], archivo_data.get('fecha_hora'))
+                    carpeta._encolar(Nodo(subcarpeta))
+                    pendientes.append((subcarpeta, archivo_data))
+        return raiz
+
+    def guardar_json(self, filename: str) -> None:
+        """
+        Guarda la carpeta y sus archivos en formato JSON.
+
+        Parámetros:
+        - filename (str): El nombre del archivo JSON donde se va a guardar la carpeta.
+
+        Retorna:
+        - None
+        """
+        # Escritura atómica con suma de verificación (ver escritura_segura)
+        guardar_json(filename, self.to_dict())
+
+    @classmethod
+    def cargar_json(cls, filename: str):
+        """
+        Carga una carpeta y sus archivos desde un archivo JSON.
+
+        Parámetros:
+        - filename (str): El nombre del archivo JSON desde donde se va a cargar la carpeta.
+
+        Retorna:
+        - Carpeta: Una nueva instancia de Carpeta cargada desde el archivo JSON.
+        """
+        return cls.from_dict(cargar_json(filename))
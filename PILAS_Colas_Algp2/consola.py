@@ -1,525 +1,788 @@
-from archivo import Archivo
-from carpeta import Carpeta
-from typing import Union
-from datetime import datetime
-from re import match
-from registro import Registro
-
-
-class Consola():
-    def __init__(self, unidad: str, configuracion: dict):
-        # Obtener la fecha y hora actual
-        fecha_actual = datetime.now()
-
-        # Formatear la fecha y hora en el formato deseado
-        fecha_formateada = fecha_actual.strftime("%d/%m/%Y %I:%M %p")
-
-        self.unidad: Carpeta = Carpeta(unidad, fecha_formateada)
-
-        self.filename_unidad = configuracion['ruta_unidades'] + \
-            '/' + configuracion['unidades'][0]['nombre_archivo']
-
-        self.filename_operaciones_errores = configuracion['ruta_operaciones_errores'] + \
-            '/' + configuracion['nombre_archivo_operaciones_errores']
-
-        self.filename_respaldo = configuracion['ruta_respaldo']+'/'
-
-        self.registro = Registro()
-
-        # Ruta actual (La que se mostrará en consola)
-        self.ruta_actual: str = unidad
-        self.cargar()
-        self.ejecutar()
-
-    def cargar(self) -> None:
-        """
-        Carga la estructura de carpetas, errores, operaciones y respaldo desde un archivo JSON o crea uno nuevo si no existe.
-
-        Retorna:
-        - None
-        """
-        try:
-            # Intentar cargar la estructura de la carpeta principal desde el archivo JSON
-            self.unidad: Carpeta = Carpeta.cargar_json(self.filename_unidad)
-        except FileNotFoundError:
-            # Si no se encuentra el archivo, imprimir un mensaje y crear una nueva unidad
-            print(
-                f"No se encontró el archivo '{self.filename_unidad}'. Se creará un nuevo archivo para la unidad {self.unidad.nombre}.")
-            self.unidad.guardar_json(self.filename_unidad)
-
-        try:
-            # Intentar cargar la estructura de la carpeta principal desde el archivo JSON
-            self.registro.cargar_registros(self.filename_operaciones_errores)
-        except FileNotFoundError:
-            # Si no se encuentra el archivo, imprimir un mensaje y crear una nueva unidad
-            print(
-                f"No se encontró el archivo '{self.filename_operaciones_errores}'. Se creará un nuevo archivo para las operaciones y errores.")
-            self.registro.guardar_registros(self.filename_operaciones_errores)
-
-    def ejecutar(self):
-        while True:
-            entrada = input(f"{self.ruta_actual}\>" if self.ruta_actual ==
-                            self.unidad.nombre else f"{self.ruta_actual}>").strip()
-            try:
-                self.comando(entrada)
-                # Obtener la fecha y hora actual
-                fecha_actual = datetime.now()
-
-                # Formatear la fecha y hora en el formato deseado
-                fecha_formateada = fecha_actual.strftime("%d/%m/%Y %I:%M %p")
-
-                self.registro.agregar_operacion(
-                    f"fecha: {fecha_formateada} - entrada: {entrada}")
-
-                self.registro.guardar_registros(
-                    self.filename_operaciones_errores)
-
-            except Exception as e:
-                print(f"{e}")
-                # Obtener la fecha y hora actual
-                fecha_actual = datetime.now()
-
-                # Formatear la fecha y hora en el formato deseado
-                fecha_formateada = fecha_actual.strftime("%d/%m/%Y %I:%M %p")
-
-                self.registro.agregar_error(
-                    f'fecha: {fecha_formateada} - entrada: {entrada} - error: {e}')
-
-                self.registro.guardar_registros(
-                    self.filename_operaciones_errores)
-
-    def comando(self, entrada: str):
-        """
-        Método que ejecuta comandos ingresados por el usuario en la consola.
-
-        Parámetros:
-        - entrada (str): La entrada ingresada por el usuario en la consola.
-
-        No retorna ningún valor.
-        """
-        if entrada.lower() == "exit":
-            print("Saliendo de la consola...")
-            exit()
-
-        elif entrada.lower() == "clear log":
-            error_eliminado = self.registro.eliminar_ultimo_error()
-            if error_eliminado:
-                print("Se ha eliminado el último error.")
-                print(f"{error_eliminado}")
-            else:
-                print("Historial de errores vacío.")
-            return
-
-        elif entrada.lower() == "log":
-            print("Historial de errores: ")
-            for error in self.registro.ver_errores():
-                print(error)
-
-            print("")
-
-            print("Historial de operaciones")
-            for operacion in self.registro.ver_operaciones():
-                print(operacion)
-            return
-
-        partes_entrada = entrada.split(" ")
-        comando = partes_entrada[0].lower()
-        argumentos = partes_entrada[1:]
-
-        if comando == "cd":
-            if len(argumentos) != 1:
-                raise ValueError("Uso incorrecto del comando. Uso: cd ruta")
-            self.cd(argumentos[0])
-
-        elif comando == "mkdir":
-            if len(argumentos) != 1:
-                raise ValueError("Uso incorrecto del comando. Uso: mkdir ruta")
-            self.mkdir(argumentos[0])
-
-        elif comando == "type":
-            if len(entrada.split(" ", 2)) != 3:
-                raise ValueError(
-                    "Uso incorrecto del comando. Uso: type ruta contenido")
-
-            argumentos = entrada.split(" ", 1)[1]
-            if not ' "' in argumentos or argumentos.count('"') != 2:
-                raise ValueError(
-                    'Uso incorrecto del comando. Uso: type ruta "contenido"')
-
-            # Dividir en dos partes, máximo 1 división
-            ruta, contenido = argumentos.split(' "', 1)
-            # Eliminar la comilla al final del contenido
-            contenido = contenido.rstrip('"')
-            self.type(ruta, contenido)
-
-        elif comando == "rmdir":
-            if len(argumentos) != 1:
-                raise ValueError("Uso incorrecto del comando. Uso: rmdir ruta")
-            self.rmdir(argumentos[0])
-
-        elif comando == "dir":
-            if len(argumentos) > 1:
-                raise ValueError("Uso incorrecto del comando. Uso: dir [ruta]")
-            self.dir(argumentos if not argumentos else argumentos[0])
-
-        else:
-            raise ValueError(
-                "Comando no reconocido. Los comandos disponibles son: cd, mkdir, type, rmdir, dir, exit, log")
-
-    def type(self, ruta: str, contenido: str):
-        """
-        Método que crea un nuevo archivo con el contenido especificado en la ruta especificada.
-
-        Parámetros:
-        - ruta (str): La ruta donde se creará el nuevo archivo.
-        - contenido (str): El contenido del archivo a crear.
-
-        No retorna ningún valor.
-        """
-        campos = ruta.split("/")
-        nombre_archivo = campos[-1].strip()
-
-        ruta_archivo = '/'.join(campos[:-1])
-
-        if not ruta_archivo:  # Se crea la carpeta en el directorio actual
-            nodo = self.obtener_nodo_ruta_actual()
-
-        elif ':' in ruta_archivo:
-            aux = self.ruta_actual
-            self.ruta_actual = self.unidad.nombre
-            nodo = self.obtener_nodo_ruta_actual()
-            self.ruta_actual = aux
-
-            ruta_partes = ruta_archivo.split("/")[1:]
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-        else:
-            nodo = self.obtener_nodo_ruta_actual()
-
-            ruta_partes = ruta_archivo.split("/")
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-        if nombre_archivo[-4:] != ".txt":
-            raise ValueError(
-                "El nombre del archivo no posee la extensión '.txt'.")
-
-        nombre_sin_extension = nombre_archivo[:-4]
-
-        if not nombre_sin_extension:
-            raise ValueError("El nombre no puede quedar vacío.")
-
-        if not self.contiene_caracteres_validos(nombre_sin_extension):
-            raise ValueError(
-                "Nombre con caracteres inválidos. Caracteres permitidos: letras de la a-z y A-Z,espacios en blanco y números del 0 al 9.")
-
-        if nodo.buscar_archivo(nombre_archivo):
-            raise ValueError("Ya existe un archivo con ese mismo nombre.")
-
-        # Obtener la fecha y hora actual
-        fecha_actual = datetime.now()
-        # Formatear la fecha y hora en el formato deseado
-        fecha_formateada = fecha_actual.strftime("%d/%m/%Y %I:%M %p")
-
-        nodo.crear_archivo(nombre_archivo, contenido, fecha_formateada)
-        ruta_archivo = self.ruta_actual if not ruta_archivo else self.ruta_actual+'\\' + \
-            ruta_archivo.replace(
-                '/', '\\') if not ':' in ruta_archivo else ruta_archivo.replace('/', '\\')
-        print(
-            f"Archivo '{nombre_archivo}' creado correctamente en {ruta_archivo}")
-        self.unidad.guardar_json(self.filename_unidad)
-
-    def mkdir(self, ruta: str):
-        """
-        Método que crea una nueva carpeta en la ruta especificada.
-
-        Parámetros:
-        - ruta (str): La ruta donde se creará la nueva carpeta.
-
-        No retorna ningún valor.
-        """
-        campos = ruta.split("/")
-        nombre_carpeta = campos[-1].strip()
-        ruta_carpeta = '/'.join(campos[:-1])
-
-        if not ruta_carpeta:  # Se crea la carpeta en el directorio actual
-            nodo = self.obtener_nodo_ruta_actual()
-
-        elif ':' in ruta_carpeta:
-            aux = self.ruta_actual
-            self.ruta_actual = self.unidad.nombre
-            nodo = self.obtener_nodo_ruta_actual()
-            self.ruta_actual = aux
-
-            ruta_partes = ruta_carpeta.split("/")[1:]
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-        else:
-            nodo = self.obtener_nodo_ruta_actual()
-
-            ruta_partes = ruta_carpeta.split("/")
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-        if not nombre_carpeta:
-            raise ValueError("El nombre no puede quedar vacío.")
-
-        if not self.contiene_caracteres_validos(nombre_carpeta):
-            raise ValueError(
-                "Nombre con caracteres inválidos. Caracteres permitidos: letras de la a-z y A-Z,espacios en blanco y números del 0 al 9.")
-
-        if nodo.buscar_carpeta(nombre_carpeta):
-            raise ValueError("Ya existe una carpeta con ese mismo nombre.")
-
-        # Obtener la fecha y hora actual
-        fecha_actual = datetime.now()
-        # Formatear la fecha y hora en el formato deseado
-        fecha_formateada = fecha_actual.strftime("%d/%m/%Y %I:%M %p")
-
-        nodo.crear_carpeta(nombre_carpeta, fecha_formateada)
-
-        ruta_carpeta = self.ruta_actual if not ruta_carpeta else self.ruta_actual+'\\' + \
-            ruta_carpeta.replace(
-                '/', '\\') if not ':' in ruta_carpeta else ruta_carpeta.replace('/', '\\')
-        print(
-            f"Carpeta '{nombre_carpeta}' creada correctamente en {ruta_carpeta}")
-        self.unidad.guardar_json(self.filename_unidad)
-
-    def rmdir(self, ruta: str):
-        """
-        Método que elimina una carpeta especificada por la ruta.
-
-        Parámetros:
-        - ruta (str): La ruta de la carpeta a eliminar.
-
-        No retorna ningún valor.
-        """
-        campos = ruta.split("/")
-        nombre_carpeta = campos[-1].strip()
-        ruta_carpeta = '/'.join(campos[:-1])
-
-        if not ruta_carpeta:  # Directorio actual
-            nodo = self.obtener_nodo_ruta_actual()
-
-        elif ':' in ruta_carpeta:
-            aux = self.ruta_actual
-            self.ruta_actual = self.unidad.nombre
-            nodo = self.obtener_nodo_ruta_actual()
-            self.ruta_actual = aux
-
-            ruta_partes = ruta_carpeta.split("/")[1:]
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-        else:
-            nodo = self.obtener_nodo_ruta_actual()
-
-            ruta_partes = ruta_carpeta.split("/")
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-        if not nombre_carpeta:
-            raise ValueError("El nombre no puede quedar vacío.")
-
-        if not self.contiene_caracteres_validos(nombre_carpeta):
-            raise ValueError(
-                "Nombre con caracteres inválidos. Caracteres permitidos: letras de la a-z y A-Z,espacios en blanco y números del 0 al 9.")
-
-        ruta_carpeta = self.ruta_actual if not ruta_carpeta else self.ruta_actual+'\\' + \
-            ruta_carpeta.replace(
-                '/', '\\') if not ':' in ruta_carpeta else ruta_carpeta.replace('/', '\\')
-
-        if not nodo.buscar_carpeta(nombre_carpeta):
-            raise ValueError(
-                f"No se pudo encontrar la carpeta '{nombre_carpeta}' en {ruta_carpeta}")
-
-        nombre_respaldo: str = ''
-        nombre_respaldo += self.filename_respaldo
-        nombre_respaldo += f"Eliminación de carpeta '{nombre_carpeta}' en Unidad {self.unidad.nombre[:-1]}"
-        nombre_respaldo += ".json"
-
-        # Respaldamos antes de borrar la carpeta
-        self.unidad.guardar_json(nombre_respaldo)
-
-        nodo.eliminar_carpeta(nombre_carpeta)
-
-        print(
-            f"Carpeta '{nombre_carpeta}' eliminada correctamente de {ruta_carpeta}")
-        self.unidad.guardar_json(self.filename_unidad)
-
-    def contiene_caracteres_validos(self, cadena: str):
-        """
-        Verifica si una cadena contiene solo caracteres válidos: letras de la a-z y A-Z,
-        espacios en blanco y números del 0 al 9.
-
-        Parámetros:
-        - cadena (str): La cadena a verificar.
-
-        Retorna:
-        - bool: True si la cadena contiene solo caracteres válidos, False en caso contrario.
-        """
-        # Patrón para caracteres válidos: letras de la a-z y A-Z, espacios en blanco y números del 0 al 9
-        patron = r'^[a-zA-Z0-9\s]*$'
-
-        # Verificar si la cadena coincide con el patrón
-        if match(patron, cadena):
-            return True
-        else:
-            return False
-
-    def dir(self, ruta: str):
-        """
-        Método que muestra el contenido de la carpeta en la ruta especificada.
-
-        Parámetros:
-        - ruta (str): La ruta de la carpeta a mostrar.
-
-        No retorna ningún valor.
-        """
-
-        if not ruta:
-            nodo = self.obtener_nodo_ruta_actual()
-            nodo.mostrar_contenido(self.ruta_actual)
-
-        elif ":" in ruta:
-            aux = self.ruta_actual
-            self.ruta_actual = self.unidad.nombre
-            nodo = self.obtener_nodo_ruta_actual()
-            self.ruta_actual = aux
-
-            ruta_partes = ruta.split("/")[1:]
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-            nodo.mostrar_contenido(ruta.replace('/', '\\'))
-
-        else:
-            nodo = self.obtener_nodo_ruta_actual()
-
-            ruta_partes = ruta.split("/")
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-            nodo.mostrar_contenido(
-                self.ruta_actual+"\\" + ruta.replace("/", "\\"))
-
-    def cd(self, ruta: str):
-        """
-        Cambia el directorio actual a la ruta especificada.
-
-        Parámetros:
-        - ruta (str): La ruta a la que se desea cambiar el directorio actual.
-
-        No retorna ningún valor.
-        """
-        # Caso: cd  ..  (Regresa  al  directorio  padre)
-        if ruta == "..":
-            nodo = self.obtener_nodo_padre()
-            if nodo and nodo.nombre == self.unidad.nombre:
-                self.ruta_actual = self.unidad.nombre
-
-            elif nodo:
-                componentes_ruta = self.ruta_actual.split('\\')
-                self.ruta_actual = '\\'.join(componentes_ruta[:-1])
-
-        # Caso: cd C:/Documentos/Proyectos
-        elif ":" in ruta:
-            aux = self.ruta_actual
-            self.ruta_actual = self.unidad.nombre
-            nodo = self.obtener_nodo_ruta_actual()
-            self.ruta_actual = aux
-
-            ruta_partes = ruta.split("/")[1:]
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-            self.ruta_actual = ruta.replace("/", "\\")
-
-        # Casso: cd  /usuario/nombre_de_usuario  (Cambia  a  una  ruta  absoluta)
-        else:
-            nodo = self.obtener_nodo_ruta_actual()
-
-            ruta_partes = ruta.split("/")
-
-            for parte in ruta_partes:
-                nodo = nodo.buscar_carpeta(parte)
-                if not nodo:
-                    raise ValueError("La ruta especificada no existe.")
-
-            self.ruta_actual += "\\" + ruta.replace("/", "\\")
-
-    def obtener_nodo_padre(self) -> Union[None, Carpeta]:
-        """
-        Obtiene el nodo padre de la carpeta actual.
-
-        Retorna:
-        - Carpeta | None: La carpeta padre si existe, None si la carpeta actual es la raíz.
-        """
-        # Dividir la ruta actual en componentes separados por '\'
-        componentes_ruta = self.ruta_actual.split(
-            '\\')  # Tipo de datos esperado: str
-
-        # Eliminar el último componente de la ruta (nombre de la carpeta actual)
-        # Tipo de datos esperado: str
-        ruta_padre = '\\'.join(componentes_ruta[:-1])
-        # Si la ruta padre está vacía, significa que la ruta actual es la raíz y no tiene un nodo padre
-        if not ruta_padre:
-            return None
-        # Realizar una búsqueda en la estructura de carpetas a partir de la ruta padre
-        # Tipo de datos esperado: Carpeta (suposición)
-        nodo_actual = self.unidad
-        # Tipo de datos esperado: str
-        for componente in ruta_padre.split('\\'):
-            if componente != self.unidad.nombre:
-                # Tipo de datos esperado: Union[None, Carpeta]
-                nodo_actual = nodo_actual.buscar_carpeta(componente)
-        return nodo_actual  # Tipo de datos esperado: Union[None, Carpeta]
-
-    def obtener_nodo_ruta_actual(self) -> Carpeta:
-        """
-        Obtiene el nodo correspondiente a la ruta actual.
-
-        Retorna:
-        - Carpeta: La carpeta correspondiente a la ruta actual.
-        """
-        componentes_ruta = self.ruta_actual.split(
-            '\\')  # Tipo de datos esperado: str
-
-        ruta = '\\'.join(componentes_ruta[1:])  # Tipo de datos esperado: str
-
-        if not ruta:
-            return self.unidad  # Si la ruta está vacía, devuelve None
-
-        # Tipo de datos esperado: Carpeta (suposición)
-        nodo_actual = self.unidad
-        for componente in ruta.split('\\'):  # Tipo de datos esperado: str
-            # Tipo de datos esperado: Union[None, Carpeta]
-            nodo_actual = nodo_actual.buscar_carpeta(componente)
-        return nodo_actual  # Tipo de datos esperado: Carpeta
+from datetime import datetime, timedelta
+from escritor import EscritorSegundoPlano
+from escritura_segura import escribir_atomico
+from fecha import FORMATO_FECHA, formatear_fecha, marca_actual
+from functools import partial
+from historial import RegistroComando
+from itertools import chain
+from json import dumps
+from metricas import FASES, GUARDADO, Metricas
+from re import match
+from registro import CorteRegistros, Registro
+from salida_paginada import SalidaPaginada
+from sistema_archivos import Arbol, Entrada, Listado, SistemaArchivos
+from shlex import split
+from time import perf_counter_ns
+from typing import Callable, Iterable, Union
+
+
+class Consola():
+    """
+    Interfaz de línea de comandos sobre SistemaArchivos: interpreta cada entrada,
+    muestra los resultados y lleva el historial de operaciones y errores.
+    """
+
+    def __init__(self, unidad: str, configuracion: dict):
+        # Tiempos de cada comando por fase, para el comando stats
+        self.metricas = Metricas(configuracion.get('ventana_metricas', 1000),
+                                 configuracion.get('metricas', True))
+        self.archivo_metricas: str = configuracion.get('archivo_metricas', '')
+
+        # La unidad se abre recién en cargar (o con el primer comando)
+        self.sistema = SistemaArchivos(unidad, configuracion, self.metricas)
+
+        self.filename_operaciones_errores = configuracion['ruta_operaciones_errores'] + \
+            '/' + configuracion['nombre_archivo_operaciones_errores']
+
+        # Solo los registros más recientes quedan en memoria; los demás se archivan
+        self.registro = Registro(
+            configuracion.get('capacidad_registros', 1000),
+            configuracion.get('tamano_archivo_registros_kb', 1024) * 1024,
+            configuracion.get('max_archivos_registros', 5))
+
+        # En la consola interactiva los cambios se guardan en un hilo aparte
+        self.guardado_segundo_plano: bool = configuracion.get('guardado_segundo_plano', False)
+        self.intervalo_guardado: float = configuracion.get('intervalo_guardado', 1.0)
+
+        # Líneas por página de 'dir /p'. Solo se pagina en la consola interactiva.
+        self.lineas_pagina: int = configuracion.get('lineas_pagina', 24)
+        self.interactiva = False
+        # Cómo se espera al usuario en la pausa de cada página; con guardado en segundo
+        # plano se libera mientras tanto el candado del escritor
+        self.preguntar: Callable[[str], str] = input
+
+    def cargar(self) -> None:
+        """
+        Carga la estructura de carpetas, errores, operaciones y respaldo desde un archivo JSON o crea uno nuevo si no existe.
+
+        Retorna:
+        - None
+        """
+        # Intentar cargar la estructura de la carpeta principal desde el archivo JSON
+        # y aplicarle las operaciones pendientes de la bitácora
+        if not self.sistema.abrir():
+            # Si no se encuentra el archivo, imprimir un mensaje (se creó una nueva unidad)
+            print(
+                f"No se encontró el archivo '{self.sistema.filename_unidad}'. Se creará un nuevo archivo para la unidad {self.sistema.nombre_unidad}.")
+
+        try:
+            # Intentar cargar la estructura de la carpeta principal desde el archivo JSON
+            self.registro.cargar_registros(self.filename_operaciones_errores)
+        except FileNotFoundError:
+            # Si no se encuentra el archivo, imprimir un mensaje y crear una nueva unidad
+            print(
+                f"No se encontró el archivo '{self.filename_operaciones_errores}'. Se creará un nuevo archivo para las operaciones y errores.")
+            self.registro.guardar_registros(self.filename_operaciones_errores)
+
+    def ejecutar(self):
+        """
+        Lee y ejecuta comandos de la consola hasta que se ingresa 'exit'.
+
+        Con guardado en segundo plano, cada comando solo escribe su operación en la
+        bitácora (sin esperar al disco) y un EscritorSegundoPlano sincroniza la bitácora,
+        hace los puntos de control y guarda los registros cada 'intervalo_guardado'
+        segundos. Los comandos solo esperan al escritor mientras toma el corte de lo que
+        va a guardar (ver persistir), y el escritor no espera a un comando pausado en
+        'dir /p'. Al salir se guarda todo lo pendiente.
+
+        No retorna ningún valor.
+        """
+        self.interactiva = True
+        escritor = None
+        if self.guardado_segundo_plano:
+            self.sistema.diferir(True)
+            escritor = EscritorSegundoPlano(
+                [self.persistir, self.cortar_registros], self.intervalo_guardado)
+            self.preguntar = partial(escritor.sin_candado, input)
+        try:
+            while True:
+                ruta_actual = self.sistema.ruta_actual
+                try:
+                    entrada = input(f"{ruta_actual}\>" if ruta_actual ==
+                                    self.sistema.nombre_unidad else f"{ruta_actual}>").strip()
+                except EOFError:  # Fin de la entrada (Ctrl+D / Ctrl+Z): igual que exit
+                    print("\nSaliendo de la consola...")
+                    break
+                if escritor is None:
+                    self.procesar(entrada)
+                    self.guardar_registros()
+                    continue
+
+                with escritor.candado:
+                    self.procesar(entrada)
+                try:
+                    escritor.marcar()
+                except Exception as e:
+                    print(f"Error al guardar los cambios: {e}")
+        finally:
+            try:
+                if escritor is not None:
+                    self.preguntar = input
+                    escritor.detener()
+            finally:
+                # Aunque falle el último guardado se cierran las unidades y se guardan los registros
+                if escritor is not None:
+                    self.sistema.diferir(False)
+                self.guardar_metricas()
+                self.sistema.cerrar()
+                self.guardar_registros()
+
+    def ejecutar_script(self, lineas: Iterable[str], guardar_cada: int = 1000) -> None:
+        """
+        Ejecuta comandos sin interacción, por ejemplo desde un archivo o la entrada estándar.
+
+        Durante el script la bitácora no se sincroniza con el disco en cada operación ni
+        hace puntos de control: cada 'guardar_cada' comandos se sincroniza la bitácora y
+        se guardan los registros, y al terminar se guarda la unidad completa una sola vez.
+        Las líneas vacías y las que empiezan con '#' se ignoran; 'exit' termina el script.
+
+        Parámetros:
+        - lineas (Iterable[str]): Los comandos, uno por línea.
+        - guardar_cada (int): Cantidad de comandos entre guardados intermedios.
+
+        No retorna ningún valor.
+        """
+        self.sistema.diferir(True)
+        ejecutados = 0
+        try:
+            for linea in lineas:
+                entrada = linea.strip()
+                if not entrada or entrada.startswith('#'):
+                    continue
+                if entrada.lower() == "exit":
+                    break
+
+                self.procesar(entrada)
+                ejecutados += 1
+                if ejecutados % guardar_cada == 0:
+                    with self.metricas.medir('persistir', GUARDADO):
+                        self.sistema.sincronizar()
+                    self.guardar_registros()
+        finally:
+            self.sistema.diferir(False)
+            with self.metricas.medir('persistir', GUARDADO):
+                self.sistema.guardar()
+            self.guardar_metricas()
+            self.sistema.cerrar()
+            self.guardar_registros()
+
+    def persistir(self) -> Callable[[], None]:
+        """
+        Tarea del escritor en segundo plano: toma el corte de las unidades con el
+        candado (ver SistemaArchivos.tomar_corte) y devuelve la función que lo guarda
+        sin el candado, que mide el tiempo de todo el guardado.
+
+        Retorna:
+        - Callable[[], None]: La función que guarda el corte.
+        """
+        return partial(self._guardar_corte, perf_counter_ns(), self.sistema.tomar_corte())
+
+    def _guardar_corte(self, inicio: int, guardar: Callable[[], None]) -> None:
+        """
+        Guarda un corte tomado en persistir y agrega el tiempo del guardado a las métricas.
+
+        Parámetros:
+        - inicio (int): Cuándo se empezó a tomar el corte (perf_counter_ns).
+        - guardar (Callable[[], None]): La función que guarda el corte.
+
+        Retorna:
+        - None
+        """
+        guardar()
+        if self.metricas.activa:
+            self.metricas.agregar(GUARDADO, 'persistir', (perf_counter_ns() - inicio) // 1000)
+
+    def guardar_registros(self) -> None:
+        """
+        Guarda los registros pendientes en el archivo de operaciones y errores, midiendo
+        el tiempo del guardado.
+
+        Retorna:
+        - None
+        """
+        self.cortar_registros()()
+
+    def cortar_registros(self) -> Callable[[], None]:
+        """
+        Tarea del escritor en segundo plano: toma con el candado el corte de los registros
+        (ver Registro.cortar) y devuelve la función que lo escribe sin el candado, que
+        mide el tiempo de todo el guardado.
+
+        Retorna:
+        - Callable[[], None]: La función que guarda el corte.
+        """
+        return partial(self._guardar_registros, perf_counter_ns(), self.registro.cortar())
+
+    def _guardar_registros(self, inicio: int, corte: CorteRegistros) -> None:
+        """
+        Guarda un corte tomado en cortar_registros y agrega el tiempo del guardado a las métricas.
+
+        Parámetros:
+        - inicio (int): Cuándo se tomó el corte (perf_counter_ns).
+        - corte (CorteRegistros): El corte a guardar.
+
+        Retorna:
+        - None
+        """
+        self.registro.guardar_corte(corte, self.filename_operaciones_errores)
+        if self.metricas.activa:
+            self.metricas.agregar(GUARDADO, 'registrar', (perf_counter_ns() - inicio) // 1000)
+
+    def procesar(self, entrada: str) -> None:
+        """
+        Ejecuta un comando y lo agrega al historial de operaciones, o al de errores si falla.
+        Los registros quedan pendientes hasta el próximo guardado.
+
+        Parámetros:
+        - entrada (str): La entrada ingresada por el usuario en la consola.
+
+        No retorna ningún valor.
+        """
+        self.metricas.comenzar()
+        inicio = perf_counter_ns()
+        error = None
+        try:
+            self.comando(entrada)
+        except Exception as e:
+            print(f"{e}")
+            error = str(e)
+
+        # El registro se guarda estructurado; se formatea recién al mostrarlo con 'log'
+        comando, _, argumentos = entrada.partition(' ')
+        with self.metricas.medir('registrar'):
+            self.registro.agregar(RegistroComando(
+                marca_actual(), comando, argumentos, (perf_counter_ns() - inicio) // 1000, error))
+        self.metricas.terminar(comando)
+
+    def comando(self, entrada: str):
+        """
+        Método que ejecuta comandos ingresados por el usuario en la consola.
+
+        Parámetros:
+        - entrada (str): La entrada ingresada por el usuario en la consola.
+
+        No retorna ningún valor.
+        """
+        if entrada.lower() == "exit":
+            print("Saliendo de la consola...")
+            exit()  # Los cambios pendientes se guardan al terminar ejecutar
+
+        elif entrada.lower() == "clear log":
+            error_eliminado = self.registro.eliminar_ultimo_error()
+            if error_eliminado is not None:
+                print("Se ha eliminado el último error.")
+                print(error_eliminado.formatear())
+            else:
+                print("Historial de errores vacío.")
+            return
+
+        elif match(r'^[A-Za-z]:$', entrada):  # Cambio de unidad (por ejemplo D:)
+            self.sistema.cambiar_unidad(entrada)
+            return
+
+        partes_entrada = entrada.split(" ")
+        comando = partes_entrada[0].lower()
+        argumentos = partes_entrada[1:]
+
+        if comando == "cd":
+            if len(argumentos) != 1:
+                raise ValueError("Uso incorrecto del comando. Uso: cd ruta")
+            self.cd(argumentos[0])
+
+        elif comando == "mkdir":
+            if len(argumentos) != 1:
+                raise ValueError("Uso incorrecto del comando. Uso: mkdir ruta")
+            self.mkdir(argumentos[0])
+
+        elif comando == "type":
+            if len(entrada.split(" ", 2)) != 3:
+                raise ValueError(
+                    "Uso incorrecto del comando. Uso: type ruta contenido")
+
+            argumentos = entrada.split(" ", 1)[1]
+            if not ' "' in argumentos or argumentos.count('"') != 2:
+                raise ValueError(
+                    'Uso incorrecto del comando. Uso: type ruta "contenido"')
+
+            # Dividir en dos partes, máximo 1 división
+            ruta, contenido = argumentos.split(' "', 1)
+            # Eliminar la comilla al final del contenido
+            contenido = contenido.rstrip('"')
+            self.type(ruta, contenido)
+
+        elif comando == "rmdir":
+            if len(argumentos) != 1:
+                raise ValueError("Uso incorrecto del comando. Uso: rmdir ruta")
+            self.rmdir(argumentos[0])
+
+        elif comando == "restore":
+            if len(argumentos) > 1:
+                raise ValueError("Uso incorrecto del comando. Uso: restore [versión]")
+            self.restore(argumentos[0] if argumentos else None)
+
+        elif comando == "log":
+            self.log(entrada)
+
+        elif comando in ("find", "where"):
+            if len(argumentos) < 1:
+                raise ValueError("Uso incorrecto del comando. Uso: find patrón")
+            # El patrón puede tener espacios, como los nombres
+            self.find(" ".join(argumentos))
+
+        elif comando == "grep":
+            uso = 'Uso incorrecto del comando. Uso: grep "texto" [ruta]'
+            try:
+                argumentos = split(entrada)[1:]
+            except ValueError:
+                raise ValueError(uso)
+            if len(argumentos) not in (1, 2):
+                raise ValueError(uso)
+            self.grep(*argumentos)
+
+        elif comando == "stats":
+            if argumentos and (argumentos[0] != "--json" or len(argumentos) != 2):
+                raise ValueError("Uso incorrecto del comando. Uso: stats [--json archivo]")
+            self.stats(argumentos[1] if argumentos else None)
+
+        elif comando == "dir":
+            self.dir(argumentos)
+
+        elif comando == "du":
+            if len(argumentos) > 1:
+                raise ValueError("Uso incorrecto del comando. Uso: du [ruta]")
+            self.du(argumentos[0] if argumentos else '')
+
+        elif comando == "tree":
+            self.tree(argumentos)
+
+        else:
+            raise ValueError(
+                "Comando no reconocido. Los comandos disponibles son: cd, mkdir, type, rmdir, restore, dir, tree, du, find, grep, exit, log, stats, <unidad>:")
+
+    def type(self, ruta: str, contenido: str):
+        """
+        Crea un archivo con el contenido especificado y muestra el resultado.
+
+        Parámetros:
+        - ruta (str): La ruta donde se creará el nuevo archivo.
+        - contenido (str): El contenido del archivo a crear.
+
+        No retorna ningún valor.
+        """
+        resultado = self.sistema.type(ruta, contenido)
+        print(
+            f"Archivo '{resultado.nombre}' creado correctamente en {resultado.ruta}")
+
+    def mkdir(self, ruta: str):
+        """
+        Crea una carpeta en la ruta especificada y muestra el resultado.
+
+        Parámetros:
+        - ruta (str): La ruta donde se creará la nueva carpeta.
+
+        No retorna ningún valor.
+        """
+        resultado = self.sistema.mkdir(ruta)
+        print(
+            f"Carpeta '{resultado.nombre}' creada correctamente en {resultado.ruta}")
+
+    def rmdir(self, ruta: str):
+        """
+        Elimina la carpeta especificada por la ruta y muestra el resultado.
+
+        Parámetros:
+        - ruta (str): La ruta de la carpeta a eliminar.
+
+        No retorna ningún valor.
+        """
+        resultado = self.sistema.rmdir(ruta)
+        print(
+            f"Carpeta '{resultado.nombre}' eliminada correctamente de {resultado.ruta} (respaldo {resultado.respaldo})")
+
+    def restore(self, version: Union[None, str]):
+        """
+        Restaura una carpeta eliminada desde su respaldo. Sin versión, muestra los
+        respaldos disponibles.
+
+        Parámetros:
+        - version (str | None): La versión del respaldo a restaurar.
+
+        No retorna ningún valor.
+        """
+        if version is None:
+            print("Respaldos disponibles:")
+            for linea in self.sistema.listar_respaldos():
+                print(linea)
+            return
+
+        if not version.isdigit():
+            raise ValueError("La versión del respaldo debe ser un número.")
+
+        resultado = self.sistema.restore(int(version))
+        print(
+            f"Carpeta '{resultado.nombre}' restaurada correctamente en {resultado.ruta}")
+
+    def log(self, entrada: str):
+        """
+        Muestra el historial de errores y operaciones, del más reciente al más antiguo.
+
+        Acepta los filtros --desde FECHA, --hasta FECHA (dd/mm/aaaa o "dd/mm/aaaa hh:mm AM"),
+        --comando NOMBRE, --error TEXTO (solo muestra los errores que lo contienen) y
+        --last N (los N más recientes de cada historial). Los textos con espacios van entre comillas.
+
+        Parámetros:
+        - entrada (str): La entrada completa del comando.
+
+        No retorna ningún valor.
+        """
+        uso = 'Uso incorrecto del comando. Uso: log [--desde fecha] [--hasta fecha] ' \
+              '[--comando nombre] [--error texto] [--last N]'
+        try:
+            argumentos = split(entrada)[1:]
+        except ValueError:
+            raise ValueError(uso)
+        if len(argumentos) % 2 != 0:
+            raise ValueError(uso)
+
+        filtros = {}
+        for opcion, valor in zip(argumentos[::2], argumentos[1::2]):
+            if opcion == '--desde':
+                filtros['desde'] = self._marca_log(valor, False)
+            elif opcion == '--hasta':
+                filtros['hasta'] = self._marca_log(valor, True)
+            elif opcion == '--comando':
+                filtros['comando'] = valor
+            elif opcion == '--error':
+                filtros['error'] = valor
+            elif opcion == '--last' and valor.isdigit():
+                filtros['ultimos'] = int(valor)
+            else:
+                raise ValueError(uso)
+
+        print("Historial de errores: ")
+        for error in self.registro.consultar('error', **filtros):
+            print(error.formatear())
+
+        if 'error' in filtros:
+            return
+        print("")
+
+        print("Historial de operaciones")
+        for operacion in self.registro.consultar('operacion', **filtros):
+            print(operacion.formatear())
+
+    def stats(self, filename: Union[None, str]):
+        """
+        Muestra los percentiles de tiempo de cada comando por fase (resolver, modificar,
+        persistir, registrar), sobre sus últimas ejecuciones. Los guardados que no forman
+        parte de un comando aparecen como '(guardado)'. Con un archivo, además guarda
+        las métricas en JSON.
+
+        Parámetros:
+        - filename (str | None): El archivo JSON donde guardar las métricas.
+
+        No retorna ningún valor.
+        """
+        if not self.metricas.activa:
+            raise ValueError("Las métricas están desactivadas en la configuración.")
+        resumen = self.metricas.resumen()
+        print(f"{'Comando':<12} {'Fase':<10} {'Cantidad':>9} "
+              f"{'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'Máx (ms)':>9}")
+        for comando, fases in resumen.items():
+            for fase in FASES:
+                if fase in fases:
+                    datos = fases[fase]
+                    print(f"{comando:<12} {fase:<10} {datos['cantidad']:>9} "
+                          + ' '.join(f"{datos[clave] / 1000:>9.3f}" for clave in ('p50', 'p90', 'p99', 'max')))
+
+        if filename is not None:
+            self.guardar_metricas(filename)
+            print(f"Métricas guardadas en '{filename}'.")
+
+    def guardar_metricas(self, filename: Union[None, str] = None) -> None:
+        """
+        Guarda las métricas en JSON: los percentiles (en microsegundos) de cada comando
+        y fase, y la memoria estimada de cada unidad montada. Sin archivo se usa
+        'archivo_metricas' de la configuración, y si no está configurado no hace nada.
+
+        Parámetros:
+        - filename (str | None): El archivo JSON donde guardar las métricas.
+
+        Retorna:
+        - None
+        """
+        filename = filename or self.archivo_metricas
+        if not filename or not self.metricas.activa:
+            return
+        data = {
+            'ventana': self.metricas.ventana,
+            'comandos': self.metricas.resumen(),
+            'unidades': {nombre: {'memoria_estimada': unidad.memoria_estimada()}
+                         for nombre, unidad in self.sistema.unidades.items() if unidad.montada},
+        }
+        escribir_atomico(filename, dumps(data, indent=4, ensure_ascii=False).encode('utf-8'))
+
+    def _marca_log(self, fecha: str, final: bool) -> int:
+        """
+        Convierte la fecha de un filtro de log a marca de tiempo.
+
+        Parámetros:
+        - fecha (str): La fecha con FORMATO_FECHA o solo el día (dd/mm/aaaa).
+        - final (bool): Si es True y solo se indicó el día, se toma el final del día.
+
+        Retorna:
+        - int: La marca de tiempo.
+
+        Lanza:
+        - ValueError: Si la fecha no tiene un formato válido.
+        """
+        try:
+            return int(datetime.strptime(fecha, FORMATO_FECHA).timestamp())
+        except ValueError:
+            pass
+        try:
+            dia = datetime.strptime(fecha, "%d/%m/%Y")
+        except ValueError:
+            raise ValueError(f"Fecha inválida: '{fecha}'. Formato: dd/mm/aaaa o \"dd/mm/aaaa hh:mm AM\".")
+        if final:
+            dia += timedelta(days=1)
+            return int(dia.timestamp()) - 1
+        return int(dia.timestamp())
+
+    def find(self, patron: str):
+        """
+        Muestra los archivos y carpetas de la unidad actual cuyo nombre coincide con el patrón.
+
+        Parámetros:
+        - patron (str): Un nombre, o un patrón con comodines '*' y '?'.
+
+        No retorna ningún valor.
+        """
+        coincidencias = self.sistema.find(patron)
+        for coincidencia in coincidencias:
+            print(f"{'d-----' if coincidencia.es_carpeta else '-a----'} {coincidencia.ruta}")
+        print(f"{len(coincidencias)} coincidencia(s) de '{patron}'.")
+
+    def grep(self, texto: str, ruta: str = ''):
+        """
+        Muestra los archivos de la carpeta (y sus subcarpetas) que contienen todas las
+        palabras del texto, con las líneas donde aparecen.
+
+        Parámetros:
+        - texto (str): Las palabras a buscar.
+        - ruta (str): La carpeta donde buscar. Vacía para la carpeta actual.
+
+        No retorna ningún valor.
+        """
+        coincidencias = self.sistema.grep(texto, ruta)
+        for coincidencia in coincidencias:
+            if not coincidencia.lineas:  # Las palabras están en líneas distintas
+                print(coincidencia.ruta)
+            for numero, linea in coincidencia.lineas:
+                print(f"{coincidencia.ruta}:{numero}: {linea}")
+        print(f"{len(coincidencias)} archivo(s) contienen '{texto}'.")
+
+    def dir(self, argumentos: list[str]):
+        """
+        Muestra el contenido de una carpeta. Acepta una ruta (la carpeta actual si no se
+        indica) y las opciones /p (paginar), /o[:orden] (ordenar por n, s o d: nombre,
+        tamaño o fecha, con '-' para invertir; por nombre si no se indica), /a:d o
+        /a:-d (solo carpetas o solo archivos), /s (incluir las subcarpetas) y /l:N
+        (con /s, hasta N niveles).
+
+        Parámetros:
+        - argumentos (list[str]): Los argumentos del comando.
+
+        No retorna ningún valor.
+        """
+        uso = "Uso incorrecto del comando. Uso: dir [ruta] [/p] [/o[:orden]] [/a:d | /a:-d] [/s [/l:niveles]]"
+        ruta = None
+        paginar = False
+        orden = None
+        atributo = None
+        recursivo = False
+        profundidad = None
+        for argumento in argumentos:
+            opcion = argumento.lower()
+            if not opcion.startswith('/'):
+                if ruta is not None:
+                    raise ValueError(uso)
+                ruta = argumento
+            elif opcion == '/p':
+                paginar = True
+            elif opcion == '/s':
+                recursivo = True
+            elif opcion.startswith('/o'):
+                orden = opcion[2:].removeprefix(':') or 'n'
+            elif opcion.startswith('/a'):
+                atributo = opcion[2:].removeprefix(':')
+            elif opcion.startswith('/l:'):
+                profundidad = self._niveles(opcion, uso)
+            else:
+                raise ValueError(uso)
+        if profundidad is not None and not recursivo:
+            raise ValueError(uso)
+        self.mostrar_listado(self.sistema.dir(ruta or '', orden, atributo, recursivo, profundidad), paginar)
+
+    @staticmethod
+    def _niveles(opcion: str, uso: str) -> int:
+        """
+        Obtiene la cantidad de niveles de una opción /l:N de dir o tree.
+
+        Parámetros:
+        - opcion (str): La opción, en minúsculas.
+        - uso (str): El mensaje de uso del comando, para el error.
+
+        Retorna:
+        - int: La cantidad de niveles.
+
+        Lanza:
+        - ValueError: Si N no es un número.
+        """
+        niveles = opcion[3:]
+        if not niveles.isdigit():
+            raise ValueError(uso)
+        return int(niveles)
+
+    def mostrar_listado(self, listado: Listado, paginar: bool = False) -> None:
+        """
+        Muestra un listado de dir: primero las carpetas y después los archivos.
+
+        Las líneas se generan de a una y se escriben de a bloques (ver SalidaPaginada),
+        sin armar el listado completo.
+
+        Parámetros:
+        - listado (Listado): El resultado de SistemaArchivos.dir.
+        - paginar (bool): Si es True (y la consola es interactiva) se detiene en cada página.
+
+        No retorna ningún valor.
+        """
+        entradas = iter(listado.entradas)
+        primera = next(entradas, None)
+        if primera is None:
+            return
+
+        salida = SalidaPaginada(self.lineas_pagina if paginar and self.interactiva else None,
+                                preguntar=self.preguntar)
+        lineas = chain(
+            ["", "", f"Directorio {listado.ruta}", "", "",
+             "Mode                 LastWriteTime         Length Name",
+             "----                 -------------         ------ ----"],
+            (self._linea_listado(entrada) for entrada in chain([primera], entradas)),
+            ["", ""])
+        for linea in lineas:
+            if not salida.escribir(linea):
+                break
+        salida.vaciar()
+
+    @staticmethod
+    def _linea_listado(entrada: Entrada) -> str:
+        """
+        Arma la línea de una entrada de dir.
+
+        Parámetros:
+        - entrada (Entrada): La carpeta o archivo.
+
+        Retorna:
+        - str: La línea con el modo, la fecha, el tamaño y el nombre.
+        """
+        fecha_hora = formatear_fecha(entrada.marca_tiempo) or ''
+        tamano = '' if entrada.tamano is None else entrada.tamano
+        modo = 'd-----' if entrada.es_carpeta else '-a----'
+        return f"{modo} {fecha_hora:>27} {tamano:>14} {entrada.nombre}"
+
+    def tree(self, argumentos: list[str]):
+        """
+        Muestra el árbol de carpetas de una carpeta. Acepta una ruta (la carpeta actual
+        si no se indica) y las opciones /f (incluir los archivos), /l:N (hasta N niveles)
+        y /p (paginar).
+
+        Parámetros:
+        - argumentos (list[str]): Los argumentos del comando.
+
+        No retorna ningún valor.
+        """
+        uso = "Uso incorrecto del comando. Uso: tree [ruta] [/f] [/l:niveles] [/p]"
+        ruta = None
+        archivos = False
+        profundidad = None
+        paginar = False
+        for argumento in argumentos:
+            opcion = argumento.lower()
+            if not opcion.startswith('/'):
+                if ruta is not None:
+                    raise ValueError(uso)
+                ruta = argumento
+            elif opcion == '/f':
+                archivos = True
+            elif opcion == '/p':
+                paginar = True
+            elif opcion.startswith('/l:'):
+                profundidad = self._niveles(opcion, uso)
+            else:
+                raise ValueError(uso)
+        self.mostrar_arbol(self.sistema.tree(ruta or '', archivos, profundidad), paginar)
+
+    def mostrar_arbol(self, arbol: Arbol, paginar: bool = False) -> None:
+        """
+        Muestra un árbol de tree con líneas que unen cada elemento con su carpeta.
+
+        Las líneas se generan a medida que se recorre el árbol. Para dibujar las líneas
+        verticales solo se guarda, por nivel abierto, si su carpeta era la última.
+
+        Parámetros:
+        - arbol (Arbol): El resultado de SistemaArchivos.tree.
+        - paginar (bool): Si es True (y la consola es interactiva) se detiene en cada página.
+
+        No retorna ningún valor.
+        """
+        salida = SalidaPaginada(self.lineas_pagina if paginar and self.interactiva else None,
+                                preguntar=self.preguntar)
+        for linea in ("", arbol.ruta):
+            if not salida.escribir(linea):
+                salida.vaciar()
+                return
+        carpetas = archivos = 0
+        sangrias: list[str] = []  # Por nivel abierto, lo que se dibuja debajo de su carpeta
+        for rama in arbol.ramas:
+            del sangrias[rama.profundidad - 1:]
+            conector = '└───' if rama.ultimo else '├───'
+            if not salida.escribir(f"{''.join(sangrias)}{conector}{rama.nombre}"):
+                salida.vaciar()
+                return
+            if rama.es_carpeta:
+                carpetas += 1
+                sangrias.append('    ' if rama.ultimo else '│   ')
+            else:
+                archivos += 1
+        if carpetas == 0 and archivos == 0:
+            salida.escribir("No existen subcarpetas")
+        salida.escribir("")
+        salida.escribir(f"{carpetas} carpetas, {archivos} archivos")
+        salida.vaciar()
+
+    def du(self, ruta: str):
+        """
+        Muestra los totales de cada subcarpeta de la carpeta especificada y de la carpeta misma.
+
+        Parámetros:
+        - ruta (str): La ruta de la carpeta. Vacía para la carpeta actual.
+
+        No retorna ningún valor.
+        """
+        print(f"{'Archivos':>10} {'Carpetas':>10} {'Bytes':>14} {'Última modificación':>27} Ruta")
+        for uso in self.sistema.du(ruta):
+            resumen = uso.resumen
+            fecha_hora = formatear_fecha(resumen.ultima) or ''
+            print(f"{resumen.archivos:>10} {resumen.carpetas:>10} {resumen.bytes:>14} {fecha_hora:>27} {uso.ruta}")
+
+    def cd(self, ruta: str):
+        """
+        Cambia el directorio actual a la ruta especificada.
+
+        Parámetros:
+        - ruta (str): La ruta a la que se desea cambiar el directorio actual.
+
+        No retorna ningún valor.
+        """
+        self.sistema.cd(ruta)
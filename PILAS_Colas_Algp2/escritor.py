@@ -0,0 +1,126 @@
+from typing import Callable, Optional
+import threading
+
+
+class EscritorSegundoPlano:
+    """
+    Hilo que guarda en segundo plano los cambios pendientes.
+
+    Los comandos solo marcan que hay cambios; cada 'intervalo' segundos el hilo
+    ejecuta las tareas de guardado una sola vez, sin importar cuántos comandos se
+    ejecutaron desde el último guardado. Las tareas y los comandos se ejecutan bajo
+    el mismo candado, así el hilo nunca guarda un estado a medio modificar. Para no
+    demorar a los comandos, una tarea puede hacer con el candado solo lo barato (tomar
+    un corte consistente de lo que hay que guardar) y devolver una función con lo
+    lento (escribir y sincronizar con el disco), que se ejecuta después sin el candado.
+    """
+
+    def __init__(self, tareas: list[Callable[[], Optional[Callable[[], None]]]],
+                 intervalo: float = 1.0) -> None:
+        """
+        Constructor de la clase EscritorSegundoPlano. Inicia el hilo.
+
+        Parámetros:
+        - tareas (list[Callable]): Las funciones que guardan los cambios pendientes. Cada
+          una puede devolver una función que termina el guardado sin el candado, o None.
+        - intervalo (float): Segundos entre guardados.
+        """
+        self.tareas = tareas
+        self.intervalo = intervalo
+        # Candado que deben tomar los comandos mientras modifican el estado
+        self.candado = threading.RLock()
+        # Último error de un guardado en segundo plano, se informa en el próximo marcar
+        self.error: Optional[Exception] = None
+
+        self._condicion = threading.Condition()
+        self._pendiente = False
+        self._detenido = False
+        self._hilo = threading.Thread(target=self._ejecutar, name='escritor', daemon=True)
+        self._hilo.start()
+
+    def marcar(self) -> None:
+        """
+        Indica que hay cambios para guardar en el próximo intervalo.
+
+        Retorna:
+        - None
+
+        Lanza:
+        - Exception: El error del último guardado en segundo plano, si falló.
+        """
+        with self._condicion:
+            self._pendiente = True
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def vaciar(self) -> None:
+        """
+        Guarda ahora los cambios pendientes, en el hilo que lo llama.
+
+        Retorna:
+        - None
+        """
+        with self._condicion:
+            if not self._pendiente:
+                return
+            self._pendiente = False
+        try:
+            with self.candado:
+                pendientes = [tarea() for tarea in self.tareas]
+            for terminar in pendientes:
+                if terminar is not None:
+                    terminar()
+        except Exception:
+            with self._condicion:
+                self._pendiente = True  # Se reintenta en el próximo guardado
+            raise
+
+    def sin_candado(self, funcion: Callable, *argumentos):
+        """
+        Ejecuta una función liberando mientras tanto el candado, que el hilo que llama
+        debe tener tomado una sola vez. Sirve para esperar al usuario en medio de un
+        comando (por ejemplo en la pausa de 'dir /p') sin demorar los guardados.
+
+        Parámetros:
+        - funcion (Callable): La función, por ejemplo input.
+        - argumentos: Sus argumentos.
+
+        Retorna:
+        - Lo que retorna la función.
+        """
+        self.candado.release()
+        try:
+            return funcion(*argumentos)
+        finally:
+            self.candado.acquire()
+
+    def detener(self) -> None:
+        """
+        Detiene el hilo y guarda los cambios que queden pendientes.
+
+        Retorna:
+        - None
+        """
+        with self._condicion:
+            self._detenido = True
+            self._condicion.notify()
+        self._hilo.join()
+        self.vaciar()
+
+    def _ejecutar(self) -> None:
+        """
+        Ciclo del hilo: guarda los cambios pendientes cada 'intervalo' segundos.
+
+        Retorna:
+        - None
+        """
+        while True:
+            with self._condicion:
+                self._condicion.wait_for(lambda: self._detenido, timeout=self.intervalo)
+                if self._detenido:
+                    return
+            try:
+                self.vaciar()
+            except Exception as e:
+                self.error = e
@@ -0,0 +1,158 @@
+"""
+Escritura atómica de archivos con suma de verificación.
+
+Todos los archivos que se escriben completos (la unidad, los respaldos, los
+registros compactados, los contenidos) pasan por escribir_atomico: se escriben
+en un archivo temporal, se sincronizan con el disco (fsync) y recién entonces
+reemplazan al original con os.replace. Una interrupción deja el archivo anterior
+o el nuevo, nunca uno a medio escribir.
+
+Los JSON se guardan con una cabecera de una línea antes del contenido:
+
+    #crc32 <crc32 en hexadecimal, 8 caracteres> <largo en hexadecimal, 16 caracteres>
+
+El largo permite detectar un archivo truncado sin leerlo y el crc32 uno dañado
+sin analizar el JSON. Los archivos sin cabecera (formato anterior) se leen igual.
+"""
+
+from typing import Union
+from zlib import crc32
+import json
+import os
+
+PREFIJO = b'#crc32 '
+LARGO_CABECERA = len(PREFIJO) + 8 + 1 + 16 + 1
+
+
+class ArchivoDaniado(Exception):
+    """
+    El archivo está incompleto o su contenido no coincide con la suma de la cabecera.
+    """
+
+
+def escribir_atomico(filename: str, datos: Union[bytes, bytearray], suma: bool = False,
+                     sincronizar: bool = True) -> None:
+    """
+    Escribe un archivo completo de forma atómica (archivo temporal, fsync y reemplazo).
+
+    Parámetros:
+    - filename (str): El archivo de destino.
+    - datos (bytes | bytearray): El contenido del archivo.
+    - suma (bool): Si es True se antepone la cabecera con el crc32 y el largo.
+    - sincronizar (bool): Si es False no se espera al disco (modo diferido); el
+      reemplazo sigue siendo atómico frente a una interrupción del programa.
+
+    Retorna:
+    - None
+    """
+    filename_temporal = filename + '.tmp'
+    with open(filename_temporal, 'wb') as f:
+        if suma:
+            f.write(cabecera(datos))
+        f.write(datos)
+        if sincronizar:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(filename_temporal, filename)
+    if sincronizar:
+        sincronizar_directorio(os.path.dirname(filename))
+
+
+def sincronizar_directorio(ruta: str) -> None:
+    """
+    Sincroniza la entrada de un directorio con el disco, para que un os.replace
+    reciente no se pierda ante un corte de energía. No hace nada en Windows.
+
+    Parámetros:
+    - ruta (str): El directorio.
+
+    Retorna:
+    - None
+    """
+    if os.name == 'nt':
+        return
+    descriptor = os.open(ruta or '.', os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def cabecera(datos: Union[bytes, bytearray]) -> bytes:
+    """
+    Arma la cabecera con la suma de verificación de un contenido.
+
+    Parámetros:
+    - datos (bytes | bytearray): El contenido.
+
+    Retorna:
+    - bytes: La línea de cabecera (LARGO_CABECERA bytes).
+    """
+    return PREFIJO + b'%08x %016x\n' % (crc32(datos), len(datos))
+
+
+def verificar(buffer, filename: str = '') -> int:
+    """
+    Verifica la cabecera de un archivo ya leído o mapeado en memoria.
+
+    Parámetros:
+    - buffer (bytes | mmap): El contenido completo del archivo.
+    - filename (str): El nombre del archivo, para el mensaje de error.
+
+    Retorna:
+    - int: La posición donde empiezan los datos (0 si el archivo no tiene cabecera).
+
+    Lanza:
+    - ArchivoDaniado: Si el largo o el crc32 no coinciden.
+    """
+    if buffer[:len(PREFIJO)] != PREFIJO:
+        return 0
+    try:
+        suma = int(buffer[len(PREFIJO):len(PREFIJO) + 8], 16)
+        largo = int(buffer[len(PREFIJO) + 9:LARGO_CABECERA - 1], 16)
+    except ValueError:
+        raise ArchivoDaniado(f"Cabecera inválida en '{filename}'.")
+
+    if len(buffer) - LARGO_CABECERA != largo:
+        raise ArchivoDaniado(
+            f"El archivo '{filename}' está incompleto ({len(buffer) - LARGO_CABECERA} de {largo} bytes).")
+    # Con memoryview el crc32 se calcula sin copiar el archivo (también sobre un mmap)
+    with memoryview(buffer) as vista, vista[LARGO_CABECERA:] as datos:
+        correcto = crc32(datos) == suma
+    if not correcto:
+        raise ArchivoDaniado(f"El archivo '{filename}' está dañado (crc32 distinto).")
+    return LARGO_CABECERA
+
+
+def guardar_json(filename: str, data, indent: int = 4) -> None:
+    """
+    Guarda un JSON de forma atómica y con suma de verificación.
+
+    Parámetros:
+    - filename (str): El archivo de destino.
+    - data: El objeto a guardar.
+    - indent (int): La sangría del JSON (la carga diferida necesita 4).
+
+    Retorna:
+    - None
+    """
+    escribir_atomico(filename, json.dumps(data, indent=indent).encode('utf-8'), suma=True)
+
+
+def cargar_json(filename: str):
+    """
+    Carga un JSON verificando su cabecera, si la tiene.
+
+    Parámetros:
+    - filename (str): El archivo a cargar.
+
+    Retorna:
+    - El objeto cargado.
+
+    Lanza:
+    - FileNotFoundError: Si el archivo no existe.
+    - ArchivoDaniado: Si el archivo está incompleto o dañado.
+    """
+    with open(filename, 'rb') as f:
+        datos = f.read()
+    return json.loads(datos[verificar(datos, filename):])
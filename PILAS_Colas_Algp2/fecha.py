@@ -0,0 +1,69 @@
+from datetime import datetime
+from functools import lru_cache
+from time import time
+from typing import Optional, Union
+
+# Formato con el que se muestran y guardan las fechas en la consola y en los JSON.
+# No incluye los segundos: las marcas guardadas así se truncan al minuto.
+FORMATO_FECHA = "%d/%m/%Y %I:%M %p"
+
+
+def marca_actual() -> int:
+    """
+    Devuelve la fecha y hora actual como marca de tiempo entera (segundos desde la época).
+
+    Retorna:
+    - int: La marca de tiempo actual.
+    """
+    return int(time())
+
+
+# Las marcas están en segundos (ver marca_actual), pero FORMATO_FECHA solo llega a
+# los minutos: lo que se guarda con este formato (la unidad en JSON y las carpetas
+# de los respaldos) pierde los segundos, y al volver a cargarlo la marca queda
+# truncada al minuto. La bitácora y el formato binario guardan la marca entera.
+# Al cargar o guardar una unidad las mismas marcas se repiten mucho, por eso las
+# conversiones se memorizan.
+@lru_cache(maxsize=4096)
+def formatear_fecha(marca: Optional[int]) -> Optional[str]:
+    """
+    Convierte una marca de tiempo entera al texto que se muestra en la consola.
+
+    Parámetros:
+    - marca (int | None): La marca de tiempo a formatear.
+
+    Retorna:
+    - str | None: La fecha con el formato FORMATO_FECHA, o None si no hay marca.
+    """
+    if marca is None:
+        return None
+    return datetime.fromtimestamp(marca).strftime(FORMATO_FECHA)
+
+
+def convertir_a_marca(fecha: Union[int, str, None]) -> Optional[int]:
+    """
+    Convierte una fecha (texto con FORMATO_FECHA o marca entera) a marca de tiempo entera.
+
+    Parámetros:
+    - fecha (int | str | None): La fecha a convertir.
+
+    Retorna:
+    - int | None: La marca de tiempo, o None si no hay fecha.
+    """
+    if fecha is None or isinstance(fecha, int):
+        return fecha
+    return _parsear_fecha(fecha)
+
+
+@lru_cache(maxsize=4096)
+def _parsear_fecha(texto: str) -> int:
+    """
+    Convierte un texto con FORMATO_FECHA a marca de tiempo entera.
+
+    Parámetros:
+    - texto (str): La fecha a convertir.
+
+    Retorna:
+    - int: La marca de tiempo.
+    """
+    return int(datetime.strptime(texto, FORMATO_FECHA).timestamp())
@@ -0,0 +1,495 @@
+"""
+Formato binario para guardar una unidad.
+
+El archivo empieza con una cabecera (CABECERA), que incluye el largo y el crc32
+de todo lo que sigue, y sigue con los registros de la unidad en preorden: cada
+carpeta va seguida de todos sus hijos. Cada registro tiene una parte fija, el
+nombre en UTF-8 y una parte variable según el tipo:
+
+- Carpeta ('D'): cantidad de hijos y largo en bytes de todos sus descendientes,
+  lo que permite saltar una subcarpeta completa sin leerla, y sus totales (ver
+  Carpeta.resumen), así consultarlos no obliga a leerla (desde la versión 3).
+- Archivo con referencia al almacén ('F'): tamaño y hash sha256 (32 bytes).
+- Archivo con contenido en línea ('T'): largo y contenido en UTF-8.
+"""
+from almacen_contenidos import AlmacenContenidos
+from archivo import Archivo
+from carpeta import Carpeta, Instantanea, Resumen
+from escritura_segura import ArchivoDaniado, cargar_json, escribir_atomico, guardar_json
+from fecha import convertir_a_marca
+from nodo import Nodo
+from typing import Optional, Union
+from zlib import crc32
+import mmap
+import struct
+import sys
+
+MAGICO = b'UNID'
+VERSION = 3
+CABECERA = struct.Struct('<4sBQQI')  # mágico, versión, secuencia, largo y crc32 de los registros
+CABECERA_V1 = struct.Struct('<4sBQ')  # Versión 1, sin largo ni crc32
+# tipo, largo del nombre, marca, cantidad de hijos, largo de los hijos, y los totales:
+# archivos, carpetas, bytes y marca más reciente
+CARPETA = struct.Struct('<BHqIQQQQq')
+CARPETA_V2 = struct.Struct('<BHqIQ')  # Versiones 1 y 2, sin los totales
+TOTALES = struct.Struct('<QQQQq')  # Lo que se completa al terminar de escribir los hijos
+ARCHIVO = struct.Struct('<BHqQ')  # tipo, largo del nombre, marca, tamaño (+ hash de 32 bytes)
+TEXTO = struct.Struct('<BHqI')  # tipo, largo del nombre, marca, largo del contenido
+
+TIPO_CARPETA = ord('D')
+TIPO_ARCHIVO = ord('F')
+TIPO_TEXTO = ord('T')
+
+# Valor de la marca de tiempo cuando no hay fecha (None)
+SIN_MARCA = -2**63
+
+
+class LectorBinario:
+    """
+    Lee una unidad guardada en formato binario desde el archivo mapeado en memoria.
+
+    Puede cargar la unidad completa o solo la raíz, dejando las subcarpetas
+    pendientes hasta que se usen (igual que carga_diferida.LectorDiferido).
+    """
+
+    def __init__(self, filename: str, almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Constructor de la clase LectorBinario.
+
+        Parámetros:
+        - filename (str): El archivo binario de la unidad.
+        - almacen (AlmacenContenidos | None): El almacén de la unidad, al que se pasan los
+          contenidos en línea (ver Archivo).
+
+        Lanza:
+        - ValueError: Si el archivo no tiene el formato binario de unidades.
+        - ArchivoDaniado: Si el archivo está incompleto o su crc32 no coincide.
+        """
+        self.almacen = almacen
+        self._archivo = open(filename, 'rb')
+        try:
+            self.buffer = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Archivo vacío
+            self._archivo.close()
+            raise ValueError(f"El archivo '{filename}' no es una unidad en formato binario.")
+
+        magico, version, self.secuencia = CABECERA_V1.unpack_from(self.buffer, 0)
+        if magico != MAGICO or version not in (1, 2, VERSION):
+            self.cerrar()
+            raise ValueError(f"El archivo '{filename}' no es una unidad en formato binario.")
+
+        self.version = version
+        # Si las carpetas tienen sus totales guardados
+        self.con_resumen = version == VERSION
+        self._carpeta = CARPETA if self.con_resumen else CARPETA_V2
+        # Posición del registro de la raíz
+        self.inicio = CABECERA_V1.size
+        if version > 1:
+            _, _, _, largo, suma = CABECERA.unpack_from(self.buffer, 0)
+            self.inicio = CABECERA.size
+            with memoryview(self.buffer) as vista, vista[self.inicio:] as registros:
+                correcto = len(registros) == largo and crc32(registros) == suma
+            if not correcto:
+                self.cerrar()
+                raise ArchivoDaniado(f"El archivo '{filename}' está incompleto o dañado.")
+
+    def cargar_raiz(self, diferida: bool = True) -> tuple[Carpeta, dict]:
+        """
+        Carga la unidad.
+
+        Parámetros:
+        - diferida (bool): Si es True las subcarpetas quedan pendientes hasta que se usen.
+
+        Retorna:
+        - tuple[Carpeta, dict]: La raíz y las claves adicionales ('secuencia').
+        """
+        raiz, posicion_hijos, cantidad, _ = self._leer_carpeta(self.inicio)
+        if diferida:
+            self.cargar_hijos(raiz, posicion_hijos, cantidad)
+        else:
+            self._cargar_completa(raiz, posicion_hijos, cantidad)
+        return raiz, {'secuencia': self.secuencia}
+
+    def _leer_carpeta(self, posicion: int) -> tuple[Carpeta, int, int, int]:
+        """
+        Lee la parte propia de un registro de carpeta (sin sus hijos), con sus totales
+        si están guardados.
+
+        Parámetros:
+        - posicion (int): La posición del registro.
+
+        Retorna:
+        - tuple[Carpeta, int, int, int]: La carpeta vacía, la posición de su primer hijo,
+          la cantidad de hijos y la posición donde termina el registro con sus descendientes.
+        """
+        _, largo_nombre, marca, cantidad, largo_hijos, *totales = self._carpeta.unpack_from(self.buffer, posicion)
+        inicio_nombre = posicion + self._carpeta.size
+        posicion_hijos = inicio_nombre + largo_nombre
+        nombre = self.buffer[inicio_nombre:posicion_hijos].decode('utf-8')
+        carpeta = Carpeta(nombre, None if marca == SIN_MARCA else marca)
+        if totales:
+            archivos, carpetas, tamano, ultima = totales
+            carpeta._asignar(Resumen(archivos, carpetas, tamano, None if ultima == SIN_MARCA else ultima))
+        return carpeta, posicion_hijos, cantidad, posicion_hijos + largo_hijos
+
+    def _leer_archivo(self, posicion: int) -> tuple[Archivo, int]:
+        """
+        Lee un registro de archivo.
+
+        Parámetros:
+        - posicion (int): La posición del registro.
+
+        Retorna:
+        - tuple[Archivo, int]: El archivo y la posición donde termina el registro.
+        """
+        buffer = self.buffer
+        if buffer[posicion] == TIPO_ARCHIVO:
+            _, largo_nombre, marca, tamano = ARCHIVO.unpack_from(buffer, posicion)
+            inicio_nombre = posicion + ARCHIVO.size
+            inicio_hash = inicio_nombre + largo_nombre
+            nombre = buffer[inicio_nombre:inicio_hash].decode('utf-8')
+            archivo = Archivo(nombre, None, None if marca == SIN_MARCA else marca,
+                              buffer[inicio_hash:inicio_hash + 32].hex(), tamano)
+            return archivo, inicio_hash + 32
+
+        _, largo_nombre, marca, largo_contenido = TEXTO.unpack_from(buffer, posicion)
+        inicio_nombre = posicion + TEXTO.size
+        inicio_contenido = inicio_nombre + largo_nombre
+        fin = inicio_contenido + largo_contenido
+        archivo = Archivo(buffer[inicio_nombre:inicio_contenido].decode('utf-8'),
+                          buffer[inicio_contenido:fin].decode('utf-8'),
+                          None if marca == SIN_MARCA else marca, almacen=self.almacen)
+        return archivo, fin
+
+    def cargar_hijos(self, carpeta: Carpeta, posicion: int, cantidad: int) -> None:
+        """
+        Crea los nodos hijos de una carpeta pendiente. Las subcarpetas quedan pendientes.
+
+        Parámetros:
+        - carpeta (Carpeta): La carpeta a completar.
+        - posicion (int): La posición del primer hijo.
+        - cantidad (int): La cantidad de hijos.
+
+        Retorna:
+        - None
+        """
+        for _ in range(cantidad):
+            if self.buffer[posicion] == TIPO_CARPETA:
+                inicio = posicion
+                subcarpeta, posicion_hijos, cantidad_hijos, posicion = self._leer_carpeta(inicio)
+                subcarpeta._pendiente = (self, inicio, posicion, posicion_hijos, cantidad_hijos)
+                carpeta._encolar(Nodo(subcarpeta))
+            else:
+                archivo, posicion = self._leer_archivo(posicion)
+                carpeta._encolar(Nodo(archivo))
+
+    def _cargar_completa(self, raiz: Carpeta, posicion: int, cantidad: int) -> None:
+        """
+        Crea todos los descendientes de una carpeta, sin dejar nada pendiente.
+
+        Parámetros:
+        - raiz (Carpeta): La carpeta a completar.
+        - posicion (int): La posición del primer hijo.
+        - cantidad (int): La cantidad de hijos.
+
+        Retorna:
+        - None
+        """
+        # Pila de (carpeta, hijos que le faltan) para recorrer el preorden sin recursión
+        pendientes = [[raiz, cantidad]]
+        while pendientes:
+            tope = pendientes[-1]
+            if tope[1] == 0:
+                pendientes.pop()
+                continue
+            tope[1] -= 1
+
+            if self.buffer[posicion] == TIPO_CARPETA:
+                subcarpeta, posicion, cantidad_hijos, _ = self._leer_carpeta(posicion)
+                tope[0]._encolar(Nodo(subcarpeta))
+                pendientes.append([subcarpeta, cantidad_hijos])
+            else:
+                archivo, posicion = self._leer_archivo(posicion)
+                tope[0]._encolar(Nodo(archivo))
+
+    def a_dict(self, inicio: int, fin: int) -> dict:
+        """
+        Convierte a diccionario una carpeta pendiente sin dejarla cargada.
+
+        Parámetros:
+        - inicio (int): La posición del registro de la carpeta.
+        - fin (int): La posición donde termina el registro con sus descendientes.
+
+        Retorna:
+        - dict: La carpeta como diccionario, igual que Carpeta.to_dict.
+        """
+        carpeta, posicion_hijos, cantidad, _ = self._leer_carpeta(inicio)
+        self._cargar_completa(carpeta, posicion_hijos, cantidad)
+        return carpeta.to_dict()
+
+    def resumen(self, inicio: int, fin: int) -> Resumen:
+        """
+        Los totales de una carpeta pendiente: los de su registro, O(1), o, en las
+        versiones que no los guardan, calculados recorriendo sus registros sin crear
+        objetos (en preorden, todos los registros entre 'inicio' y 'fin' son sus
+        descendientes).
+
+        Parámetros:
+        - inicio (int): La posición del registro de la carpeta.
+        - fin (int): La posición donde termina el registro con sus descendientes.
+
+        Retorna:
+        - Resumen: Los totales de la carpeta (ver Carpeta.resumen).
+        """
+        buffer = self.buffer
+        if self.con_resumen:
+            archivos, carpetas, tamano, ultima = TOTALES.unpack_from(buffer, inicio + CARPETA.size - TOTALES.size)[1:]
+            return Resumen(archivos, carpetas, tamano, None if ultima == SIN_MARCA else ultima)
+
+        _, largo_nombre, marca, _, _ = CARPETA_V2.unpack_from(buffer, inicio)
+        ultima = None if marca == SIN_MARCA else marca
+        posicion = inicio + CARPETA_V2.size + largo_nombre
+        archivos = carpetas = tamano = 0
+        while posicion < fin:
+            tipo = buffer[posicion]
+            if tipo == TIPO_CARPETA:
+                _, largo_nombre, marca, _, _ = CARPETA_V2.unpack_from(buffer, posicion)
+                carpetas += 1
+                posicion += CARPETA_V2.size + largo_nombre
+            elif tipo == TIPO_ARCHIVO:
+                _, largo_nombre, marca, largo = ARCHIVO.unpack_from(buffer, posicion)
+                archivos += 1
+                tamano += largo
+                posicion += ARCHIVO.size + largo_nombre + 32
+            else:
+                _, largo_nombre, marca, largo = TEXTO.unpack_from(buffer, posicion)
+                archivos += 1
+                tamano += largo  # El contenido se guarda en UTF-8: su largo es el tamaño
+                posicion += TEXTO.size + largo_nombre + largo
+            if marca != SIN_MARCA and (ultima is None or marca > ultima):
+                ultima = marca
+        return Resumen(archivos, carpetas, tamano, ultima)
+
+    def bytes_registro(self, inicio: int, fin: int) -> bytes:
+        """
+        Devuelve los bytes de un registro con sus descendientes, para copiarlos tal cual.
+
+        Parámetros:
+        - inicio (int): La posición del registro.
+        - fin (int): La posición donde termina el registro con sus descendientes.
+
+        Retorna:
+        - bytes: Los bytes del registro.
+        """
+        return self.buffer[inicio:fin]
+
+    def cerrar(self) -> None:
+        """
+        Libera el mapeo en memoria y cierra el archivo.
+
+        Retorna:
+        - None
+        """
+        self.buffer.close()
+        self._archivo.close()
+
+
+def _codificar_marca(marca) -> int:
+    """
+    Convierte una marca de tiempo (o None) al entero que se guarda en el archivo.
+    """
+    return SIN_MARCA if marca is None else marca
+
+
+def serializar(raiz: Union[Carpeta, Instantanea], secuencia: int = 0) -> bytearray:
+    """
+    Convierte una unidad al formato binario.
+
+    Trabaja sobre una instantánea (ver Carpeta.instantanea), así puede llamarse sin el
+    candado de los comandos. Los totales de cada carpeta se suman mientras se escriben
+    sus hijos. Las subcarpetas que siguen como en el archivo de un LectorBinario de esta
+    versión se copian tal cual desde él; las de otro lector o de otra versión se
+    convierten desde su diccionario (ver a_dict).
+
+    Parámetros:
+    - raiz (Carpeta | Instantanea): La unidad a convertir, o su instantánea.
+    - secuencia (int): La secuencia de la bitácora que se guarda en la cabecera.
+
+    Retorna:
+    - bytearray: La unidad en formato binario, lista para escribir.
+    """
+    if isinstance(raiz, Carpeta):
+        raiz = raiz.instantanea()
+    salida = bytearray(CABECERA.pack(MAGICO, VERSION, secuencia, 0, 0))
+    # Pila de [posición del registro de la carpeta, iterador de sus hijos, totales]
+    pendientes = [_escribir_carpeta(salida, raiz)]
+    while pendientes:
+        tope = pendientes[-1]
+        posicion_registro, hijos, total = tope
+        hijo = next(hijos, None)
+        if hijo is None:
+            pendientes.pop()
+            _completar_carpeta(salida, posicion_registro, total)
+            if pendientes:
+                pendientes[-1][2] = pendientes[-1][2].sumar(total._replace(carpetas=total.carpetas + 1))
+            continue
+
+        if isinstance(hijo, Archivo) or (isinstance(hijo, dict) and 'archivos' not in hijo):
+            tope[2] = total.sumar(_escribir_archivo(salida, hijo))
+        elif isinstance(hijo, Instantanea) and hijo.origen is not None:
+            lector, inicio, fin = hijo.origen
+            if isinstance(lector, LectorBinario) and lector.con_resumen:
+                salida += lector.bytes_registro(inicio, fin)
+                copiada = lector.resumen(inicio, fin)
+                tope[2] = total.sumar(copiada._replace(carpetas=copiada.carpetas + 1))
+            else:
+                pendientes.append(_escribir_carpeta(salida, lector.a_dict(inicio, fin)))
+        else:
+            pendientes.append(_escribir_carpeta(salida, hijo))
+
+    registros = memoryview(salida)[CABECERA.size:]
+    CABECERA.pack_into(salida, 0, MAGICO, VERSION, secuencia, len(registros), crc32(registros))
+    registros.release()
+    return salida
+
+
+def _escribir_carpeta(salida: bytearray, carpeta: Union[Instantanea, dict]) -> tuple:
+    """
+    Escribe la parte propia del registro de una carpeta (el largo de los hijos y los
+    totales se completan después, ver _completar_carpeta).
+
+    Parámetros:
+    - salida (bytearray): Donde se escribe.
+    - carpeta (Instantanea | dict): La carpeta, como instantánea o como diccionario de to_dict.
+
+    Retorna:
+    - list: La posición del registro, un iterador sobre los hijos y los totales sin los hijos.
+    """
+    if isinstance(carpeta, dict):
+        nombre, marca = carpeta['nombre'], convertir_a_marca(carpeta.get('fecha_hora'))
+        hijos = carpeta['archivos']
+    else:
+        nombre, marca, hijos = carpeta.nombre, carpeta.marca_tiempo, carpeta.hijos
+
+    nombre = nombre.encode('utf-8')
+    posicion = len(salida)
+    salida += CARPETA.pack(TIPO_CARPETA, len(nombre), _codificar_marca(marca), len(hijos), 0, 0, 0, 0, 0)
+    salida += nombre
+    return [posicion, iter(hijos), Resumen(0, 0, 0, marca)]
+
+
+def _completar_carpeta(salida: bytearray, posicion_registro: int, total: Resumen) -> None:
+    """
+    Completa el largo de los descendientes y los totales en el registro de una carpeta
+    ya escrita con todos sus hijos.
+    """
+    largo_nombre = struct.unpack_from('<H', salida, posicion_registro + 1)[0]
+    inicio_hijos = posicion_registro + CARPETA.size + largo_nombre
+    TOTALES.pack_into(salida, posicion_registro + CARPETA.size - TOTALES.size, len(salida) - inicio_hijos,
+                      total.archivos, total.carpetas, total.bytes, _codificar_marca(total.ultima))
+
+
+def _escribir_archivo(salida: bytearray, archivo: Union[Archivo, dict]) -> Resumen:
+    """
+    Escribe el registro de un archivo.
+
+    Parámetros:
+    - salida (bytearray): Donde se escribe.
+    - archivo (Archivo | dict): El archivo, como objeto o como diccionario de to_dict.
+
+    Retorna:
+    - Resumen: Lo que el archivo suma a los totales de su carpeta.
+    """
+    if isinstance(archivo, dict):
+        archivo = Archivo.from_dict(archivo)
+
+    nombre = archivo.nombre.encode('utf-8')
+    marca = _codificar_marca(archivo.marca_tiempo)
+    if archivo.hash is not None:
+        salida += ARCHIVO.pack(TIPO_ARCHIVO, len(nombre), marca, archivo.tamano)
+        salida += nombre
+        salida += bytes.fromhex(archivo.hash)
+    else:
+        contenido = archivo.leer_contenido(None).encode('utf-8')  # En línea: no usa el almacén
+        salida += TEXTO.pack(TIPO_TEXTO, len(nombre), marca, len(contenido))
+        salida += nombre
+        salida += contenido
+    return Carpeta.resumen_archivo(archivo)
+
+
+def guardar_binario(raiz: Carpeta, filename: str, secuencia: int = 0) -> None:
+    """
+    Guarda una unidad en formato binario, de forma atómica (archivo temporal y reemplazo).
+
+    Parámetros:
+    - raiz (Carpeta): La unidad a guardar.
+    - filename (str): El archivo de destino.
+    - secuencia (int): La secuencia de la bitácora que se guarda en la cabecera.
+
+    Retorna:
+    - None
+    """
+    escribir_atomico(filename, serializar(raiz, secuencia))
+
+
+def cargar_binario(filename: str, diferida: bool = False) -> tuple[Carpeta, dict]:
+    """
+    Carga una unidad guardada en formato binario.
+
+    Parámetros:
+    - filename (str): El archivo binario.
+    - diferida (bool): Si es True las subcarpetas se cargan cuando se usan por primera vez.
+
+    Retorna:
+    - tuple[Carpeta, dict]: La unidad y las claves adicionales ('secuencia').
+    """
+    lector = LectorBinario(filename)
+    raiz, adicionales = lector.cargar_raiz(diferida)
+    if not diferida:
+        lector.cerrar()
+    return raiz, adicionales
+
+
+def json_a_binario(filename_json: str, filename_binario: str) -> None:
+    """
+    Convierte una unidad del formato JSON al binario.
+
+    Parámetros:
+    - filename_json (str): El archivo JSON de origen.
+    - filename_binario (str): El archivo binario de destino.
+
+    Retorna:
+    - None
+    """
+    data = cargar_json(filename_json)
+    guardar_binario(Carpeta.from_dict(data), filename_binario, data.get('secuencia', 0))
+
+
+def binario_a_json(filename_binario: str, filename_json: str) -> None:
+    """
+    Convierte una unidad del formato binario al JSON.
+
+    Parámetros:
+    - filename_binario (str): El archivo binario de origen.
+    - filename_json (str): El archivo JSON de destino.
+
+    Retorna:
+    - None
+    """
+    raiz, adicionales = cargar_binario(filename_binario)
+    data = raiz.to_dict()
+    data['secuencia'] = adicionales['secuencia']
+    guardar_json(filename_json, data)
+
+
+if __name__ == "__main__":
+    # Uso: python formato_binario.py a-binario unidad.json unidad.bin
+    #      python formato_binario.py a-json unidad.bin unidad.json
+    if len(sys.argv) != 4 or sys.argv[1] not in ('a-binario', 'a-json'):
+        print("Uso: python formato_binario.py (a-binario | a-json) origen destino")
+        sys.exit(1)
+
+    if sys.argv[1] == 'a-binario':
+        json_a_binario(sys.argv[2], sys.argv[3])
+    else:
+        binario_a_json(sys.argv[2], sys.argv[3])
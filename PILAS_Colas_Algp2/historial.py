@@ -0,0 +1,263 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from fecha import convertir_a_marca, formatear_fecha
+from pila_acotada import PilaAcotada
+from sys import intern
+from typing import Iterator, NamedTuple, Optional
+
+
+class RegistroComando(NamedTuple):
+    """
+    Un comando ejecutado en la consola. Se convierte a texto solo para mostrarlo.
+    """
+    marca: int  # Segundos desde la época
+    comando: str
+    argumentos: str
+    duracion: int  # Microsegundos
+    error: Optional[str] = None  # None si el comando se ejecutó correctamente
+
+    def entrada(self) -> str:
+        """
+        Arma la entrada tal como se escribió en la consola.
+
+        Retorna:
+        - str: El comando con sus argumentos.
+        """
+        return f"{self.comando} {self.argumentos}" if self.argumentos else self.comando
+
+    def formatear(self) -> str:
+        """
+        Convierte el registro al texto que se muestra con 'log'.
+
+        Retorna:
+        - str: El registro formateado.
+        """
+        texto = f"fecha: {formatear_fecha(self.marca)} - entrada: {self.entrada()}"
+        if self.error is not None:
+            texto += f" - error: {self.error}"
+        return f"{texto} - duración: {self.duracion / 1000:.1f} ms"
+
+    def to_dict(self) -> dict:
+        """
+        Convierte el registro a un diccionario para guardarlo.
+
+        Retorna:
+        - dict: Los campos del registro ('error' solo si el comando falló).
+        """
+        data = {'marca': self.marca, 'comando': self.comando,
+                'argumentos': self.argumentos, 'duracion': self.duracion}
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RegistroComando':
+        """
+        Crea un registro a partir de un diccionario guardado con to_dict.
+
+        Parámetros:
+        - data (dict): Los campos del registro.
+
+        Retorna:
+        - RegistroComando: El registro.
+        """
+        return cls(data['marca'], data['comando'], data['argumentos'], data['duracion'], data.get('error'))
+
+    @classmethod
+    def from_texto(cls, texto: str, es_error: bool) -> 'RegistroComando':
+        """
+        Crea un registro a partir del texto con el que se guardaban antes
+        ('fecha: ... - entrada: ...[ - error: ...]'). La duración no se conocía y queda en 0.
+
+        Parámetros:
+        - texto (str): El texto del registro.
+        - es_error (bool): Si el registro es un error.
+
+        Retorna:
+        - RegistroComando: El registro.
+        """
+        fecha, separador, entrada = texto.removeprefix('fecha: ').partition(' - entrada: ')
+        try:
+            marca = convertir_a_marca(fecha) if separador else 0
+        except ValueError:
+            marca = 0
+        if not separador:
+            entrada = texto
+
+        error = None
+        if es_error:
+            entrada, _, error = entrada.partition(' - error: ')
+        comando, _, argumentos = entrada.partition(' ')
+        return cls(marca, comando, argumentos, 0, error)
+
+
+class Historial:
+    """
+    Historial acotado de comandos, guardado por columnas.
+
+    Cada campo de RegistroComando vive en su propia PilaAcotada: las marcas y las
+    duraciones en arrays de enteros, el resto en listas (los nombres de los comandos
+    se internan, así se comparte un solo objeto por comando). Al llenarse, se descarta
+    el registro más antiguo.
+
+    Para consultar sin recorrer todo, las marcas quedan ordenadas (los registros se
+    agregan cronológicamente) y para cada comando se guardan las secuencias de sus
+    registros en un array (así se pueden indexar en O(1) para bisect). Una consulta
+    busca el rango de fechas con bisect y recorre solo los registros que devuelve.
+    """
+
+    def __init__(self, capacidad: int) -> None:
+        """
+        Constructor de la clase Historial.
+
+        Parámetros:
+        - capacidad (int): La cantidad máxima de registros.
+        """
+        self.marcas = PilaAcotada(capacidad, 'q')
+        self.duraciones = PilaAcotada(capacidad, 'q')
+        self.comandos = PilaAcotada(capacidad)
+        self.argumentos = PilaAcotada(capacidad)
+        self.errores = PilaAcotada(capacidad)
+        # Secuencias de los registros de cada comando (en minúsculas), de la más antigua a la más reciente
+        self.por_comando: dict[str, array] = {}
+        # Por comando, cuántas secuencias del principio de su array ya salieron del historial
+        # (se quitan del array de a muchas juntas, así descartar el más antiguo es O(1) amortizado)
+        self.descartadas: dict[str, int] = {}
+        # Secuencia del registro más antiguo; la del registro en la posición i es base + i
+        self.base = 0
+
+    def __len__(self) -> int:
+        return len(self.marcas)
+
+    def __getitem__(self, posicion: int) -> RegistroComando:
+        """
+        Arma el registro en una posición, contando desde el más antiguo.
+
+        Parámetros:
+        - posicion (int): La posición, entre 0 y len(historial) - 1.
+
+        Retorna:
+        - RegistroComando: El registro.
+        """
+        return RegistroComando(
+            self.marcas[posicion], self.comandos[posicion], self.argumentos[posicion],
+            self.duraciones[posicion], self.errores[posicion])
+
+    def __iter__(self) -> Iterator[RegistroComando]:
+        # Desde el más reciente hasta el más antiguo, igual que la pila
+        for posicion in range(len(self) - 1, -1, -1):
+            yield self[posicion]
+
+    def agregar(self, registro: RegistroComando) -> Optional[RegistroComando]:
+        """
+        Agrega un registro. Si el historial estaba lleno, descarta el más antiguo.
+
+        Parámetros:
+        - registro (RegistroComando): El registro a agregar.
+
+        Retorna:
+        - RegistroComando | None: El registro descartado, o None.
+        """
+        lleno = len(self) == self.marcas.capacidad
+        if lleno:
+            self._desindexar(self.comandos[0], self.base)
+            self.base += 1
+
+        marca = registro.marca
+        if self.marcas:
+            # Las marcas deben quedar ordenadas aunque el reloj retroceda
+            marca = max(marca, self.marcas.ver_tope())
+        comando = intern(registro.comando)
+        # Con el historial lleno, cada columna devuelve el campo del registro descartado
+        descartado = RegistroComando(
+            self.marcas.push(marca), self.comandos.push(comando), self.argumentos.push(registro.argumentos),
+            self.duraciones.push(registro.duracion), self.errores.push(registro.error))
+        self.por_comando.setdefault(comando.lower(), array('q')).append(self.base + len(self) - 1)
+        if not lleno:
+            return None
+        return descartado
+
+    def quitar_ultimo(self) -> Optional[RegistroComando]:
+        """
+        Quita y devuelve el registro más reciente.
+
+        Retorna:
+        - RegistroComando | None: El registro quitado, o None si el historial está vacío.
+        """
+        if not self:
+            return None
+        registro = self[len(self) - 1]
+        for columna in (self.marcas, self.duraciones, self.comandos, self.argumentos, self.errores):
+            columna.pop()
+        self._desindexar(registro.comando, self.base + len(self))
+        return registro
+
+    def _desindexar(self, comando: str, secuencia: int) -> None:
+        """
+        Quita del índice de su comando un registro que sale del historial (el más antiguo o el más reciente).
+
+        Parámetros:
+        - comando (str): El comando del registro.
+        - secuencia (int): La secuencia del registro.
+
+        Retorna:
+        - None
+        """
+        clave = comando.lower()
+        secuencias = self.por_comando[clave]
+        primera = self.descartadas.get(clave, 0)
+        if secuencias[primera] == secuencia:
+            primera += 1
+            if primera * 2 >= len(secuencias):
+                # Más de la mitad del array ya salió: se quita de una vez
+                del secuencias[:primera]
+                primera = 0
+        else:
+            secuencias.pop()
+        if len(secuencias) == primera:
+            del self.por_comando[clave]
+            self.descartadas.pop(clave, None)
+        elif primera:
+            self.descartadas[clave] = primera
+        else:
+            self.descartadas.pop(clave, None)
+
+    def consultar(self, desde: Optional[int] = None, hasta: Optional[int] = None,
+                  comando: Optional[str] = None, error: Optional[str] = None,
+                  ultimos: Optional[int] = None) -> Iterator[RegistroComando]:
+        """
+        Recorre los registros que cumplen los filtros, del más reciente al más antiguo.
+
+        El rango de fechas se busca con bisect sobre las marcas y el comando con bisect
+        sobre sus secuencias, así sin filtro de error el costo es O(log n + k).
+
+        Parámetros:
+        - desde (int | None): La marca de tiempo mínima (inclusive).
+        - hasta (int | None): La marca de tiempo máxima (inclusive).
+        - comando (str | None): El nombre del comando (por ejemplo 'mkdir').
+        - error (str | None): Un texto que debe aparecer en el mensaje de error.
+        - ultimos (int | None): La cantidad máxima de registros a devolver.
+
+        Retorna:
+        - Iterator[RegistroComando]: Los registros que cumplen los filtros.
+        """
+        inicio = 0 if desde is None else bisect_left(self.marcas, desde)
+        fin = len(self) if hasta is None else bisect_right(self.marcas, hasta)
+
+        if comando is None:
+            posiciones = range(fin - 1, inicio - 1, -1)
+        else:
+            secuencias = self.por_comando.get(comando.lower(), array('q'))
+            descartadas = self.descartadas.get(comando.lower(), 0)
+            primera = bisect_left(secuencias, self.base + inicio, descartadas)
+            ultima = bisect_left(secuencias, self.base + fin, descartadas)
+            posiciones = (secuencias[i] - self.base for i in range(ultima - 1, primera - 1, -1))
+
+        cantidad = 0
+        for posicion in posiciones:
+            if ultimos is not None and cantidad >= ultimos:
+                return
+            if error is not None and error not in (self.errores[posicion] or ''):
+                continue
+            cantidad += 1
+            yield self[posicion]
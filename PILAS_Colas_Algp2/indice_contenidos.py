@@ -0,0 +1,433 @@
+from almacen_contenidos import AlmacenContenidos
+from archivo import Archivo
+from array import array
+from bisect import bisect_left
+from carpeta import Carpeta
+from escritura_segura import ArchivoDaniado, escribir_atomico, verificar
+from indice_nombres import Ubicacion
+from sys import byteorder, intern
+from typing import Iterable, Iterator, Optional, Union
+import json
+import re
+
+# Una palabra: letras, números o '_' seguidos (se comparan en minúsculas)
+PALABRA = re.compile(r'\w+')
+
+
+def palabras(texto: str) -> set[str]:
+    """
+    Las palabras distintas de un texto, en minúsculas.
+
+    Parámetros:
+    - texto (str): El texto.
+
+    Retorna:
+    - set[str]: Las palabras.
+    """
+    return set(PALABRA.findall(texto.lower()))
+
+
+class IndiceContenidos:
+    """
+    Índice invertido de los contenidos de los archivos de una unidad: palabra -> archivos que la contienen.
+
+    Cada archivo recibe un número de documento, en orden creciente, y cada palabra
+    guarda los números de sus archivos en un array de enteros de 4 bytes. Como los
+    números nuevos siempre son mayores, agregar un archivo solo agrega al final de
+    los arrays de sus palabras y los arrays quedan ordenados: una búsqueda de varias
+    palabras intersecta los arrays con bisect empezando por el más corto, sin leer
+    ningún contenido.
+
+    Un archivo eliminado solo se marca (su documento queda en None) y sus números se
+    quitan de los arrays recién al guardar, donde se vuelven a numerar los documentos.
+
+    Igual que el índice de nombres, se actualiza con las operaciones de la bitácora y
+    se guarda en cada punto de control con su número de secuencia.
+    """
+
+    def __init__(self, almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Constructor de la clase IndiceContenidos. Crea un índice vacío.
+
+        Parámetros:
+        - almacen (AlmacenContenidos | None): El almacén de donde se leen los contenidos de la unidad.
+        """
+        self.almacen = almacen
+        # Número de documento -> (ruta del padre, nombre del archivo), o None si se eliminó
+        self.documentos: list[Optional[tuple[str, str]]] = []
+        self.por_ruta: dict[tuple[str, str], int] = {}
+        self.postings: dict[str, array] = {}  # Palabra -> números de documento ordenados
+        self.eliminados = 0
+        self.modificado = False  # Cambios desde el último guardado
+        # Después de una copia (ver copia) los arrays se comparten con ella: un array se
+        # copia antes de agregarle un documento, y su palabra queda en _propias
+        self._compartidas = False
+        self._propias: set[str] = set()
+
+    def agregar(self, padre: str, nombre: str, contenido: str) -> None:
+        """
+        Agrega un archivo al índice.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que lo contiene ('' en la raíz, 'a/b').
+        - nombre (str): El nombre del archivo.
+        - contenido (str): El contenido del archivo.
+
+        Retorna:
+        - None
+        """
+        self._agregar(intern(padre), nombre, palabras(contenido))
+        self.modificado = True
+
+    def _agregar(self, padre: str, nombre: str, palabras_archivo: Iterable[str]) -> None:
+        """
+        Agrega un documento con sus palabras.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que lo contiene, ya internada.
+        - nombre (str): El nombre del archivo.
+        - palabras_archivo (Iterable[str]): Las palabras distintas del contenido.
+
+        Retorna:
+        - None
+        """
+        documento = len(self.documentos)
+        self.documentos.append((padre, nombre))
+        self.por_ruta[(padre, nombre)] = documento
+        postings = self.postings
+        compartidas, propias = self._compartidas, self._propias
+        for palabra in palabras_archivo:
+            lista = postings.get(palabra)
+            if lista is None:
+                lista = postings[palabra] = array('I')
+            elif compartidas and palabra not in propias:
+                lista = postings[palabra] = array('I', lista)
+                propias.add(palabra)
+            lista.append(documento)
+
+    def quitar(self, padre: str, nombre: str) -> None:
+        """
+        Quita un archivo del índice.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que lo contiene ('' en la raíz).
+        - nombre (str): El nombre del archivo.
+
+        Retorna:
+        - None
+        """
+        documento = self.por_ruta.pop((padre, nombre), None)
+        if documento is None:
+            return
+        self.documentos[documento] = None
+        self.eliminados += 1
+        self.modificado = True
+
+    def copia(self) -> 'IndiceContenidos':
+        """
+        Copia el índice para guardarlo sin el candado de los comandos (ver
+        Bitacora.sellar) mientras este sigue cambiando. Solo se copian la lista de
+        documentos y el diccionario de palabras (en C, sin recorrerlos en Python); los
+        arrays se comparten y este índice los copia recién al cambiarlos (ver _agregar).
+
+        Los documentos eliminados se quitan al guardar la copia: este índice los conserva
+        marcados hasta su propio guardado (ver guardar).
+
+        Retorna:
+        - IndiceContenidos: La copia.
+        """
+        copia = IndiceContenidos(self.almacen)
+        copia.documentos = self.documentos.copy()
+        copia.postings = self.postings.copy()
+        copia.eliminados = self.eliminados
+        self._compartidas = True
+        self._propias.clear()
+        return copia
+
+    @staticmethod
+    def _archivos(padre: str, carpeta: Union[Carpeta, dict]) -> Iterator[tuple[str, Union[Archivo, dict]]]:
+        """
+        Recorre sin recursión los archivos de una carpeta y de sus subcarpetas. Las carpetas
+        que quedaron sin cargar en una carga diferida se recorren desde su diccionario.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que contiene a 'carpeta' ('' en la raíz).
+        - carpeta (Carpeta | dict): La carpeta, o su diccionario (ver Carpeta.to_dict).
+
+        Retorna:
+        - Iterator[tuple[str, Archivo | dict]]: (ruta del padre, archivo) de cada archivo.
+        """
+        pendientes = [(padre, carpeta)]
+        while pendientes:
+            padre, carpeta = pendientes.pop()
+            if isinstance(carpeta, Carpeta) and carpeta._pendiente is not None:
+                carpeta = carpeta.to_dict()
+            nombre = carpeta['nombre'] if isinstance(carpeta, dict) else carpeta.nombre
+            ruta = intern(f"{padre}/{nombre}" if padre else nombre)
+            if isinstance(carpeta, dict):
+                for hijo in carpeta['archivos']:
+                    if 'archivos' in hijo:
+                        pendientes.append((ruta, hijo))
+                    else:
+                        yield ruta, hijo
+                continue
+            # Las subcarpetas se visitan con recorrer (las pendientes se recorren desde su
+            # diccionario) y los archivos de cada carpeta se recorren directamente
+            for archivo in carpeta.listar_archivos():
+                yield ruta, archivo
+            rutas = [ruta]  # Por profundidad, la ruta de la carpeta abierta
+            for profundidad, subcarpeta, _ in carpeta.recorrer(descender=Carpeta._cargada, archivos=False):
+                del rutas[profundidad:]
+                if subcarpeta._pendiente is not None:
+                    pendientes.append((rutas[-1], subcarpeta))
+                    continue
+                ruta = intern(f"{rutas[-1]}/{subcarpeta.nombre}")
+                rutas.append(ruta)
+                for archivo in subcarpeta.listar_archivos():
+                    yield ruta, archivo
+
+    def _contenido(self, archivo: Union[Archivo, dict]) -> str:
+        """
+        El contenido de un archivo, leído del almacén si hace falta. Si el contenido no
+        se puede leer, el archivo se indexa vacío.
+
+        Parámetros:
+        - archivo (Archivo | dict): El archivo, o su diccionario.
+
+        Retorna:
+        - str: El contenido.
+        """
+        try:
+            if isinstance(archivo, Archivo):
+                return archivo.leer_contenido(self.almacen)
+            if archivo.get('contenido') is not None:
+                return archivo['contenido']
+            return Archivo.leer_almacen(self.almacen, archivo['hash'])
+        except (OSError, KeyError):
+            return ''
+
+    def agregar_arbol(self, padre: str, carpeta: Union[Carpeta, dict]) -> None:
+        """
+        Agrega todos los archivos de una carpeta y de sus subcarpetas.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que la contiene ('' en la raíz).
+        - carpeta (Carpeta | dict): La carpeta, o su diccionario.
+
+        Retorna:
+        - None
+        """
+        for ruta_padre, archivo in self._archivos(padre, carpeta):
+            nombre = archivo['nombre'] if isinstance(archivo, dict) else archivo.nombre
+            self._agregar(ruta_padre, nombre, palabras(self._contenido(archivo)))
+        self.modificado = True
+
+    def quitar_arbol(self, padre: str, carpeta: Union[Carpeta, dict]) -> None:
+        """
+        Quita todos los archivos de una carpeta y de sus subcarpetas.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que la contenía ('' en la raíz).
+        - carpeta (Carpeta | dict): La carpeta eliminada, o su diccionario.
+
+        Retorna:
+        - None
+        """
+        for ruta_padre, archivo in self._archivos(padre, carpeta):
+            self.quitar(ruta_padre, archivo['nombre'] if isinstance(archivo, dict) else archivo.nombre)
+
+    def aplicar(self, operacion: dict, eliminada: Optional[Carpeta] = None) -> None:
+        """
+        Actualiza el índice con una operación de la bitácora.
+
+        Parámetros:
+        - operacion (dict): La operación ('mkdir', 'type', 'rmdir' o 'restore').
+        - eliminada (Carpeta | None): En 'rmdir', la carpeta eliminada.
+
+        Retorna:
+        - None
+        """
+        padre = '/'.join(operacion['ruta'])
+        if operacion['op'] == 'type':
+            self.agregar(padre, operacion['nombre'], self._contenido(operacion))
+        elif operacion['op'] == 'rmdir' and eliminada is not None:
+            self.quitar_arbol(padre, eliminada)
+        elif operacion['op'] == 'restore':
+            self.agregar_arbol(padre, operacion['carpeta'])
+
+    def buscar(self, buscadas: set[str], padre: str = '') -> list[Ubicacion]:
+        """
+        Busca los archivos que contienen todas las palabras indicadas.
+
+        Parámetros:
+        - buscadas (set[str]): Las palabras, en minúsculas (ver palabras).
+        - padre (str): Solo se buscan los archivos dentro de esta carpeta ('' para toda la unidad).
+
+        Retorna:
+        - list[Ubicacion]: Los archivos encontrados, ordenados por ruta.
+        """
+        listas = [self.postings.get(palabra) for palabra in buscadas]
+        if not listas or None in listas:
+            return []
+        listas.sort(key=len)
+
+        # Se intersecta desde el array más corto: cada candidato se busca con bisect en
+        # los demás, continuando desde la posición anterior porque están ordenados
+        candidatos = listas[0]
+        for lista in listas[1:]:
+            encontrados = []
+            posicion = 0
+            for documento in candidatos:
+                posicion = bisect_left(lista, documento, posicion)
+                if posicion == len(lista):
+                    break
+                if lista[posicion] == documento:
+                    encontrados.append(documento)
+            candidatos = encontrados
+
+        prefijo = padre + '/'
+        resultado = []
+        for documento in candidatos:
+            ubicacion = self.documentos[documento]
+            if ubicacion is None:
+                continue
+            if not padre or ubicacion[0] == padre or ubicacion[0].startswith(prefijo):
+                resultado.append(Ubicacion(ubicacion[0], ubicacion[1], False))
+        resultado.sort(key=Ubicacion.partes)
+        return resultado
+
+    def _compactar(self) -> None:
+        """
+        Quita de los arrays los documentos eliminados y vuelve a numerar los demás,
+        conservando su orden.
+
+        Retorna:
+        - None
+        """
+        nuevos = array('i', [-1]) * len(self.documentos)
+        documentos = []
+        for documento, ubicacion in enumerate(self.documentos):
+            if ubicacion is not None:
+                nuevos[documento] = len(documentos)
+                documentos.append(ubicacion)
+
+        for palabra, lista in list(self.postings.items()):
+            nueva = array('I', [nuevos[documento] for documento in lista if nuevos[documento] >= 0])
+            if nueva:
+                self.postings[palabra] = nueva
+            else:
+                del self.postings[palabra]
+        self.documentos = documentos
+        self.por_ruta = {ubicacion: documento for documento, ubicacion in enumerate(documentos)}
+        self.eliminados = 0
+
+    @classmethod
+    def construir(cls, raiz: Carpeta, almacen: Optional[AlmacenContenidos] = None) -> 'IndiceContenidos':
+        """
+        Construye el índice leyendo el contenido de todos los archivos de la unidad. Un
+        contenido compartido por varios archivos (mismo hash) se lee una sola vez.
+
+        Parámetros:
+        - raiz (Carpeta): La raíz de la unidad.
+        - almacen (AlmacenContenidos | None): El almacén de los contenidos de la unidad.
+
+        Retorna:
+        - IndiceContenidos: El índice.
+        """
+        indice = cls(almacen)
+        por_hash: dict[str, set[str]] = {}
+        for hijo in raiz.listar():
+            # La raíz no forma parte de las rutas: sus hijos tienen padre ''
+            if isinstance(hijo, Archivo):
+                recorrido = [('', hijo)]
+            else:
+                recorrido = cls._archivos('', hijo)
+            for padre, archivo in recorrido:
+                if isinstance(archivo, dict):
+                    nombre, hash = archivo['nombre'], archivo.get('hash')
+                else:
+                    nombre, hash = archivo.nombre, archivo.hash
+                if hash is None:
+                    palabras_archivo = palabras(indice._contenido(archivo))
+                elif hash in por_hash:
+                    palabras_archivo = por_hash[hash]
+                else:
+                    palabras_archivo = por_hash[hash] = palabras(indice._contenido(archivo))
+                indice._agregar(padre, nombre, palabras_archivo)
+        indice.modificado = True
+        return indice
+
+    def guardar(self, filename: str, secuencia: int) -> None:
+        """
+        Guarda el índice. El archivo tiene una línea JSON con los documentos (en columnas:
+        'padres' con las rutas distintas, 'documentos' con la posición del padre de cada
+        uno y 'nombres'), las palabras ordenadas y el largo de su array, seguida de todos
+        los arrays concatenados como enteros de 4 bytes little-endian.
+
+        Parámetros:
+        - filename (str): El archivo del índice.
+        - secuencia (int): La secuencia de la última operación incluida.
+
+        Retorna:
+        - None
+        """
+        if self.eliminados:
+            self._compactar()
+        padres: dict[str, int] = {}
+        documentos = [padres.setdefault(padre, len(padres)) for padre, _ in self.documentos]
+        lista_palabras = sorted(self.postings)
+        todas = array('I')
+        for palabra in lista_palabras:
+            todas.extend(self.postings[palabra])
+        if byteorder == 'big':
+            todas.byteswap()
+
+        datos = bytearray(json.dumps({
+            'secuencia': secuencia, 'padres': list(padres), 'documentos': documentos,
+            'nombres': [nombre for _, nombre in self.documentos], 'palabras': lista_palabras,
+            'largos': [len(self.postings[palabra]) for palabra in lista_palabras],
+        }).encode('utf-8'))
+        datos += b'\n'
+        datos += todas.tobytes()
+        escribir_atomico(filename, datos, suma=True)
+        self.modificado = False
+
+    @classmethod
+    def cargar(cls, filename: str, almacen: Optional[AlmacenContenidos] = None) -> tuple['IndiceContenidos', int]:
+        """
+        Carga un índice guardado con guardar.
+
+        Parámetros:
+        - filename (str): El archivo del índice.
+        - almacen (AlmacenContenidos | None): El almacén de los contenidos de la unidad.
+
+        Retorna:
+        - tuple[IndiceContenidos, int]: El índice y la secuencia de la última operación incluida.
+
+        Lanza:
+        - FileNotFoundError: Si el archivo no existe.
+        - ArchivoDaniado: Si el archivo está incompleto o dañado.
+        """
+        with open(filename, 'rb') as f:
+            datos = f.read()
+        inicio = verificar(datos, filename)
+        fin_json = datos.find(b'\n', inicio)
+        if fin_json == -1:
+            raise ArchivoDaniado(f"El índice '{filename}' está incompleto.")
+        data = json.loads(datos[inicio:fin_json])
+        todas = array('I')
+        todas.frombytes(datos[fin_json + 1:])
+        if byteorder == 'big':
+            todas.byteswap()
+
+        indice = cls(almacen)
+        padres = [intern(padre) for padre in data['padres']]
+        indice.documentos = [(padres[padre], nombre) for padre, nombre in zip(data['documentos'], data['nombres'])]
+        indice.por_ruta = {ubicacion: documento for documento, ubicacion in enumerate(indice.documentos)}
+        posicion = 0
+        for palabra, largo in zip(data['palabras'], data['largos']):
+            indice.postings[palabra] = todas[posicion:posicion + largo]
+            posicion += largo
+        if posicion != len(todas):
+            raise ArchivoDaniado(f"El índice '{filename}' no coincide con sus palabras.")
+        return indice, data['secuencia']
@@ -0,0 +1,407 @@
+from archivo import Archivo
+from bisect import bisect_left, insort
+from carpeta import Carpeta
+from escritura_segura import cargar_json, guardar_json
+from fnmatch import translate
+from sys import intern
+from typing import Iterator, NamedTuple, Optional, Union
+import re
+
+# Mayor que cualquier carácter: delimita el rango de nombres que empiezan con un prefijo
+FIN_PREFIJO = chr(0x10FFFF)
+
+
+class Ubicacion(NamedTuple):
+    """
+    Un archivo o carpeta de la unidad encontrado en el índice.
+    """
+    padre: str  # Ruta de la carpeta que lo contiene, desde la raíz ('' en la raíz, 'a/b')
+    nombre: str
+    es_carpeta: bool
+
+    def partes(self) -> list[str]:
+        """
+        Los nombres de las carpetas desde la raíz hasta el elemento, incluido.
+
+        Retorna:
+        - list[str]: Las partes de la ruta.
+        """
+        return (self.padre.split('/') if self.padre else []) + [self.nombre]
+
+
+class IndiceNombres:
+    """
+    Índice de toda una unidad: nombre -> ubicaciones de los archivos y carpetas con ese nombre.
+
+    Los nombres se comparan sin distinguir mayúsculas. Para buscar por prefijo se
+    mantiene además la lista ordenada de los nombres distintos: un prefijo se
+    resuelve con bisect y el resto de un patrón con comodines solo se compara contra
+    los nombres de ese rango. La ruta de la carpeta padre es un mismo objeto str
+    para todos sus hijos (se interna), así el índice no repite las rutas.
+
+    Se actualiza con las mismas operaciones que la bitácora (ver aplicar) y se guarda
+    en cada punto de control junto a la unidad, con su número de secuencia.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor de la clase IndiceNombres. Crea un índice vacío.
+        """
+        # Nombre en minúsculas -> su ubicación, o la lista de ubicaciones si el nombre se
+        # repite (casi todos los nombres aparecen una sola vez y así no ocupan una lista).
+        # Las ubicaciones se guardan como tuplas comunes (padre, nombre, es_carpeta), que
+        # se crean mucho más rápido que una Ubicacion; se convierten al devolverlas.
+        self.por_nombre: dict[str, Union[tuple, list[tuple]]] = {}
+        self.nombres: list[str] = []  # Claves de por_nombre, ordenadas
+        self.cantidad = 0
+        self.modificado = False  # Cambios desde el último guardado
+        # Después de una copia (ver copia) las listas de ubicaciones se comparten con ella:
+        # una lista se copia antes de cambiarla, y la clave queda en _propias
+        self._compartidas = False
+        self._propias: set[str] = set()
+
+    @staticmethod
+    def _clave(nombre: str) -> str:
+        """
+        La clave de un nombre en el índice: el nombre en minúsculas (el mismo objeto si ya lo está).
+
+        Parámetros:
+        - nombre (str): El nombre.
+
+        Retorna:
+        - str: La clave.
+        """
+        clave = nombre.lower()
+        return nombre if clave == nombre else clave
+
+    def ubicaciones(self, clave: str) -> list[tuple]:
+        """
+        Las ubicaciones de un nombre.
+
+        Parámetros:
+        - clave (str): El nombre en minúsculas.
+
+        Retorna:
+        - list[tuple]: Las ubicaciones (padre, nombre, es_carpeta); vacía si el nombre no está en el índice.
+        """
+        valor = self.por_nombre.get(clave)
+        if valor is None:
+            return []
+        return valor if isinstance(valor, list) else [valor]
+
+    def agregar(self, padre: str, nombre: str, es_carpeta: bool) -> None:
+        """
+        Agrega un archivo o carpeta al índice.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que lo contiene ('' en la raíz).
+        - nombre (str): El nombre del archivo o carpeta.
+        - es_carpeta (bool): Si es una carpeta.
+
+        Retorna:
+        - None
+        """
+        self._agregar(self._clave(nombre), (intern(padre), nombre, es_carpeta), True)
+        self.modificado = True
+
+    def _agregar(self, clave: str, ubicacion: tuple, ordenar: bool) -> None:
+        """
+        Agrega una ubicación a su clave.
+
+        Parámetros:
+        - clave (str): El nombre en minúsculas.
+        - ubicacion (tuple): La ubicación (padre, nombre, es_carpeta).
+        - ordenar (bool): Si es True, una clave nueva se inserta en orden en 'nombres';
+          si es False se agrega al final (al cargar, las claves llegan ordenadas).
+
+        Retorna:
+        - None
+        """
+        valor = self.por_nombre.get(clave)
+        if valor is None:
+            self.por_nombre[clave] = ubicacion
+            if ordenar:
+                insort(self.nombres, clave)
+            else:
+                self.nombres.append(clave)
+        elif isinstance(valor, list):
+            self._lista_propia(clave, valor).append(ubicacion)
+        else:
+            self.por_nombre[clave] = [valor, ubicacion]
+        self.cantidad += 1
+
+    def quitar(self, padre: str, nombre: str, es_carpeta: bool) -> None:
+        """
+        Quita un archivo o carpeta del índice.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que lo contiene ('' en la raíz).
+        - nombre (str): El nombre del archivo o carpeta.
+        - es_carpeta (bool): Si es una carpeta.
+
+        Retorna:
+        - None
+        """
+        clave = self._clave(nombre)
+        ubicacion = (padre, nombre, es_carpeta)
+        valor = self.por_nombre.get(clave)
+        if valor == ubicacion:
+            del self.por_nombre[clave]
+            del self.nombres[bisect_left(self.nombres, clave)]
+        elif isinstance(valor, list) and ubicacion in valor:
+            valor = self._lista_propia(clave, valor)
+            valor.remove(ubicacion)
+            if len(valor) == 1:
+                self.por_nombre[clave] = valor[0]
+        else:
+            return
+        self.cantidad -= 1
+        self.modificado = True
+
+    def _lista_propia(self, clave: str, valor: list[tuple]) -> list[tuple]:
+        """
+        La lista de ubicaciones de una clave, lista para cambiarla: si se comparte con una
+        copia (ver copia) se reemplaza por una lista nueva.
+
+        Parámetros:
+        - clave (str): El nombre en minúsculas.
+        - valor (list[tuple]): Su lista de ubicaciones.
+
+        Retorna:
+        - list[tuple]: La lista que se puede cambiar.
+        """
+        if self._compartidas and clave not in self._propias:
+            valor = self.por_nombre[clave] = list(valor)
+            self._propias.add(clave)
+        return valor
+
+    def copia(self) -> 'IndiceNombres':
+        """
+        Copia el índice para guardarlo sin el candado de los comandos (ver
+        Bitacora.sellar) mientras este sigue cambiando. Solo se copian el diccionario y
+        la lista de nombres (en C, sin recorrerlos en Python); las listas de ubicaciones
+        se comparten y este índice las copia recién al cambiarlas (ver _lista_propia).
+
+        Retorna:
+        - IndiceNombres: La copia.
+        """
+        copia = IndiceNombres()
+        copia.por_nombre = self.por_nombre.copy()
+        copia.nombres = self.nombres.copy()
+        copia.cantidad = self.cantidad
+        self._compartidas = True
+        self._propias.clear()
+        return copia
+
+    def agregar_arbol(self, padre: str, carpeta: Union[Carpeta, dict]) -> None:
+        """
+        Agrega una carpeta y todo su contenido.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que la contiene ('' en la raíz).
+        - carpeta (Carpeta | dict): La carpeta, o su diccionario (ver Carpeta.to_dict).
+
+        Retorna:
+        - None
+        """
+        for ruta_padre, nombre, es_carpeta in self._recorrer(padre, carpeta):
+            self.agregar(ruta_padre, nombre, es_carpeta)
+
+    def quitar_arbol(self, padre: str, carpeta: Union[Carpeta, dict]) -> None:
+        """
+        Quita una carpeta y todo su contenido.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que la contenía ('' en la raíz).
+        - carpeta (Carpeta | dict): La carpeta eliminada, o su diccionario.
+
+        Retorna:
+        - None
+        """
+        for ruta_padre, nombre, es_carpeta in self._recorrer(padre, carpeta):
+            self.quitar(ruta_padre, nombre, es_carpeta)
+
+    @staticmethod
+    def _recorrer(padre: str, carpeta: Union[Carpeta, dict]) -> Iterator[tuple[str, str, bool]]:
+        """
+        Recorre una carpeta y su contenido sin recursión. Las carpetas que quedaron sin
+        cargar en una carga diferida se recorren desde su diccionario, sin cargarlas.
+
+        Parámetros:
+        - padre (str): La ruta de la carpeta que la contiene.
+        - carpeta (Carpeta | dict): La carpeta a recorrer.
+
+        Retorna:
+        - Iterator[tuple[str, str, bool]]: (ruta del padre, nombre, es carpeta) de cada elemento.
+        """
+        pendientes = [(padre, carpeta)]
+        while pendientes:
+            padre, carpeta = pendientes.pop()
+            if isinstance(carpeta, Carpeta) and carpeta._pendiente is not None:
+                carpeta = carpeta.to_dict()
+            nombre = carpeta['nombre'] if isinstance(carpeta, dict) else carpeta.nombre
+            yield padre, nombre, True
+
+            ruta = f"{padre}/{nombre}" if padre else nombre
+            if isinstance(carpeta, dict):
+                for hijo in carpeta['archivos']:
+                    if 'archivos' in hijo:
+                        pendientes.append((ruta, hijo))
+                    else:
+                        yield ruta, hijo['nombre'], False
+                continue
+            # Las subcarpetas se visitan con recorrer (las pendientes se recorren desde su
+            # diccionario) y los archivos de cada carpeta se recorren directamente
+            for archivo in carpeta.listar_archivos():
+                yield ruta, archivo.nombre, False
+            rutas = [ruta]  # Por profundidad, la ruta de la carpeta abierta
+            for profundidad, subcarpeta, _ in carpeta.recorrer(descender=Carpeta._cargada, archivos=False):
+                del rutas[profundidad:]
+                if subcarpeta._pendiente is not None:
+                    pendientes.append((rutas[-1], subcarpeta))
+                    continue
+                yield rutas[-1], subcarpeta.nombre, True
+                ruta = f"{rutas[-1]}/{subcarpeta.nombre}"
+                rutas.append(ruta)
+                for archivo in subcarpeta.listar_archivos():
+                    yield ruta, archivo.nombre, False
+
+    def aplicar(self, operacion: dict, eliminada: Optional[Carpeta] = None) -> None:
+        """
+        Actualiza el índice con una operación de la bitácora.
+
+        Parámetros:
+        - operacion (dict): La operación ('mkdir', 'type', 'rmdir' o 'restore').
+        - eliminada (Carpeta | None): En 'rmdir', la carpeta eliminada.
+
+        Retorna:
+        - None
+        """
+        padre = '/'.join(operacion['ruta'])
+        if operacion['op'] == 'mkdir':
+            self.agregar(padre, operacion['nombre'], True)
+        elif operacion['op'] == 'type':
+            self.agregar(padre, operacion['nombre'], False)
+        elif operacion['op'] == 'rmdir' and eliminada is not None:
+            self.quitar_arbol(padre, eliminada)
+        elif operacion['op'] == 'restore':
+            self.agregar_arbol(padre, operacion['carpeta'])
+
+    def buscar(self, patron: str) -> list[Ubicacion]:
+        """
+        Busca los archivos y carpetas cuyo nombre coincide con un patrón.
+
+        Un nombre exacto o un patrón que empieza con texto fijo ('inf*', 'a?c.txt') solo
+        compara los nombres con ese prefijo; un patrón que empieza con un comodín
+        ('*.txt') compara todos los nombres distintos de la unidad.
+
+        Parámetros:
+        - patron (str): Un nombre, o un patrón con comodines '*' y '?' (sin distinguir mayúsculas).
+
+        Retorna:
+        - list[Ubicacion]: Las ubicaciones encontradas, ordenadas por ruta.
+        """
+        patron = patron.lower()
+        comodin = min((patron.find(c) for c in '*?[' if c in patron), default=-1)
+        if comodin == -1:
+            claves = [patron]
+        else:
+            prefijo = patron[:comodin]
+            inicio = bisect_left(self.nombres, prefijo)
+            fin = bisect_left(self.nombres, prefijo + FIN_PREFIJO, inicio)
+            claves = self.nombres[inicio:fin]
+            if patron != prefijo + '*':
+                coincide = re.compile(translate(patron)).match
+                claves = [clave for clave in claves if coincide(clave)]
+
+        resultado = [Ubicacion._make(ubicacion) for clave in claves for ubicacion in self.ubicaciones(clave)]
+        resultado.sort(key=Ubicacion.partes)
+        return resultado
+
+    @classmethod
+    def construir(cls, raiz: Carpeta) -> 'IndiceNombres':
+        """
+        Construye el índice recorriendo toda la unidad (sin incluir la raíz).
+
+        Parámetros:
+        - raiz (Carpeta): La raíz de la unidad.
+
+        Retorna:
+        - IndiceNombres: El índice.
+        """
+        indice = cls()
+        for hijo in raiz.listar():
+            # La raíz no forma parte de las rutas: sus hijos tienen padre ''
+            if isinstance(hijo, Archivo):
+                recorrido = [('', hijo.nombre, False)]
+            else:
+                recorrido = cls._recorrer('', hijo)
+            for ubicacion in recorrido:
+                indice._agregar(cls._clave(ubicacion[1]), ubicacion, False)
+        # Las claves se agregaron sin orden: se ordenan una sola vez
+        indice.nombres.sort()
+        indice.modificado = True
+        return indice
+
+    def guardar(self, filename: str, secuencia: int) -> None:
+        """
+        Guarda el índice en columnas, en el orden de 'nombres' (así al cargarlo no hay que
+        volver a ordenarlo): 'padres' con las rutas de carpeta distintas, 'nombres' con el
+        nombre de cada elemento y 'ubicaciones' con 2 * (posición de su padre) + es_carpeta.
+
+        Parámetros:
+        - filename (str): El archivo del índice.
+        - secuencia (int): La secuencia de la última operación incluida.
+
+        Retorna:
+        - None
+        """
+        padres: dict[str, int] = {}
+        nombres = []
+        ubicaciones = []
+        por_nombre = self.por_nombre
+        for clave in self.nombres:
+            valor = por_nombre[clave]
+            for padre, nombre, es_carpeta in (valor if isinstance(valor, list) else (valor,)):
+                nombres.append(nombre)
+                ubicaciones.append(padres.setdefault(padre, len(padres)) * 2 + es_carpeta)
+        guardar_json(filename, {'secuencia': secuencia, 'padres': list(padres),
+                                'nombres': nombres, 'ubicaciones': ubicaciones}, indent=None)
+        self.modificado = False
+
+    @classmethod
+    def cargar(cls, filename: str) -> tuple['IndiceNombres', int]:
+        """
+        Carga un índice guardado con guardar.
+
+        Parámetros:
+        - filename (str): El archivo del índice.
+
+        Retorna:
+        - tuple[IndiceNombres, int]: El índice y la secuencia de la última operación incluida.
+
+        Lanza:
+        - FileNotFoundError: Si el archivo no existe.
+        - ArchivoDaniado: Si el archivo está incompleto o dañado.
+        """
+        data = cargar_json(filename)
+        padres = [intern(padre) for padre in data['padres']]
+        indice = cls()
+        # Mismo efecto que _agregar con las claves ya ordenadas, sin una llamada por elemento
+        por_nombre = indice.por_nombre
+        claves = indice.nombres
+        for nombre, codigo in zip(data['nombres'], data['ubicaciones']):
+            clave = nombre.lower()
+            if clave == nombre:
+                clave = nombre
+            ubicacion = (padres[codigo >> 1], nombre, codigo & 1 == 1)
+            valor = por_nombre.get(clave)
+            if valor is None:
+                por_nombre[clave] = ubicacion
+                claves.append(clave)
+            elif isinstance(valor, list):
+                valor.append(ubicacion)
+            else:
+                por_nombre[clave] = [valor, ubicacion]
+        indice.cantidad = len(data['nombres'])
+        return indice, data['secuencia']
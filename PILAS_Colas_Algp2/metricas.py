@@ -0,0 +1,181 @@
+from contextlib import nullcontext
+from math import ceil
+from pila_acotada import PilaAcotada
+from time import perf_counter_ns
+from typing import Optional
+import threading
+
+# Fases en que se divide el tiempo de un comando
+FASES = ('resolver', 'modificar', 'persistir', 'registrar')
+
+# Comando con el que se registran los guardados que no forman parte de un comando
+# (los del hilo en segundo plano, los intermedios del modo script y los de los registros)
+GUARDADO = '(guardado)'
+
+
+class _Cronometro:
+    """
+    Mide el tiempo de un bloque 'with' y lo suma a una fase del comando en curso o,
+    si se indica un comando, lo agrega directamente como muestra.
+    """
+
+    def __init__(self, metricas: 'Metricas', fase: str, comando: Optional[str] = None) -> None:
+        self.metricas = metricas
+        self.fase = fase
+        self.comando = comando
+        self.inicio = 0
+
+    def __enter__(self) -> None:
+        self.inicio = perf_counter_ns()
+
+    def __exit__(self, *excepcion) -> None:
+        transcurrido = perf_counter_ns() - self.inicio
+        if self.comando is None:
+            self.metricas.acumulado[self.fase] += transcurrido
+        else:
+            self.metricas.agregar(self.comando, self.fase, transcurrido // 1000)
+
+
+class Metricas:
+    """
+    Tiempos por comando y por fase (resolver la ruta, modificar la unidad, persistir
+    en disco y registrar en el historial), en microsegundos.
+
+    Para cada comando y fase se conservan las últimas 'ventana' muestras en un array
+    circular, de las que se calculan los percentiles al consultarlos; la memoria no
+    crece con la cantidad de comandos. El tiempo de 'modificar' es el del comando
+    menos el de las demás fases, así solo se miden explícitamente las otras tres.
+
+    Las muestras se agregan y se consultan con un candado propio, porque el escritor en
+    segundo plano agrega las de sus guardados sin el candado de los comandos.
+    """
+
+    def __init__(self, ventana: int = 1000, activa: bool = True) -> None:
+        """
+        Constructor de la clase Metricas.
+
+        Parámetros:
+        - ventana (int): La cantidad de muestras por comando y fase para los percentiles.
+        - activa (bool): Si es False no se mide nada.
+        """
+        self.ventana = ventana
+        self.activa = activa
+        # (comando, fase) -> últimas muestras en microsegundos
+        self.muestras: dict[tuple[str, str], PilaAcotada] = {}
+        # (comando, fase) -> cantidad total de muestras
+        self.cantidades: dict[tuple[str, str], int] = {}
+        # Nanosegundos de cada fase en el comando en curso
+        self.acumulado: dict[str, int] = dict.fromkeys(FASES, 0)
+        self._inicio: Optional[int] = None
+        self._candado = threading.Lock()
+
+    def comenzar(self) -> None:
+        """
+        Marca el comienzo de un comando.
+
+        Retorna:
+        - None
+        """
+        if not self.activa:
+            return
+        for fase in FASES:
+            self.acumulado[fase] = 0
+        self._inicio = perf_counter_ns()
+
+    def terminar(self, comando: str) -> None:
+        """
+        Marca el final del comando en curso y agrega una muestra por fase.
+
+        Parámetros:
+        - comando (str): El nombre del comando.
+
+        Retorna:
+        - None
+        """
+        if self._inicio is None:
+            return
+        total = perf_counter_ns() - self._inicio
+        self._inicio = None
+        medido = 0
+        comando = comando.lower()
+        for fase in FASES:
+            if fase != 'modificar':
+                medido += self.acumulado[fase]
+                self.agregar(comando, fase, self.acumulado[fase] // 1000)
+        self.agregar(comando, 'modificar', max(total - medido, 0) // 1000)
+
+    def medir(self, fase: str, comando: Optional[str] = None):
+        """
+        Devuelve un administrador de contexto que mide una fase.
+
+        Parámetros:
+        - fase (str): Una de FASES.
+        - comando (str | None): Sin comando, el tiempo se suma al comando en curso; con
+          comando (por ejemplo GUARDADO), se agrega como una muestra propia.
+
+        Retorna:
+        - El administrador de contexto para usar con 'with'.
+        """
+        if not self.activa or (comando is None and self._inicio is None):
+            return nullcontext()
+        return _Cronometro(self, fase, comando)
+
+    def agregar(self, comando: str, fase: str, microsegundos: int) -> None:
+        """
+        Agrega una muestra.
+
+        Parámetros:
+        - comando (str): El nombre del comando.
+        - fase (str): Una de FASES.
+        - microsegundos (int): La duración.
+
+        Retorna:
+        - None
+        """
+        clave = (comando, fase)
+        with self._candado:
+            muestras = self.muestras.get(clave)
+            if muestras is None:
+                muestras = self.muestras[clave] = PilaAcotada(self.ventana, 'q')
+                self.cantidades[clave] = 0
+            muestras.push(microsegundos)
+            self.cantidades[clave] += 1
+
+    def resumen(self) -> dict[str, dict[str, dict[str, int]]]:
+        """
+        Calcula la cantidad y los percentiles 50, 90 y 99 y el máximo de cada comando y fase.
+
+        Los percentiles son por rango más cercano: el percentil p es la muestra en la
+        posición ceil(p * n / 100) de las ordenadas, así con pocas muestras p99 es el
+        máximo y no subestima los casos lentos.
+
+        Retorna:
+        - dict: {comando: {fase: {'cantidad', 'p50', 'p90', 'p99', 'max'}}}, en microsegundos.
+        """
+        with self._candado:
+            copias = [(clave, sorted(muestras), self.cantidades[clave])
+                      for clave, muestras in sorted(self.muestras.items())]
+        resumen: dict[str, dict[str, dict[str, int]]] = {}
+        for (comando, fase), ordenadas, cantidad in copias:
+            resumen.setdefault(comando, {})[fase] = {
+                'cantidad': cantidad,
+                'p50': self._percentil(ordenadas, 50),
+                'p90': self._percentil(ordenadas, 90),
+                'p99': self._percentil(ordenadas, 99),
+                'max': ordenadas[-1],
+            }
+        return resumen
+
+    @staticmethod
+    def _percentil(ordenadas: list[int], percentil: int) -> int:
+        """
+        Calcula un percentil por rango más cercano.
+
+        Parámetros:
+        - ordenadas (list[int]): Las muestras ordenadas (al menos una).
+        - percentil (int): El percentil, entre 0 y 100.
+
+        Retorna:
+        - int: La muestra del percentil.
+        """
+        return ordenadas[max(0, ceil(percentil * len(ordenadas) / 100) - 1)]
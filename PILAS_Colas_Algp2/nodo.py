@@ -1,11 +1,13 @@
-class Nodo:
-    
-    def __init__(self, dato):
-        """
-        Constructor de la clase Nodo.
-
-        Parámetros:
-        - dato (Archivo, Carpeta, Pila): El dato que el nodo va a contener. Puede ser un objeto de tipo 'Archivo' o 'Carpeta'.
-        """
-        self.dato = dato
-        self.siguiente = None  # Referencia al siguiente nodo en la lista.
+class Nodo:
+    __slots__ = ('dato', 'siguiente', 'anterior')
+
+    def __init__(self, dato):
+        """
+        Constructor de la clase Nodo.
+
+        Parámetros:
+        - dato (Archivo, Carpeta, Pila): El dato que el nodo va a contener. Puede ser un objeto de tipo 'Archivo' o 'Carpeta'.
+        """
+        self.dato = dato
+        self.siguiente = None  # Referencia al siguiente nodo en la lista.
+        self.anterior = None  # Referencia al nodo anterior (solo en las colas de Carpeta).
@@ -0,0 +1,102 @@
+from array import array
+from typing import Optional
+
+
+class PilaAcotada:
+    """
+    Pila de capacidad fija sobre un arreglo circular.
+
+    Tiene las mismas operaciones que Pila, pero al apilar con la pila llena se
+    descarta el elemento más antiguo (el del fondo), así la memoria no crece.
+
+    Con un código de tipo ('q', 'd', ...) los elementos se guardan en un array del
+    módulo array en lugar de una lista: ocupan 8 bytes cada uno en vez de un objeto.
+    """
+
+    def __init__(self, capacidad: int, tipo: Optional[str] = None) -> None:
+        """
+        Constructor de la clase PilaAcotada.
+
+        Parámetros:
+        - capacidad (int): La cantidad máxima de elementos.
+        - tipo (str | None): El código de tipo del array, o None para guardar objetos en una lista.
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad de la pila debe ser al menos 1.")
+        self.capacidad = capacidad
+        self._datos = [None] * capacidad if tipo is None else array(tipo, [0]) * capacidad
+        self._vacio = None if tipo is None else 0
+        self._fondo = 0  # Posición del elemento más antiguo
+        self._cantidad = 0
+
+    def push(self, dato) -> Optional[object]:
+        """
+        Método que inserta un nuevo elemento en la pila.
+
+        Parámetros:
+        - dato: El dato a insertar en la pila (no puede ser None).
+
+        Retorna:
+        - dato | None: El elemento más antiguo si se descartó para hacer lugar, o None.
+        """
+        if self._cantidad < self.capacidad:
+            self._datos[(self._fondo + self._cantidad) % self.capacidad] = dato
+            self._cantidad += 1
+            return None
+
+        descartado = self._datos[self._fondo]
+        self._datos[self._fondo] = dato
+        self._fondo = (self._fondo + 1) % self.capacidad
+        return descartado
+
+    def pop(self):
+        """
+        Método que elimina y devuelve el elemento en el tope de la pila.
+
+        Retorna:
+        - dato: El dato eliminado del tope de la pila, o None si la pila está vacía.
+        """
+        if self._cantidad == 0:
+            return None
+        self._cantidad -= 1
+        posicion = (self._fondo + self._cantidad) % self.capacidad
+        dato = self._datos[posicion]
+        self._datos[posicion] = self._vacio
+        return dato
+
+    def ver_tope(self):
+        """
+        Método que devuelve el elemento en el tope de la pila sin eliminarlo.
+
+        Retorna:
+        - dato: El dato en el tope de la pila, o None si la pila está vacía.
+        """
+        if self._cantidad == 0:
+            return None
+        return self._datos[(self._fondo + self._cantidad - 1) % self.capacidad]
+
+    def __len__(self) -> int:
+        return self._cantidad
+
+    def __getitem__(self, posicion: int):
+        """
+        Devuelve el elemento en una posición contando desde el fondo (0 es el más antiguo),
+        así la pila puede usarse con bisect.
+
+        Parámetros:
+        - posicion (int): La posición, entre 0 y len(pila) - 1.
+
+        Retorna:
+        - dato: El elemento en esa posición.
+
+        Lanza:
+        - IndexError: Si la posición está fuera de la pila.
+        """
+        if not 0 <= posicion < self._cantidad:
+            raise IndexError("Posición fuera de la pila.")
+        return self._datos[(self._fondo + posicion) % self.capacidad]
+
+    def __iter__(self):
+        # Desde el tope (más reciente) hasta el fondo, igual que Pila
+        for i in range(self._cantidad - 1, -1, -1):
+            yield self._datos[(self._fondo + i) % self.capacidad]
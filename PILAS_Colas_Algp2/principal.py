@@ -1,12 +1,31 @@
-from consola import Consola
-from json import load
-
-try:
-    # Cargar la configuración desde el archivo JSON
-    with open('config.json', 'r') as archivo_json:
-        configuracion_cargada = load(archivo_json)
-
-    consola = Consola("C:", configuracion_cargada)  # Unidad por defecto
-except Exception as e:
-    print("Ocurrio un error al cargar la configuración.")
-    print(f"Error: {e}")
\ No newline at end of file
+from argparse import ArgumentParser
+from consola import Consola
+from json import load
+import sys
+
+parser = ArgumentParser(description="Consola de carpetas y archivos.")
+parser.add_argument('--script', metavar='ARCHIVO',
+                    help="Ejecuta los comandos del archivo (o de la entrada estándar con '-') sin interacción.")
+parser.add_argument('--guardar-cada', type=int, default=1000, metavar='N',
+                    help="En modo script, cantidad de comandos entre guardados intermedios.")
+argumentos = parser.parse_args()
+
+try:
+    # Cargar la configuración desde el archivo JSON
+    with open('config.json', 'r') as archivo_json:
+        configuracion_cargada = load(archivo_json)
+
+    consola = Consola("C:", configuracion_cargada)  # Unidad por defecto
+    consola.cargar()
+except Exception as e:
+    print("Ocurrio un error al cargar la configuración.")
+    print(f"Error: {e}")
+    sys.exit(1)
+
+if argumentos.script is None:
+    consola.ejecutar()
+elif argumentos.script == '-':
+    consola.ejecutar_script(sys.stdin, argumentos.guardar_cada)
+else:
+    with open(argumentos.script, encoding='utf-8') as script:
+        consola.ejecutar_script(script, argumentos.guardar_cada)
\ No newline at end of file
@@ -1,98 +1,499 @@
-from pila import Pila
-from json import load, dump
-from typing import Optional
-
-
-class Registro:
-    def __init__(self) -> None:
-        """
-        Inicializa una instancia de la clase Registro.
-        """
-        self.errores: Pila = Pila()
-        self.operaciones: Pila = Pila()
-
-    def agregar_error(self, error: str) -> None:
-        """
-        Agrega un error al registro.
-
-        Parámetros:
-        - error (str): El mensaje de error a agregar.
-
-        Retorna:
-        - None
-        """
-        self.errores.push(error)
-
-    def agregar_operacion(self, operacion: str) -> None:
-        """
-        Agrega una operación al registro.
-
-        Parámetros:
-        - operacion (str): La operación realizada a agregar.
-
-        Retorna:
-        - None
-        """
-        self.operaciones.push(operacion)
-
-    def eliminar_ultimo_error(self) -> Optional[str]:
-        """
-        Elimina y devuelve el último error de la pila de errores.
-
-        Retorna:
-        - str | None: El último error eliminado, o None si la pila de errores está vacía.
-        """
-        return self.errores.pop()
-    
-    def ver_errores(self) -> list[str]:
-        """
-        Devuelve una lista con los errores registrados.
-
-        Retorna:
-        - List[str]: Lista de mensajes de error.
-        """
-        return [error for error in self.errores]
-
-    def ver_operaciones(self) -> list[str]:
-        """
-        Devuelve una lista con las operaciones registradas.
-
-        Retorna:
-        - List[str]: Lista de operaciones realizadas.
-        """
-        return [op for op in self.operaciones]
-
-    def guardar_registros(self, filename: str) -> None:
-        """
-        Guarda los registros en un archivo JSON.
-
-        Parámetros:
-        - filename (str): El nombre del archivo donde se guardarán los registros.
-
-        Retorna:
-        - None
-        """
-        with open(filename, 'w') as f:
-            registros = {
-                'errores': self.ver_errores(),
-                'operaciones': self.ver_operaciones()
-            }
-            dump(registros, f, indent=4)
-
-    def cargar_registros(self, filename: str) -> None:
-        """
-        Carga los registros desde un archivo JSON.
-
-        Parámetros:
-        - filename (str): El nombre del archivo desde donde se cargarán los registros.
-
-        Retorna:
-        - None
-        """
-
-        with open(filename, 'r') as f:
-            registros = load(f)
-            for error in registros['errores']:
-                self.errores.push(error)
-            for operacion in registros['operaciones']:
-                self.operaciones.push(operacion)
+from escritura_segura import escribir_atomico, sincronizar_directorio
+from glob import escape as escape_glob, glob
+from historial import Historial, RegistroComando
+from json import load, loads, dumps
+from os import fsync, remove
+from os.path import dirname, exists, getsize, splitext
+from re import escape, match
+from typing import Iterator, NamedTuple, Optional
+
+
+class CorteRegistros(NamedTuple):
+    """
+    Lo que hay que escribir en el archivo de registros, tomado en un instante (ver
+    Registro.cortar). Los registros son inmutables, así que se guardan sin copiarlos.
+    """
+    # Cambios a agregar al final del archivo: (tipo, registro)
+    pendientes: list[tuple[str, Optional[RegistroComando]]]
+    # Registros que salieron del historial, para el archivo de archivo
+    desalojados: list[tuple[str, RegistroComando]]
+    # Si no es None, el archivo se reescribe con estos registros (tipo, registro)
+    vigentes: Optional[list[tuple[str, RegistroComando]]]
+
+
+class Registro:
+    """
+    Historial de errores y operaciones.
+
+    Los registros se guardan estructurados (ver historial.RegistroComando) y se
+    convierten a texto solo para mostrarlos. En memoria se conservan solo los
+    últimos 'capacidad' errores y las últimas 'capacidad' operaciones. Los registros
+    más antiguos salen del historial y, en la próxima compactación del archivo, se
+    agregan a archivos de archivo rotativos ('<nombre>.1.jsonl', '<nombre>.2.jsonl',
+    ...) de hasta 'tamano_archivo' bytes, de los que se conservan los 'max_archivos'
+    más recientes (con 0 no se archivan). Ver _compactar para el orden en que se
+    escriben los dos archivos.
+    """
+
+    def __init__(self, capacidad: int = 1000, tamano_archivo: int = 1024 * 1024,
+                 max_archivos: int = 5) -> None:
+        """
+        Inicializa una instancia de la clase Registro.
+
+        Parámetros:
+        - capacidad (int): La cantidad máxima de errores y de operaciones en memoria.
+        - tamano_archivo (int): El tamaño en bytes a partir del cual se rota el archivo de archivo.
+        - max_archivos (int): La cantidad de archivos de archivo que se conservan (0 para
+          descartar los registros que salen del historial).
+
+        Lanza:
+        - ValueError: Si max_archivos es negativo.
+        """
+        if max_archivos < 0:
+            raise ValueError("La cantidad de archivos de registros a conservar no puede ser negativa.")
+        self.errores: Historial = Historial(capacidad)
+        self.operaciones: Historial = Historial(capacidad)
+        self.tamano_archivo = tamano_archivo
+        self.max_archivos = max_archivos
+        # Cambios aún no escritos en el archivo: (tipo, registro), registro es None en 'eliminar_error'
+        self.pendientes: list[tuple[str, Optional[RegistroComando]]] = []
+        # Registros que salieron del historial y todavía no se pasaron a un archivo de archivo
+        self.desalojados: list[tuple[str, RegistroComando]] = []
+        # (número, tamaño) del archivo de archivo antes de un lote de desalojados que no se
+        # confirmó (ver _compactar); None si no hay ninguno
+        self.posicion_archivo: Optional[tuple[int, int]] = None
+        self.cantidad_registros = 0
+        # Líneas del archivo que ya no corresponden a registros vigentes
+        self.lineas_descartables = 0
+        self.requiere_compactar = False
+
+    def agregar(self, registro: RegistroComando) -> None:
+        """
+        Agrega un comando al historial de errores, si falló, o al de operaciones.
+
+        Parámetros:
+        - registro (RegistroComando): El comando ejecutado.
+
+        Retorna:
+        - None
+        """
+        tipo = 'error' if registro.error is not None else 'operacion'
+        self._apilar(tipo, registro)
+        self.pendientes.append((tipo, registro))
+
+    def _apilar(self, tipo: str, registro: RegistroComando) -> None:
+        """
+        Agrega un registro a su historial. Si el historial estaba lleno, el registro más
+        antiguo queda para pasarse a un archivo de archivo en la próxima compactación.
+
+        Parámetros:
+        - tipo (str): 'error' u 'operacion'.
+        - registro (RegistroComando): El registro.
+
+        Retorna:
+        - None
+        """
+        historial = self.errores if tipo == 'error' else self.operaciones
+        desalojado = historial.agregar(registro)
+        if desalojado is None:
+            self.cantidad_registros += 1
+            return
+
+        self.desalojados.append((tipo, desalojado))
+        self.lineas_descartables += 1
+        if self.lineas_descartables > self.cantidad_registros:
+            self.requiere_compactar = True
+
+    def eliminar_ultimo_error(self) -> Optional[RegistroComando]:
+        """
+        Elimina y devuelve el último error del historial de errores.
+
+        Retorna:
+        - RegistroComando | None: El último error eliminado, o None si el historial de errores está vacío.
+        """
+        error = self.errores.quitar_ultimo()
+        if error is not None:
+            self.pendientes.append(('eliminar_error', None))
+            self.cantidad_registros -= 1
+            self.lineas_descartables += 2
+            if self.lineas_descartables > self.cantidad_registros:
+                self.requiere_compactar = True
+        return error
+
+    def consultar(self, tipo: str, desde: Optional[int] = None, hasta: Optional[int] = None,
+                  comando: Optional[str] = None, error: Optional[str] = None,
+                  ultimos: Optional[int] = None) -> Iterator[RegistroComando]:
+        """
+        Recorre los registros de un tipo que cumplen los filtros, del más reciente al más
+        antiguo (ver Historial.consultar).
+
+        Parámetros:
+        - tipo (str): 'error' u 'operacion'.
+        - desde (int | None): La marca de tiempo mínima (inclusive).
+        - hasta (int | None): La marca de tiempo máxima (inclusive).
+        - comando (str | None): El nombre del comando (por ejemplo 'mkdir').
+        - error (str | None): Un texto que debe aparecer en el mensaje de error.
+        - ultimos (int | None): La cantidad máxima de registros a devolver.
+
+        Retorna:
+        - Iterator[RegistroComando]: Los registros que cumplen los filtros.
+        """
+        historial = self.errores if tipo == 'error' else self.operaciones
+        return historial.consultar(desde, hasta, comando, error, ultimos)
+
+    def ver_errores(self) -> list[RegistroComando]:
+        """
+        Devuelve una lista con los errores registrados, del más reciente al más antiguo.
+
+        Retorna:
+        - list[RegistroComando]: Lista de errores.
+        """
+        return list(self.errores)
+
+    def ver_operaciones(self) -> list[RegistroComando]:
+        """
+        Devuelve una lista con las operaciones registradas, del más reciente al más antiguo.
+
+        Retorna:
+        - list[RegistroComando]: Lista de operaciones realizadas.
+        """
+        return list(self.operaciones)
+
+    @staticmethod
+    def _linea(tipo: str, registro: Optional[RegistroComando], historial: Optional[str] = None) -> str:
+        """
+        Convierte un cambio del historial a una línea JSON del archivo.
+
+        Parámetros:
+        - tipo (str): 'error', 'operacion', 'eliminar_error' o 'archivar'.
+        - registro (RegistroComando | None): El registro (None en 'eliminar_error').
+        - historial (str | None): En 'archivar', el historial del que salió el registro.
+
+        Retorna:
+        - str: La línea, con su salto de línea.
+        """
+        data = {'tipo': tipo}
+        if historial is not None:
+            data['historial'] = historial
+        if registro is not None:
+            data.update(registro.to_dict())
+        return dumps(data, ensure_ascii=False) + '\n'
+
+    def guardar_registros(self, filename: str) -> None:
+        """
+        Guarda los registros nuevos agregándolos al final del archivo (una línea JSON por registro).
+
+        Solo se escriben los cambios pendientes desde el último guardado, por lo que el
+        costo no depende del tamaño del historial. Si el archivo necesita compactarse
+        (tiene más líneas descartables que vigentes, o se migró del formato anterior)
+        se reescribe completo, de tamaño acotado por la capacidad.
+
+        Parámetros:
+        - filename (str): El nombre del archivo donde se guardarán los registros.
+
+        Retorna:
+        - None
+        """
+        self.guardar_corte(self.cortar(), filename)
+
+    def cortar(self) -> CorteRegistros:
+        """
+        Toma lo que hay que guardar y deja el registro como si ya estuviera guardado.
+
+        Solo mueve listas en memoria (y, si hay que compactar, copia los registros
+        vigentes, acotados por la capacidad), así que puede hacerse con el candado de los
+        comandos y escribirse después sin él con guardar_corte.
+
+        Retorna:
+        - CorteRegistros: El corte a guardar.
+        """
+        if not self.requiere_compactar:
+            # Los desalojados se archivan recién al compactar
+            corte = CorteRegistros(self.pendientes, [], None)
+            self.pendientes = []
+            return corte
+
+        # El archivo va del más antiguo al más reciente
+        vigentes = [(tipo, historial[posicion])
+                    for tipo, historial in (('error', self.errores), ('operacion', self.operaciones))
+                    for posicion in range(len(historial))]
+        # Con max_archivos 0 los desalojados se descartan sin archivarlos
+        desalojados = self.desalojados if self.max_archivos > 0 else []
+        corte = CorteRegistros(self.pendientes, desalojados, vigentes)
+        self.pendientes = []
+        self.desalojados = []
+        # Las líneas del lote de desalojados (ver _compactar) no se cuentan: son a lo sumo
+        # tantas como las descartables que llevaron a compactar
+        self.lineas_descartables = 0
+        self.requiere_compactar = False
+        return corte
+
+    def guardar_corte(self, corte: CorteRegistros, filename: str) -> None:
+        """
+        Escribe un corte tomado con cortar: agrega sus cambios al final del archivo o, si
+        hay que compactar, reescribe el archivo con los registros vigentes y pasa los
+        desalojados al archivo de archivo (ver _compactar).
+
+        Si la escritura falla, los cambios del corte vuelven a quedar pendientes.
+
+        Parámetros:
+        - corte (CorteRegistros): El corte a guardar.
+        - filename (str): El nombre del archivo de registros.
+
+        Retorna:
+        - None
+        """
+        try:
+            if corte.vigentes is None:
+                with open(filename, 'a', encoding='utf-8') as f:
+                    for tipo, registro in corte.pendientes:
+                        f.write(self._linea(tipo, registro))
+                    f.flush()
+                    fsync(f.fileno())
+                return
+
+            self._compactar(corte, filename)
+        except BaseException:
+            # Los cambios posteriores al corte quedan detrás de los del corte
+            self.pendientes[:0] = corte.pendientes
+            self.desalojados[:0] = corte.desalojados
+            if corte.vigentes is not None:
+                self.requiere_compactar = True
+            raise
+
+    def _compactar(self, corte: CorteRegistros, filename: str) -> None:
+        """
+        Reescribe el archivo con los registros vigentes de un corte y pasa sus
+        desalojados al archivo de archivo, en este orden, para que una interrupción en
+        cualquier punto no pierda ni duplique registros:
+
+        1. Se reescribe el archivo de forma atómica (ver escritura_segura.escribir_atomico)
+           con dónde termina el archivo de archivo ('archivando'), los desalojados
+           ('archivar') y los registros vigentes.
+        2. Se agregan los desalojados al archivo de archivo.
+        3. Se agrega al archivo la confirmación ('archivado').
+
+        Si al cargar el archivo falta la confirmación, el lote se vuelve a archivar en la
+        próxima compactación desde la posición guardada, descartando lo que se haya
+        llegado a escribir después (ver archivar).
+
+        Parámetros:
+        - corte (CorteRegistros): Un corte con los registros vigentes.
+        - filename (str): El nombre del archivo de registros.
+
+        Retorna:
+        - None
+        """
+        lineas = []
+        if corte.desalojados:
+            if self.posicion_archivo is None:
+                self.posicion_archivo = self._fin_archivo(filename)
+            numero, tamano = self.posicion_archivo
+            lineas.append(dumps({'tipo': 'archivando', 'numero': numero, 'tamano': tamano}) + '\n')
+            lineas.extend(self._linea('archivar', registro, tipo) for tipo, registro in corte.desalojados)
+        lineas.extend(self._linea(tipo, registro) for tipo, registro in corte.vigentes)
+        escribir_atomico(filename, ''.join(lineas).encode('utf-8'))
+        if not corte.desalojados:
+            return
+
+        self.archivar(filename, corte.desalojados)
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(dumps({'tipo': 'archivado'}) + '\n')
+            f.flush()
+            fsync(f.fileno())
+        self.posicion_archivo = None
+        self._borrar_antiguos(filename)
+
+    def compactar_registros(self, filename: str) -> None:
+        """
+        Reescribe el archivo de registros con solo los registros vigentes, en orden cronológico.
+
+        Descarta las líneas de errores eliminados con 'clear log' y pasa los registros que
+        salieron del historial a los archivos de archivo.
+
+        Parámetros:
+        - filename (str): El nombre del archivo de registros.
+
+        Retorna:
+        - None
+        """
+        self.requiere_compactar = True
+        self.guardar_registros(filename)
+
+    def cargar_registros(self, filename: str) -> None:
+        """
+        Carga los registros leyendo el archivo línea por línea.
+
+        Si el archivo no existe pero existe uno con el formato anterior (un único JSON
+        con las listas 'errores' y 'operaciones'), se carga ese y se migra al nuevo
+        formato en el próximo guardado. Lo mismo con las líneas que guardan el registro
+        como texto ('texto') en lugar de sus campos. Un lote de desalojados sin confirmar
+        (ver _compactar) vuelve a quedar para archivar.
+
+        Parámetros:
+        - filename (str): El nombre del archivo desde donde se cargarán los registros.
+
+        Retorna:
+        - None
+        """
+        try:
+            f = open(filename, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            filename_anterior = splitext(filename)[0] + '.json'
+            if filename_anterior == filename or not exists(filename_anterior):
+                raise
+            self._cargar_formato_anterior(filename_anterior)
+            return
+
+        lote = 0  # Desalojados del lote sin confirmar (ver _compactar)
+        with f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    registro = loads(linea)
+                except ValueError:
+                    # Línea incompleta por una escritura interrumpida
+                    self.requiere_compactar = True
+                    continue
+
+                tipo = registro['tipo']
+                if tipo in ('error', 'operacion'):
+                    if 'texto' in registro:
+                        registro = RegistroComando.from_texto(registro['texto'], tipo == 'error')
+                        self.requiere_compactar = True
+                    else:
+                        registro = RegistroComando.from_dict(registro)
+                    # Si el archivo tiene más registros que la capacidad, los más
+                    # antiguos se pasan al archivo de archivo al compactar
+                    self._apilar(tipo, registro)
+                elif tipo == 'eliminar_error' and self.errores.quitar_ultimo() is not None:
+                    self.cantidad_registros -= 1
+                    self.lineas_descartables += 2
+                elif tipo == 'archivando':
+                    self.posicion_archivo = (registro['numero'], registro['tamano'])
+                elif tipo == 'archivar':
+                    # Van antes que los vigentes, así quedan primeros en los desalojados
+                    self.desalojados.append((registro.pop('historial'), RegistroComando.from_dict(registro)))
+                    lote += 1
+                elif tipo == 'archivado':
+                    del self.desalojados[:lote]
+                    lote = 0
+                    self.posicion_archivo = None
+
+        if self.posicion_archivo is not None:
+            self.requiere_compactar = True  # Para terminar de archivar el lote
+
+        # Compactar cuando el archivo tiene más líneas descartables que vigentes
+        if self.lineas_descartables > self.cantidad_registros:
+            self.requiere_compactar = True
+
+    def archivar(self, filename: str, desalojados: list[tuple[str, RegistroComando]]) -> None:
+        """
+        Agrega registros que salieron del historial al archivo de archivo, desde la
+        posición guardada en posicion_archivo, rotándolo cuando supera el tamaño máximo.
+
+        Lo que haya después de esa posición es lo que llegó a escribirse de un lote
+        interrumpido (ver _compactar), que se descarta antes de volver a escribirlo.
+
+        Parámetros:
+        - filename (str): El nombre del archivo de registros.
+        - desalojados (list[tuple[str, RegistroComando]]): Los registros, (tipo, registro).
+
+        Retorna:
+        - None
+        """
+        base = splitext(filename)[0]
+        numero, tamano = self.posicion_archivo
+        for posterior in self._numeros_archivo(base):
+            if posterior > numero:
+                remove(f'{base}.{posterior}.jsonl')
+        filename_archivo = f'{base}.{numero}.jsonl'
+        if exists(filename_archivo) and getsize(filename_archivo) > tamano:
+            with open(filename_archivo, 'r+b') as f:
+                f.truncate(tamano)
+
+        pendientes = iter(desalojados)
+        registro = next(pendientes, None)
+        while registro is not None:
+            with open(f'{base}.{numero}.jsonl', 'a', encoding='utf-8') as f:
+                tamano = f.tell()
+                while registro is not None and tamano < self.tamano_archivo:
+                    linea = self._linea(*registro)
+                    tamano += len(linea.encode('utf-8'))
+                    f.write(linea)
+                    registro = next(pendientes, None)
+                f.flush()
+                fsync(f.fileno())
+            if tamano >= self.tamano_archivo:
+                numero += 1
+        # Los archivos de archivo nuevos tienen que existir antes de confirmar el lote
+        sincronizar_directorio(dirname(filename))
+
+    def _borrar_antiguos(self, filename: str) -> None:
+        """
+        Borra los archivos de archivo más antiguos, dejando los 'max_archivos' más recientes.
+
+        Parámetros:
+        - filename (str): El nombre del archivo de registros.
+
+        Retorna:
+        - None
+        """
+        base = splitext(filename)[0]
+        numeros = self._numeros_archivo(base)
+        for antiguo in numeros[:len(numeros) - self.max_archivos]:
+            if exists(f'{base}.{antiguo}.jsonl'):
+                remove(f'{base}.{antiguo}.jsonl')
+
+    def _fin_archivo(self, filename: str) -> tuple[int, int]:
+        """
+        Dónde termina el archivo de archivo actual (el de número más alto).
+
+        Parámetros:
+        - filename (str): El nombre del archivo de registros.
+
+        Retorna:
+        - tuple[int, int]: El número del archivo y su tamaño en bytes (0 si no existe).
+        """
+        base = splitext(filename)[0]
+        numero = (self._numeros_archivo(base) or [1])[-1]
+        filename_archivo = f'{base}.{numero}.jsonl'
+        return numero, getsize(filename_archivo) if exists(filename_archivo) else 0
+
+    @staticmethod
+    def _numeros_archivo(base: str) -> list[int]:
+        """
+        Los números de los archivos de archivo que existen, de menor a mayor.
+
+        Parámetros:
+        - base (str): El nombre del archivo de registros sin la extensión.
+
+        Retorna:
+        - list[int]: Los números.
+        """
+        return sorted(
+            int(coincidencia.group(1)) for coincidencia in
+            (match(escape(base) + r'\.(\d+)\.jsonl$', ruta) for ruta in glob(escape_glob(base) + '.*.jsonl'))
+            if coincidencia)
+
+    def _cargar_formato_anterior(self, filename: str) -> None:
+        """
+        Carga los registros desde un archivo con el formato anterior.
+
+        Las listas están guardadas desde el más reciente al más antiguo, así que se
+        apilan al revés para que el más reciente quede en el tope.
+
+        Parámetros:
+        - filename (str): El nombre del archivo JSON con el formato anterior.
+
+        Retorna:
+        - None
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            registros = load(f)
+        for error in reversed(registros['errores']):
+            self._apilar('error', RegistroComando.from_texto(error, True))
+        for operacion in reversed(registros['operaciones']):
+            self._apilar('operacion', RegistroComando.from_texto(operacion, False))
+        self.requiere_compactar = True
@@ -0,0 +1,184 @@
+from carpeta import Carpeta
+from collections import OrderedDict
+from typing import Optional
+
+
+class _Entrada:
+    """
+    Un nodo del árbol de la caché (ver ResolutorRutas): una ruta, con su carpeta si
+    está guardada o None si solo está porque hay rutas guardadas debajo.
+    """
+    __slots__ = ('nombre', 'carpeta', 'padre', 'hijos')
+
+    def __init__(self, nombre: Optional[str], padre: Optional['_Entrada']) -> None:
+        """
+        Constructor de la clase _Entrada.
+
+        Parámetros:
+        - nombre (str | None): El nombre de la última carpeta de la ruta (None en la raíz).
+        - padre (_Entrada | None): La entrada de la ruta sin su última carpeta.
+        """
+        self.nombre = nombre
+        self.carpeta: Optional[Carpeta] = None
+        self.padre = padre
+        self.hijos: dict[str, _Entrada] = {}
+
+
+class ResolutorRutas:
+    """
+    Resuelve rutas absolutas de una unidad a su Carpeta, con una caché LRU acotada.
+
+    Las rutas guardadas forman un árbol, igual que las carpetas: cada entrada tiene las
+    de sus subcarpetas por nombre. Al resolver una ruta se baja por el árbol hasta la
+    carpeta guardada más profunda de la ruta, O(profundidad), se sigue desde ella con
+    buscar_carpeta, y cada carpeta recorrida queda guardada. Invalidar una ruta quita
+    su rama del árbol sin recorrer el resto de la caché.
+    """
+
+    def __init__(self, unidad: Carpeta, capacidad: int = 1024) -> None:
+        """
+        Constructor de la clase ResolutorRutas.
+
+        Parámetros:
+        - unidad (Carpeta): La raíz de la unidad.
+        - capacidad (int): La cantidad máxima de rutas guardadas en la caché.
+        """
+        self.unidad = unidad
+        self.capacidad = capacidad
+        self.raiz = _Entrada(None, None)
+        # Entradas con su carpeta guardada, de la menos a la más usada recientemente
+        self.cache: OrderedDict[_Entrada, None] = OrderedDict()
+
+    def resolver(self, partes: list[str]) -> Carpeta:
+        """
+        Obtiene la carpeta de una ruta absoluta.
+
+        Parámetros:
+        - partes (list[str]): Los nombres de las carpetas desde la raíz.
+
+        Retorna:
+        - Carpeta: La carpeta de la ruta.
+
+        Lanza:
+        - ValueError: Si alguna carpeta de la ruta no existe.
+        """
+        # Bajar por la caché hasta la carpeta guardada más profunda de la ruta
+        nodo, resueltas, guardada = self.unidad, 0, self.raiz
+        entrada = self.raiz
+        for i, nombre in enumerate(partes):
+            entrada = entrada.hijos.get(nombre)
+            if entrada is None:
+                break
+            if entrada.carpeta is not None:
+                nodo, resueltas, guardada = entrada.carpeta, i + 1, entrada
+        if resueltas == len(partes):
+            if guardada is not self.raiz:
+                self.cache.move_to_end(guardada)
+            return nodo
+
+        entrada = guardada
+        for i in range(resueltas, len(partes)):
+            nodo = nodo.buscar_carpeta(partes[i])
+            if not nodo:
+                raise ValueError("La ruta especificada no existe.")
+            entrada = self._guardar(entrada, partes[i], nodo)
+        return nodo
+
+    def recordar(self, partes, nodo: Carpeta) -> None:
+        """
+        Guarda en la caché la carpeta de una ruta, descartando la menos usada si no hay lugar.
+
+        Parámetros:
+        - partes (list[str] | tuple): Los nombres de las carpetas desde la raíz.
+        - nodo (Carpeta): La carpeta de la ruta.
+
+        Retorna:
+        - None
+        """
+        if not partes:
+            return
+        entrada = self.raiz
+        for nombre in partes[:-1]:
+            entrada = self._hijo(entrada, nombre)
+        self._guardar(entrada, partes[-1], nodo)
+
+    def invalidar(self, partes: list[str]) -> None:
+        """
+        Quita de la caché una ruta y todas las rutas que están debajo de ella:
+        O(profundidad + rutas guardadas debajo).
+
+        Debe llamarse al eliminar, renombrar o mover una carpeta.
+
+        Parámetros:
+        - partes (list[str]): Los nombres de las carpetas desde la raíz.
+
+        Retorna:
+        - None
+        """
+        if not partes:
+            self.raiz.hijos.clear()
+            self.cache.clear()
+            return
+        entrada = self.raiz
+        for nombre in partes:
+            entrada = entrada.hijos.get(nombre)
+            if entrada is None:
+                return
+
+        del entrada.padre.hijos[entrada.nombre]
+        self._podar(entrada.padre)
+        pendientes = [entrada]
+        while pendientes:
+            entrada = pendientes.pop()
+            self.cache.pop(entrada, None)
+            pendientes.extend(entrada.hijos.values())
+
+    @staticmethod
+    def _hijo(entrada: _Entrada, nombre: str) -> _Entrada:
+        """
+        La entrada de una subcarpeta, creándola vacía si no existe.
+        """
+        hijo = entrada.hijos.get(nombre)
+        if hijo is None:
+            hijo = entrada.hijos[nombre] = _Entrada(nombre, entrada)
+        return hijo
+
+    def _guardar(self, padre: _Entrada, nombre: str, nodo: Carpeta) -> _Entrada:
+        """
+        Guarda la carpeta de una subcarpeta de una entrada como la más usada, y descarta
+        la menos usada si no hay lugar.
+
+        Parámetros:
+        - padre (_Entrada): La entrada de la carpeta que la contiene.
+        - nombre (str): El nombre de la subcarpeta.
+        - nodo (Carpeta): La subcarpeta.
+
+        Retorna:
+        - _Entrada: La entrada de la subcarpeta.
+        """
+        entrada = self._hijo(padre, nombre)
+        entrada.carpeta = nodo
+        self.cache[entrada] = None
+        self.cache.move_to_end(entrada)
+        if len(self.cache) > self.capacidad:
+            descartada = self.cache.popitem(last=False)[0]
+            descartada.carpeta = None
+            self._podar(descartada)
+        return entrada
+
+    def _podar(self, entrada: _Entrada) -> None:
+        """
+        Quita del árbol una entrada sin carpeta ni hijos y, de la misma forma, las de su
+        ruta hacia la raíz que queden así.
+
+        Parámetros:
+        - entrada (_Entrada): La entrada.
+
+        Retorna:
+        - None
+        """
+        while entrada is not self.raiz and entrada.carpeta is None and not entrada.hijos:
+            padre = entrada.padre
+            if padre.hijos.get(entrada.nombre) is entrada:
+                del padre.hijos[entrada.nombre]
+            entrada = padre
@@ -0,0 +1,173 @@
+from carpeta import Carpeta
+from collections import deque
+from escritura_segura import PREFIJO, escribir_atomico, verificar
+from fecha import formatear_fecha, marca_actual
+from re import escape, match
+import json
+import os
+
+# Prefijo de la línea con los datos de un respaldo que se muestran al listarlo
+PREFIJO_DATOS = b'#respaldo '
+
+
+class Respaldos:
+    """
+    Respaldos de las carpetas eliminadas con rmdir.
+
+    Cada respaldo guarda solo la carpeta eliminada (con todo su contenido) y la ruta
+    de su carpeta padre, en un archivo propio numerado con una versión creciente:
+    '<versión> Eliminación de carpeta '<nombre>' en Unidad <letra>.json'. Cuando hay
+    más respaldos que el máximo configurado se eliminan los más antiguos.
+
+    Después de la cabecera con la suma de verificación (ver escritura_segura), cada
+    archivo tiene una línea '#respaldo {"ruta": ..., "fecha": ..., "nombre": ...}' y
+    luego el JSON completo. Así listar lee solo esa línea de cada respaldo, sin
+    analizar las carpetas guardadas.
+    """
+
+    def __init__(self, ruta: str, unidad: str, maximo: int = 100) -> None:
+        """
+        Constructor de la clase Respaldos.
+
+        Parámetros:
+        - ruta (str): La carpeta donde se guardan los respaldos.
+        - unidad (str): El nombre de la unidad (por ejemplo 'C:').
+        - maximo (int): La cantidad máxima de respaldos que se conservan.
+        """
+        self.ruta = ruta
+        self.unidad = unidad
+        self.maximo = maximo
+        # Versiones existentes, de la más antigua a la más reciente, con su archivo
+        self.versiones: deque[tuple[int, str]] = deque()
+
+        os.makedirs(ruta, exist_ok=True)
+        # Cada unidad tiene su propia numeración dentro de la misma carpeta
+        patron = rf"^(\d+) Eliminación de carpeta '.*' en Unidad {escape(unidad[:-1])}\.json$"
+        existentes = []
+        for nombre in os.listdir(ruta):
+            coincidencia = match(patron, nombre)
+            if coincidencia:
+                existentes.append((int(coincidencia.group(1)), nombre))
+        self.versiones.extend(sorted(existentes))
+
+    def respaldar(self, carpeta: Carpeta, ruta_padre: list[str]) -> int:
+        """
+        Guarda una carpeta que se va a eliminar y aplica la política de retención.
+
+        Parámetros:
+        - carpeta (Carpeta): La carpeta a respaldar.
+        - ruta_padre (list[str]): Los nombres de las carpetas desde la raíz hasta su padre.
+
+        Retorna:
+        - int: La versión del respaldo creado.
+        """
+        version = self.versiones[-1][0] + 1 if self.versiones else 1
+        nombre = f"{version} Eliminación de carpeta '{carpeta.nombre}' en Unidad {self.unidad[:-1]}.json"
+
+        fecha = marca_actual()
+        datos = json.dumps({'ruta': ruta_padre, 'fecha': fecha, 'nombre': carpeta.nombre}).encode('utf-8')
+        cuerpo = json.dumps({'ruta': ruta_padre, 'fecha': fecha, 'carpeta': carpeta.to_dict()}, indent=4)
+        escribir_atomico(os.path.join(self.ruta, nombre),
+                         PREFIJO_DATOS + datos + b'\n' + cuerpo.encode('utf-8'), suma=True)
+        self.versiones.append((version, nombre))
+
+        while len(self.versiones) > self.maximo:
+            _, antiguo = self.versiones.popleft()
+            try:
+                os.remove(os.path.join(self.ruta, antiguo))
+            except FileNotFoundError:
+                pass
+        return version
+
+    def cargar(self, version: int) -> tuple[Carpeta, list[str]]:
+        """
+        Carga un respaldo.
+
+        Parámetros:
+        - version (int): La versión del respaldo.
+
+        Retorna:
+        - tuple[Carpeta, list[str]]: La carpeta respaldada y la ruta de su carpeta padre.
+
+        Lanza:
+        - ValueError: Si no existe un respaldo con esa versión.
+        """
+        data = self.leer(version)
+        return Carpeta.from_dict(data['carpeta']), data['ruta']
+
+    def leer(self, version: int) -> dict:
+        """
+        Lee el archivo de un respaldo sin crear sus carpetas.
+
+        Parámetros:
+        - version (int): La versión del respaldo.
+
+        Retorna:
+        - dict: El respaldo, con las claves 'ruta', 'fecha' y 'carpeta'.
+
+        Lanza:
+        - ValueError: Si no existe un respaldo con esa versión.
+        """
+        filename = self._filename(version)
+        with open(filename, 'rb') as f:
+            datos = f.read()
+        inicio = verificar(datos, filename)
+        if datos.startswith(PREFIJO_DATOS, inicio):
+            inicio = datos.index(b'\n', inicio) + 1
+        return json.loads(datos[inicio:])
+
+    def leer_datos(self, version: int) -> dict:
+        """
+        Lee solo los datos de un respaldo que se muestran al listarlo, sin leer la
+        carpeta guardada (salvo en los respaldos de antes, que no tienen esa línea).
+
+        Parámetros:
+        - version (int): La versión del respaldo.
+
+        Retorna:
+        - dict: Los datos, con las claves 'ruta', 'fecha' y 'nombre' (de la carpeta).
+
+        Lanza:
+        - ValueError: Si no existe un respaldo con esa versión.
+        """
+        with open(self._filename(version), 'rb') as f:
+            linea = f.readline()
+            if linea.startswith(PREFIJO):
+                linea = f.readline()
+        if linea.startswith(PREFIJO_DATOS):
+            return json.loads(linea[len(PREFIJO_DATOS):])
+        data = self.leer(version)
+        return {'ruta': data['ruta'], 'fecha': data['fecha'], 'nombre': data['carpeta']['nombre']}
+
+    def _filename(self, version: int) -> str:
+        """
+        Obtiene el archivo de un respaldo.
+
+        Parámetros:
+        - version (int): La versión del respaldo.
+
+        Retorna:
+        - str: La ruta del archivo.
+
+        Lanza:
+        - ValueError: Si no existe un respaldo con esa versión.
+        """
+        for numero, nombre in self.versiones:
+            if numero == version:
+                return os.path.join(self.ruta, nombre)
+        raise ValueError(f"No existe el respaldo {version}.")
+
+    def listar(self) -> list[str]:
+        """
+        Describe los respaldos disponibles, del más reciente al más antiguo. De cada
+        respaldo se lee solo su línea de datos (ver leer_datos).
+
+        Retorna:
+        - list[str]: Una línea por respaldo con su versión, fecha, carpeta y ruta original.
+        """
+        lineas = []
+        for version, nombre in reversed(self.versiones):
+            datos = self.leer_datos(version)
+            ruta = '\\'.join([self.unidad] + datos['ruta'] + [datos['nombre']])
+            lineas.append(f"{version:>6}  {formatear_fecha(datos['fecha'])}  {ruta}")
+        return lineas
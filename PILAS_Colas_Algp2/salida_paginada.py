@@ -0,0 +1,73 @@
+from typing import Callable, Optional, TextIO
+import sys
+
+
+class SalidaPaginada:
+    """
+    Escribe líneas en la salida estándar de a bloques: las líneas se juntan en una
+    lista y se escriben con una sola llamada cada 'bloque' líneas, así un listado muy
+    largo empieza a mostrarse enseguida sin armar todo el texto en memoria.
+
+    Con 'pagina', cada esa cantidad de líneas se detiene y espera a que el usuario
+    presione Enter (o 'q' para dejar de mostrar).
+    """
+
+    def __init__(self, pagina: Optional[int] = None, bloque: int = 1000,
+                 salida: Optional[TextIO] = None,
+                 preguntar: Callable[[str], str] = input) -> None:
+        """
+        Constructor de la clase SalidaPaginada.
+
+        Parámetros:
+        - pagina (int | None): Las líneas por página, o None para no paginar.
+        - bloque (int): La cantidad de líneas que se juntan antes de escribirlas.
+        - salida (TextIO | None): Dónde escribir (la salida estándar si es None).
+        - preguntar (Callable[[str], str]): La función que espera la respuesta del usuario
+          al final de cada página.
+        """
+        self.pagina = pagina
+        self.bloque = bloque if pagina is None else min(bloque, pagina)
+        self.salida = salida if salida is not None else sys.stdout
+        self.preguntar = preguntar
+        self._pendientes: list[str] = []
+        self._en_pagina = 0  # Líneas escritas en la página actual
+
+    def escribir(self, linea: str) -> bool:
+        """
+        Agrega una línea a la salida.
+
+        Parámetros:
+        - linea (str): La línea, sin salto de línea final.
+
+        Retorna:
+        - bool: False si el usuario pidió dejar de mostrar (no hay que escribir más).
+        """
+        self._pendientes.append(linea)
+        if len(self._pendientes) >= self.bloque:
+            self.vaciar()
+        if self.pagina is None:
+            return True
+
+        self._en_pagina += 1
+        if self._en_pagina < self.pagina:
+            return True
+        self.vaciar()
+        self._en_pagina = 0
+        try:
+            respuesta = self.preguntar("-- Presione Enter para continuar o 'q' para salir --")
+        except EOFError:
+            return False
+        return respuesta.strip().lower() != 'q'
+
+    def vaciar(self) -> None:
+        """
+        Escribe las líneas pendientes.
+
+        Retorna:
+        - None
+        """
+        if self._pendientes:
+            self._pendientes.append('')  # Salto de línea después de la última
+            self.salida.write('\n'.join(self._pendientes))
+            self._pendientes.clear()
+        self.salida.flush()
@@ -0,0 +1,819 @@
+from almacen_contenidos import AlmacenContenidos
+from archivo import Archivo
+from carpeta import Carpeta, Resumen
+from collections import OrderedDict
+from fecha import marca_actual
+from functools import partial
+from indice_contenidos import palabras
+from metricas import Metricas
+from pila import Pila
+from re import match
+from typing import Callable, Iterator, NamedTuple, Optional
+from unidad import Unidad
+import os
+
+
+class Resultado(NamedTuple):
+    """
+    Resultado de una operación que modifica la unidad.
+    """
+    nombre: str  # Nombre de la carpeta o archivo afectado
+    ruta: str  # Ruta de la carpeta que lo contiene (por ejemplo C:\carpeta1)
+    respaldo: Optional[int] = None  # Versión del respaldo creado (solo rmdir)
+
+
+class Entrada(NamedTuple):
+    """
+    Una carpeta o archivo dentro de un listado de dir.
+    """
+    es_carpeta: bool
+    nombre: str
+    marca_tiempo: Optional[int]
+    tamano: Optional[int]  # Tamaño en bytes (en carpetas, el total de su contenido)
+
+
+class Listado(NamedTuple):
+    """
+    Resultado de dir: la ruta listada y su contenido, primero las carpetas y después
+    los archivos. Las entradas se generan a medida que se recorren.
+    """
+    ruta: str
+    entradas: Iterator[Entrada]
+
+
+class Rama(NamedTuple):
+    """
+    Una carpeta o archivo dentro del árbol de tree.
+    """
+    profundidad: int  # 1 para el contenido directo de la carpeta listada
+    es_carpeta: bool
+    nombre: str
+    ultimo: bool  # Si es el último de su carpeta (define cómo se dibujan las líneas)
+
+
+class Arbol(NamedTuple):
+    """
+    Resultado de tree: la ruta listada y su contenido en preorden. Las ramas se
+    generan a medida que se recorren.
+    """
+    ruta: str
+    ramas: Iterator[Rama]
+
+
+# Claves para ordenar un listado de dir (ver SistemaArchivos.dir): por nombre, tamaño y fecha
+CLAVES_ORDEN = {
+    'n': lambda entrada: entrada.nombre.casefold(),
+    's': lambda entrada: entrada.tamano or 0,
+    'd': lambda entrada: (entrada.marca_tiempo is not None, entrada.marca_tiempo or 0),
+}
+
+
+class Uso(NamedTuple):
+    """
+    Los totales de una carpeta, para du.
+    """
+    ruta: str
+    resumen: Resumen
+
+
+class Coincidencia(NamedTuple):
+    """
+    Un archivo o carpeta encontrado con find.
+    """
+    ruta: str  # Ruta absoluta (por ejemplo C:\carpeta1\archivo.txt)
+    es_carpeta: bool
+
+
+class CoincidenciaTexto(NamedTuple):
+    """
+    Un archivo encontrado con grep.
+    """
+    ruta: str  # Ruta absoluta del archivo
+    lineas: list[tuple[int, str]]  # (número, texto) de las líneas con todas las palabras
+
+
+class SistemaArchivos:
+    """
+    Motor de las unidades: carga, persistencia y los comandos cd, mkdir, type, rmdir,
+    restore, dir, du, find y grep, sin leer ni escribir en la consola.
+
+    Los comandos devuelven resultados estructurados y lanzan ValueError ante un uso
+    inválido. Las rutas absolutas indican su unidad (C:/carpeta, D:/carpeta) y las
+    relativas se resuelven en la unidad actual. Cada unidad se monta al usarse por
+    primera vez; si la memoria estimada de las unidades montadas supera el máximo
+    configurado se desmontan las usadas hace más tiempo. Debe cerrarse con cerrar.
+
+    Los comandos informan a 'metricas' el tiempo de resolver la ruta (incluido montar
+    la unidad) y el de persistir la operación (bitácora y respaldos).
+    """
+
+    def __init__(self, unidad: str, configuracion: dict, metricas: Optional[Metricas] = None) -> None:
+        """
+        Constructor de la clase SistemaArchivos. No accede al disco.
+
+        Parámetros:
+        - unidad (str): El nombre de la unidad inicial (por ejemplo 'C:').
+        - configuracion (dict): La configuración cargada de config.json.
+        - metricas (Metricas | None): Dónde se miden los tiempos de los comandos (ninguno si es None).
+        """
+        self.configuracion = configuracion
+        self.metricas = metricas if metricas is not None else Metricas(activa=False)
+        self.memoria_maxima = configuracion.get('memoria_maxima_unidades_mb', 1024) * 1024 * 1024
+
+        # Los contenidos de los archivos se guardan aparte, en un almacén por hash
+        # compartido por todas las unidades del motor
+        self.almacen: Optional[AlmacenContenidos] = None
+        if 'ruta_contenidos' in configuracion:
+            self.almacen = AlmacenContenidos(configuracion['ruta_contenidos'])
+
+        # Unidades configuradas, de la usada hace más tiempo a la más reciente
+        self.unidades: OrderedDict[str, Unidad] = OrderedDict()
+        for i, datos in enumerate(configuracion['unidades']):
+            nombre = datos.get('nombre', f"{chr(ord('C') + i)}:").upper()
+            self.unidades[nombre] = Unidad(
+                nombre, configuracion['ruta_unidades'] + '/' + datos['nombre_archivo'],
+                configuracion, self.almacen)
+
+        if unidad.upper() not in self.unidades:
+            raise ValueError(f"La unidad {unidad} no está configurada.")
+        self.actual: Unidad = self.unidades[unidad.upper()]
+        self._diferido = False  # Ver diferir
+
+    @property
+    def nombre_unidad(self) -> str:
+        """
+        El nombre de la unidad actual.
+        """
+        return self.actual.nombre
+
+    @property
+    def filename_unidad(self) -> str:
+        """
+        El archivo de la unidad actual.
+        """
+        return self.actual.filename
+
+    @property
+    def ruta_actual(self) -> str:
+        """
+        La ruta actual de la unidad actual (La que se mostrará en consola).
+        """
+        return self.actual.ruta_actual
+
+    def abrir(self) -> bool:
+        """
+        Monta la unidad actual.
+
+        Retorna:
+        - bool: False si la unidad actual no existía y se creó, True en caso contrario.
+        """
+        return self.montar(self.actual)
+
+    def cerrar(self) -> None:
+        """
+        Desmonta todas las unidades. Los comandos posteriores vuelven a montarlas.
+
+        Retorna:
+        - None
+        """
+        for unidad in self.unidades.values():
+            unidad.desmontar()
+
+    def montar(self, unidad: Unidad) -> bool:
+        """
+        Monta una unidad si hace falta, la marca como la usada más recientemente y
+        desmonta otras unidades si se superó la memoria máxima.
+
+        Parámetros:
+        - unidad (Unidad): La unidad a montar.
+
+        Retorna:
+        - bool: False si la unidad no existía y se creó, True en caso contrario.
+        """
+        self.unidades.move_to_end(unidad.nombre)
+        if unidad.montada:
+            return True
+
+        existia = unidad.montar()
+        unidad.bitacora.diferida = self._diferido
+
+        memoria = sum(otra.memoria_estimada() for otra in self.unidades.values())
+        for otra in list(self.unidades.values()):
+            if memoria <= self.memoria_maxima:
+                break
+            if otra.montada and otra is not unidad and otra is not self.actual:
+                memoria -= otra.memoria_estimada()
+                otra.desmontar()
+        return existia
+
+    def cambiar_unidad(self, nombre: str) -> str:
+        """
+        Cambia la unidad actual, montándola si hace falta.
+
+        Parámetros:
+        - nombre (str): El nombre de la unidad (por ejemplo 'D:').
+
+        Retorna:
+        - str: La ruta actual de la nueva unidad.
+        """
+        self.abrir()
+        unidad = self.obtener_unidad(nombre)
+        self.montar(unidad)
+        self.actual = unidad
+        return unidad.ruta_actual
+
+    def obtener_unidad(self, nombre: str) -> Unidad:
+        """
+        Obtiene una unidad configurada por su nombre.
+
+        Parámetros:
+        - nombre (str): El nombre de la unidad (por ejemplo 'd:' o 'D:').
+
+        Retorna:
+        - Unidad: La unidad, sin montarla.
+
+        Lanza:
+        - ValueError: Si la unidad no está configurada.
+        """
+        unidad = self.unidades.get(nombre.upper())
+        if unidad is None:
+            raise ValueError(f"La unidad {nombre} no existe.")
+        return unidad
+
+    def diferir(self, activo: bool) -> None:
+        """
+        Activa o desactiva el modo diferido: las operaciones y los contenidos no se
+        sincronizan con el disco uno por uno ni se hacen puntos de control, hasta
+        llamar a sincronizar o guardar.
+
+        Parámetros:
+        - activo (bool): True para activar el modo diferido.
+
+        Retorna:
+        - None
+        """
+        self.abrir()
+        self._diferido = activo
+        for unidad in self.unidades.values():
+            if unidad.montada:
+                unidad.bitacora.diferida = activo
+        if self.almacen is not None:
+            self.almacen.diferido = activo
+
+    def sincronizar(self) -> None:
+        """
+        Escribe en el disco los contenidos y las operaciones registradas en modo diferido,
+        en ese orden, para que la bitácora nunca referencie un contenido que no esté guardado.
+
+        Retorna:
+        - None
+        """
+        if self.almacen is not None:
+            self.almacen.sincronizar()
+        for unidad in self.unidades.values():
+            if unidad.montada:
+                unidad.bitacora.sincronizar()
+
+    def tomar_corte(self) -> Callable[[], None]:
+        """
+        Toma un corte de lo registrado en modo diferido y devuelve la función que lo
+        guarda. Se llama con el candado del escritor en segundo plano, y por eso solo
+        hace lo barato: toma los contenidos pendientes, vacía los búferes de las
+        bitácoras y sella las que alcanzaron su intervalo, con una instantánea de cada
+        una (ver Bitacora.sellar). La función devuelta, que se llama sin el candado,
+        sincroniza todo con el disco (los contenidos primero, ver sincronizar) y escribe
+        los puntos de control.
+
+        Retorna:
+        - Callable[[], None]: La función que guarda el corte.
+        """
+        blobs = self.almacen.tomar_pendientes() if self.almacen is not None else []
+        descriptores = []
+        cortes = []
+        for unidad in self.unidades.values():
+            if unidad.montada:
+                descriptor = unidad.bitacora.preparar_sincronizacion()
+                if descriptor is not None:
+                    descriptores.append(descriptor)
+                corte = unidad.bitacora.sellar(unidad.raiz)
+                if corte is not None:
+                    cortes.append((unidad.bitacora, corte))
+        return partial(self._guardar_corte, blobs, descriptores, cortes)
+
+    def _guardar_corte(self, blobs: list[str], descriptores: list[int], cortes: list[tuple]) -> None:
+        """
+        Guarda un corte tomado con tomar_corte.
+
+        Parámetros:
+        - blobs (list[str]): Los contenidos a sincronizar.
+        - descriptores (list[int]): Los descriptores de las bitácoras a sincronizar (se cierran).
+        - cortes (list[tuple]): Las bitácoras selladas, con su corte.
+
+        Retorna:
+        - None
+        """
+        try:
+            try:
+                if blobs:
+                    self.almacen.sincronizar(blobs)
+                for descriptor in descriptores:
+                    os.fsync(descriptor)
+            finally:
+                for descriptor in descriptores:
+                    os.close(descriptor)
+            for bitacora, corte in cortes:
+                bitacora.guardar_corte(corte)
+        finally:
+            for bitacora, _ in cortes:
+                bitacora.soltar_corte()
+
+    def guardar(self) -> None:
+        """
+        Guarda completas (punto de control) las unidades montadas y vacía sus bitácoras.
+
+        Retorna:
+        - None
+        """
+        self.abrir()
+        self.sincronizar()
+        for unidad in self.unidades.values():
+            if unidad.montada:
+                unidad.bitacora.checkpoint(unidad.raiz)
+
+    def type(self, ruta: str, contenido: str) -> Resultado:
+        """
+        Método que crea un nuevo archivo con el contenido especificado en la ruta especificada.
+
+        Parámetros:
+        - ruta (str): La ruta donde se creará el nuevo archivo.
+        - contenido (str): El contenido del archivo a crear.
+
+        Retorna:
+        - Resultado: El nombre del archivo y la ruta de la carpeta donde se creó.
+        """
+        campos = ruta.split("/")
+        nombre_archivo = campos[-1].strip()
+
+        unidad, nodo, partes = self.resolver_ruta('/'.join(campos[:-1]))
+
+        if nombre_archivo[-4:] != ".txt":
+            raise ValueError(
+                "El nombre del archivo no posee la extensión '.txt'.")
+
+        nombre_sin_extension = nombre_archivo[:-4]
+
+        if not nombre_sin_extension:
+            raise ValueError("El nombre no puede quedar vacío.")
+
+        if not self.contiene_caracteres_validos(nombre_sin_extension):
+            raise ValueError(
+                "Nombre con caracteres inválidos. Caracteres permitidos: letras de la a-z y A-Z,espacios en blanco y números del 0 al 9.")
+
+        if nodo.buscar_archivo(nombre_archivo):
+            raise ValueError("Ya existe un archivo con ese mismo nombre.")
+
+        fecha = marca_actual()
+        nodo.crear_archivo(nombre_archivo, contenido, fecha, almacen=self.almacen)
+        archivo = nodo.buscar_archivo(nombre_archivo)
+        operacion = {'op': 'type', 'ruta': partes,
+                     'nombre': nombre_archivo, 'fecha': fecha}
+        if archivo.hash is not None:  # El contenido ya quedó en el almacén
+            operacion.update(hash=archivo.hash, tamano=archivo.tamano)
+        else:
+            operacion['contenido'] = contenido
+        with self.metricas.medir('persistir'):
+            unidad.bitacora.registrar(unidad.raiz, operacion)
+        return Resultado(nombre_archivo, unidad.ruta_mostrada(partes))
+
+    def mkdir(self, ruta: str) -> Resultado:
+        """
+        Método que crea una nueva carpeta en la ruta especificada.
+
+        Parámetros:
+        - ruta (str): La ruta donde se creará la nueva carpeta.
+
+        Retorna:
+        - Resultado: El nombre de la carpeta y la ruta de la carpeta donde se creó.
+        """
+        campos = ruta.split("/")
+        nombre_carpeta = campos[-1].strip()
+        unidad, nodo, partes = self.resolver_ruta('/'.join(campos[:-1]))
+
+        if not nombre_carpeta:
+            raise ValueError("El nombre no puede quedar vacío.")
+
+        if not self.contiene_caracteres_validos(nombre_carpeta):
+            raise ValueError(
+                "Nombre con caracteres inválidos. Caracteres permitidos: letras de la a-z y A-Z,espacios en blanco y números del 0 al 9.")
+
+        if nodo.buscar_carpeta(nombre_carpeta):
+            raise ValueError("Ya existe una carpeta con ese mismo nombre.")
+
+        fecha = marca_actual()
+        nodo.crear_carpeta(nombre_carpeta, fecha)
+        with self.metricas.medir('persistir'):
+            unidad.bitacora.registrar(unidad.raiz, {
+                'op': 'mkdir', 'ruta': partes, 'nombre': nombre_carpeta, 'fecha': fecha})
+        return Resultado(nombre_carpeta, unidad.ruta_mostrada(partes))
+
+    def rmdir(self, ruta: str) -> Resultado:
+        """
+        Método que elimina una carpeta especificada por la ruta, guardando antes un respaldo.
+
+        Parámetros:
+        - ruta (str): La ruta de la carpeta a eliminar.
+
+        Retorna:
+        - Resultado: El nombre de la carpeta, la ruta de donde se eliminó y la versión
+          de su respaldo.
+        """
+        campos = ruta.split("/")
+        nombre_carpeta = campos[-1].strip()
+        unidad, nodo, partes = self.resolver_ruta('/'.join(campos[:-1]))
+
+        if not nombre_carpeta:
+            raise ValueError("El nombre no puede quedar vacío.")
+
+        if not self.contiene_caracteres_validos(nombre_carpeta):
+            raise ValueError(
+                "Nombre con caracteres inválidos. Caracteres permitidos: letras de la a-z y A-Z,espacios en blanco y números del 0 al 9.")
+
+        ruta_carpeta = unidad.ruta_mostrada(partes)
+
+        carpeta_eliminada = nodo.buscar_carpeta(nombre_carpeta)
+        if not carpeta_eliminada:
+            raise ValueError(
+                f"No se pudo encontrar la carpeta '{nombre_carpeta}' en {ruta_carpeta}")
+
+        # Respaldamos la carpeta (no toda la unidad) antes de borrarla
+        with self.metricas.medir('persistir'):
+            version = unidad.respaldos.respaldar(carpeta_eliminada, partes)
+
+        nodo.eliminar_carpeta(nombre_carpeta)
+        unidad.resolutor.invalidar(partes + [nombre_carpeta])
+        unidad.salir_de_carpeta_eliminada(carpeta_eliminada)
+
+        with self.metricas.medir('persistir'):
+            unidad.bitacora.registrar(unidad.raiz, {
+                'op': 'rmdir', 'ruta': partes, 'nombre': nombre_carpeta}, carpeta_eliminada)
+        return Resultado(nombre_carpeta, ruta_carpeta, version)
+
+    def listar_respaldos(self) -> list[str]:
+        """
+        Describe los respaldos disponibles de la unidad actual, del más reciente al más antiguo.
+
+        Retorna:
+        - list[str]: Una línea por respaldo con su versión, fecha y ruta original.
+        """
+        self.abrir()
+        return self.actual.respaldos.listar()
+
+    def restore(self, version: int) -> Resultado:
+        """
+        Método que restaura una carpeta eliminada de la unidad actual desde su respaldo,
+        en su ruta original.
+
+        Parámetros:
+        - version (int): La versión del respaldo a restaurar.
+
+        Retorna:
+        - Resultado: El nombre de la carpeta y la ruta donde se restauró.
+        """
+        self.abrir()
+        unidad = self.actual
+        data = unidad.respaldos.leer(version)
+        partes = data['ruta']
+        nombre_carpeta = data['carpeta']['nombre']
+        with self.metricas.medir('resolver'):
+            nodo = unidad.resolutor.resolver(partes)
+
+        if nodo.buscar_carpeta(nombre_carpeta):
+            raise ValueError("Ya existe una carpeta con ese mismo nombre.")
+
+        nodo.agregar_carpeta(Carpeta.from_dict(data['carpeta'], self.almacen))
+        with self.metricas.medir('persistir'):
+            unidad.bitacora.registrar(unidad.raiz, {
+                'op': 'restore', 'ruta': partes, 'carpeta': data['carpeta']})
+        return Resultado(nombre_carpeta, unidad.ruta_mostrada(partes))
+
+    def find(self, patron: str) -> list[Coincidencia]:
+        """
+        Busca en toda la unidad actual los archivos y carpetas cuyo nombre coincide con
+        un patrón, usando el índice de nombres de la unidad (ver indice_nombres).
+
+        Parámetros:
+        - patron (str): Un nombre, o un patrón con comodines '*' y '?' (sin distinguir mayúsculas).
+
+        Retorna:
+        - list[Coincidencia]: Las coincidencias, ordenadas por ruta.
+
+        Lanza:
+        - ValueError: Si el índice de nombres está desactivado.
+        """
+        self.abrir()
+        unidad = self.actual
+        self.montar(unidad)
+        if unidad.bitacora.indice is None:
+            raise ValueError("La búsqueda está desactivada en la configuración (indice_nombres).")
+        with self.metricas.medir('resolver'):
+            ubicaciones = unidad.bitacora.indice.buscar(patron)
+        return [Coincidencia(unidad.ruta_mostrada(ubicacion.partes()), ubicacion.es_carpeta)
+                for ubicacion in ubicaciones]
+
+    def grep(self, texto: str, ruta: str = '') -> list[CoincidenciaTexto]:
+        """
+        Busca los archivos de una carpeta y sus subcarpetas que contienen todas las palabras
+        de un texto (palabras completas, sin distinguir mayúsculas), usando el índice de
+        contenidos de la unidad (ver indice_contenidos). Solo se leen los contenidos de los
+        archivos encontrados, para mostrar sus líneas.
+
+        Parámetros:
+        - texto (str): Las palabras a buscar.
+        - ruta (str): La carpeta donde buscar. Vacía para la carpeta actual.
+
+        Retorna:
+        - list[CoincidenciaTexto]: Los archivos encontrados que siguen en la unidad, ordenados por ruta.
+
+        Lanza:
+        - ValueError: Si el texto no tiene palabras o el índice de contenidos está desactivado.
+        """
+        buscadas = palabras(texto)
+        if not buscadas:
+            raise ValueError("El texto a buscar no tiene palabras.")
+        unidad, _, partes = self.resolver_ruta(ruta)
+        indice = unidad.bitacora.indice_contenidos
+        if indice is None:
+            raise ValueError("La búsqueda de contenidos está desactivada en la configuración (indice_contenidos).")
+        with self.metricas.medir('resolver'):
+            ubicaciones = indice.buscar(buscadas, '/'.join(partes))
+
+        coincidencias = []
+        for ubicacion in ubicaciones:
+            partes_archivo = ubicacion.partes()
+            # Una entrada del índice que ya no está en la unidad (índice desactualizado) se saltea
+            try:
+                archivo = unidad.resolutor.resolver(partes_archivo[:-1]).buscar_archivo(ubicacion.nombre)
+            except ValueError:
+                continue
+            if archivo is None:
+                continue
+            lineas = [(numero, linea) for numero, linea in enumerate(archivo.leer_contenido(self.almacen).splitlines(), 1)
+                      if buscadas <= palabras(linea)]
+            coincidencias.append(CoincidenciaTexto(unidad.ruta_mostrada(partes_archivo), lineas))
+        return coincidencias
+
+    def dir(self, ruta: str = '', orden: Optional[str] = None, atributo: Optional[str] = None,
+            recursivo: bool = False, profundidad: Optional[int] = None) -> Listado:
+        """
+        Método que obtiene el contenido de la carpeta en la ruta especificada.
+
+        Las entradas no se arman de antemano: se generan al recorrerlas, así una carpeta
+        enorme empieza a mostrarse enseguida y sin ocupar memoria extra. Solo al ordenar
+        hace falta juntarlas (de a un grupo: carpetas o archivos).
+
+        Parámetros:
+        - ruta (str): La ruta de la carpeta a listar. Vacía para la carpeta actual.
+        - orden (str | None): 'n', 's' o 'd' para ordenar por nombre, tamaño o fecha, con
+          '-' adelante para orden inverso; None para el orden en que fueron creadas.
+        - atributo (str | None): 'd' para listar solo las carpetas, '-d' solo los archivos.
+        - recursivo (bool): Si es True también se lista el contenido de las subcarpetas
+          (en preorden y con la ruta relativa a la carpeta listada como nombre).
+        - profundidad (int | None): Con recursivo, la cantidad máxima de niveles (1 lista
+          solo el contenido directo); None para no limitarla.
+
+        Retorna:
+        - Listado: La ruta absoluta de la carpeta y sus carpetas y archivos.
+
+        Lanza:
+        - ValueError: Si el orden, el atributo o la profundidad no son válidos, o si se
+          pide ordenar un listado recursivo.
+        """
+        if orden is not None and orden.lstrip('-') not in CLAVES_ORDEN:
+            raise ValueError(f"Orden inválido: '{orden}'. Valores posibles: n, s, d (con '-' para invertir).")
+        if atributo not in (None, 'd', '-d'):
+            raise ValueError(f"Atributo inválido: '{atributo}'. Valores posibles: d, -d.")
+        if recursivo and orden is not None:
+            raise ValueError("Un listado recursivo no se puede ordenar.")
+        self._validar_profundidad(profundidad)
+        unidad, nodo, partes = self.resolver_ruta(ruta)
+        if recursivo:
+            return Listado(unidad.ruta_mostrada(partes), self._entradas_recursivas(nodo, atributo, profundidad))
+        return Listado(unidad.ruta_mostrada(partes), self._entradas(nodo, orden, atributo))
+
+    @staticmethod
+    def _validar_profundidad(profundidad: Optional[int]) -> None:
+        """
+        Verifica una profundidad máxima de dir o tree.
+
+        Parámetros:
+        - profundidad (int | None): La profundidad, o None si no se limita.
+
+        Retorna:
+        - None
+
+        Lanza:
+        - ValueError: Si la profundidad no es mayor que 0.
+        """
+        if profundidad is not None and profundidad < 1:
+            raise ValueError(f"Profundidad inválida: '{profundidad}'. Debe ser mayor que 0.")
+
+    @staticmethod
+    def _entradas(nodo: Carpeta, orden: Optional[str], atributo: Optional[str]) -> Iterator[Entrada]:
+        """
+        Genera las entradas de dir: primero las carpetas y después los archivos.
+
+        Parámetros:
+        - nodo (Carpeta): La carpeta listada.
+        - orden (str | None): El orden (ver dir).
+        - atributo (str | None): El filtro (ver dir).
+
+        Retorna:
+        - Iterator[Entrada]: Las entradas.
+        """
+        grupos = []
+        if atributo != '-d':
+            # El tamaño de una subcarpeta son sus totales (ver Carpeta.resumen): O(1) también
+            # para las que siguen sin cargar, que los tienen guardados en el archivo
+            grupos.append(Entrada(True, carpeta.nombre, carpeta.marca_tiempo, carpeta.resumen().bytes)
+                          for carpeta in nodo.listar_carpetas())
+        if atributo != 'd':
+            grupos.append(Entrada(False, archivo.nombre, archivo.marca_tiempo, archivo.tamano)
+                          for archivo in nodo.listar_archivos())
+        for entradas in grupos:
+            if orden is not None:
+                # sorted calcula la clave de cada entrada una sola vez y compara las claves
+                entradas = sorted(entradas, key=CLAVES_ORDEN[orden.lstrip('-')], reverse=orden.startswith('-'))
+            yield from entradas
+
+    @staticmethod
+    def _entradas_recursivas(nodo: Carpeta, atributo: Optional[str],
+                             profundidad: Optional[int]) -> Iterator[Entrada]:
+        """
+        Genera las entradas de dir /s en preorden (ver Carpeta.recorrer): cada carpeta
+        seguida de su contenido, con la ruta relativa a la carpeta listada como nombre.
+
+        Parámetros:
+        - nodo (Carpeta): La carpeta listada.
+        - atributo (str | None): El filtro (ver dir).
+        - profundidad (int | None): La profundidad máxima (ver dir).
+
+        Retorna:
+        - Iterator[Entrada]: Las entradas.
+        """
+        rutas: list[str] = []  # Por profundidad, la ruta relativa de la carpeta abierta
+        for nivel, dato, _ in nodo.recorrer(profundidad, archivos=atributo != 'd'):
+            del rutas[nivel - 1:]
+            nombre = f"{rutas[-1]}\\{dato.nombre}" if rutas else dato.nombre
+            if isinstance(dato, Archivo):
+                yield Entrada(False, nombre, dato.marca_tiempo, dato.tamano)
+                continue
+            rutas.append(nombre)
+            if atributo != '-d':
+                yield Entrada(True, nombre, dato.marca_tiempo, dato.resumen().bytes)
+
+    def tree(self, ruta: str = '', archivos: bool = False, profundidad: Optional[int] = None) -> Arbol:
+        """
+        Obtiene el árbol de carpetas (y opcionalmente archivos) de una carpeta. Las ramas
+        se generan al recorrerlas con Carpeta.recorrer: sin recursión, así no hay límite
+        de profundidad, y guardando solo un nodo por nivel abierto.
+
+        Parámetros:
+        - ruta (str): La ruta de la carpeta. Vacía para la carpeta actual.
+        - archivos (bool): Si es True también se incluyen los archivos.
+        - profundidad (int | None): La cantidad máxima de niveles (1 muestra solo el
+          contenido directo); None para no limitarla.
+
+        Retorna:
+        - Arbol: La ruta absoluta de la carpeta y sus ramas en preorden.
+
+        Lanza:
+        - ValueError: Si la profundidad no es válida.
+        """
+        self._validar_profundidad(profundidad)
+        unidad, nodo, partes = self.resolver_ruta(ruta)
+        ramas = (Rama(nivel, isinstance(dato, Carpeta), dato.nombre, ultimo)
+                 for nivel, dato, ultimo in nodo.recorrer(profundidad, archivos=archivos))
+        return Arbol(unidad.ruta_mostrada(partes), ramas)
+
+    def du(self, ruta: str = '') -> list[Uso]:
+        """
+        Obtiene los totales (archivos, subcarpetas, bytes y marca más reciente) de cada
+        subcarpeta de una carpeta y de la carpeta misma. Los totales se mantienen en cada
+        carpeta (ver Carpeta.resumen), así cada una cuesta O(1) sin recorrer su contenido.
+
+        Parámetros:
+        - ruta (str): La ruta de la carpeta. Vacía para la carpeta actual.
+
+        Retorna:
+        - list[Uso]: Las subcarpetas en el orden en que fueron creadas y al final la carpeta.
+        """
+        unidad, nodo, partes = self.resolver_ruta(ruta)
+        usos = [Uso(unidad.ruta_mostrada(partes + [dato.nombre]), dato.resumen())
+                for dato in nodo.listar() if isinstance(dato, Carpeta)]
+        usos.append(Uso(unidad.ruta_mostrada(partes), nodo.resumen()))
+        return usos
+
+    def cd(self, ruta: str) -> str:
+        """
+        Cambia el directorio actual a la ruta especificada. Si la ruta es de otra unidad,
+        esa unidad pasa a ser la actual.
+
+        Parámetros:
+        - ruta (str): La ruta a la que se desea cambiar el directorio actual.
+
+        Retorna:
+        - str: La nueva ruta actual.
+        """
+        self.abrir()
+        # Caso: cd  ..  (Regresa  al  directorio  padre)
+        if ruta == "..":
+            unidad = self.actual
+            nodo = unidad.obtener_nodo_padre()
+            if nodo:
+                unidad.carpetas_ruta.pop()
+                if nodo is unidad.raiz:
+                    unidad.ruta_actual = unidad.nombre
+                else:
+                    componentes_ruta = unidad.ruta_actual.split('\\')
+                    unidad.ruta_actual = '\\'.join(componentes_ruta[:-1])
+
+        # Caso: cd C:/Documentos/Proyectos o cd carpeta/subcarpeta
+        else:
+            unidad, nodo, partes = self.resolver_ruta(ruta)
+
+            # Se conservan en la pila las carpetas que la nueva ruta comparte con la actual
+            partes_actuales = unidad.partes_ruta(unidad.ruta_actual)
+            if partes[:len(partes_actuales)] != partes_actuales:
+                unidad.carpetas_ruta = Pila()
+                unidad.carpetas_ruta.push(unidad.raiz)
+                partes_actuales = []
+
+            with self.metricas.medir('resolver'):
+                for i in range(len(partes_actuales) + 1, len(partes) + 1):
+                    unidad.carpetas_ruta.push(unidad.resolutor.resolver(partes[:i]))
+            unidad.ruta_actual = unidad.ruta_mostrada(partes)
+            self.actual = unidad
+
+        return unidad.ruta_actual
+
+    def resolver_ruta(self, ruta: str) -> tuple[Unidad, Carpeta, list[str]]:
+        """
+        Obtiene la carpeta de una ruta absoluta (C:/carpeta1/sub) o relativa a la carpeta
+        actual de la unidad actual (carpeta1/sub). Una ruta vacía o '.' corresponde a la
+        carpeta actual. Monta la unidad de la ruta si hace falta.
+
+        Las rutas absolutas se resuelven con la caché LRU de la unidad (ver
+        ResolutorRutas). Las relativas parten de la carpeta actual, que está en el tope
+        de la pila de la unidad, y recorren solo sus propias carpetas.
+
+        Parámetros:
+        - ruta (str): La ruta con separadores '/'.
+
+        Retorna:
+        - tuple[Unidad, Carpeta, list[str]]: La unidad, la carpeta y los nombres de las
+          carpetas de su ruta absoluta, desde la raíz.
+
+        Lanza:
+        - ValueError: Si la unidad o alguna carpeta de la ruta no existe.
+        """
+        self.abrir()
+        with self.metricas.medir('resolver'):
+            if ':' in ruta:
+                campos = ruta.split("/")
+                unidad = self.obtener_unidad(campos[0])
+                self.montar(unidad)
+                partes = [parte for parte in campos[1:] if parte and parte != '.']
+                return unidad, unidad.resolutor.resolver(partes), partes
+
+            unidad = self.actual
+            self.montar(unidad)
+            partes = unidad.partes_ruta(unidad.ruta_actual)
+            nodo = unidad.obtener_nodo_ruta_actual()
+            for nombre in ruta.split("/") if ruta else []:
+                if not nombre or nombre == '.':
+                    continue
+                nodo = nodo.buscar_carpeta(nombre)
+                if not nodo:
+                    raise ValueError("La ruta especificada no existe.")
+                partes.append(nombre)
+            return unidad, nodo, partes
+
+    def contiene_caracteres_validos(self, cadena: str):
+        """
+        Verifica si una cadena contiene solo caracteres válidos: letras de la a-z y A-Z,
+        espacios en blanco y números del 0 al 9.
+
+        Parámetros:
+        - cadena (str): La cadena a verificar.
+
+        Retorna:
+        - bool: True si la cadena contiene solo caracteres válidos, False en caso contrario.
+        """
+        # Patrón para caracteres válidos: letras de la a-z y A-Z, espacios en blanco y números del 0 al 9
+        patron = r'^[a-zA-Z0-9\s]*$'
+
+        # Verificar si la cadena coincide con el patrón
+        if match(patron, cadena):
+            return True
+        else:
+            return False
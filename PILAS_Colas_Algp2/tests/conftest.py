@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en la carpeta principal, sin paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def configuracion(tmp_path):
+    # Como config.json, con las rutas dentro de la carpeta temporal del test
+    for carpeta in ('unidades', 'respaldo', 'operaciones_errores'):
+        (tmp_path / carpeta).mkdir()
+    return {
+        'ruta_respaldo': str(tmp_path / 'respaldo'),
+        'max_respaldos': 100,
+        'ruta_unidades': str(tmp_path / 'unidades'),
+        'ruta_contenidos': str(tmp_path / 'unidades' / 'contenidos'),
+        'ruta_operaciones_errores': str(tmp_path / 'operaciones_errores'),
+        'unidades': [{'nombre': 'C:', 'nombre_archivo': 'Unidad C.json'},
+                     {'nombre': 'D:', 'nombre_archivo': 'Unidad D.json'}],
+        'nombre_archivo_operaciones_errores': 'historial_operaciones_errores.jsonl',
+        'intervalo_checkpoint': 500,
+        'carga_diferida': True,
+        'formato_unidad': 'json',
+        'indice_nombres': True,
+        'indice_contenidos': True,
+        'metricas': False,
+    }
@@ -0,0 +1,262 @@
+import json
+import os
+
+import pytest
+
+from bitacora import Bitacora
+from carpeta import Carpeta, Resumen
+from indice_contenidos import IndiceContenidos
+from indice_nombres import IndiceNombres
+
+
+def _abrir(tmp_path, formato):
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 3, formato=formato, indexar=True)
+    bitacora.diferida = True  # Como con el escritor en segundo plano
+    unidad = Carpeta('C:', 0)
+    bitacora.checkpoint(unidad)
+    return bitacora, unidad
+
+
+def _mkdir(bitacora, unidad, nombre, minuto):
+    # Las marcas son minutos enteros porque el JSON guarda las fechas sin segundos
+    unidad.crear_carpeta(nombre, minuto * 60)
+    bitacora.registrar(unidad, {'op': 'mkdir', 'ruta': [], 'nombre': nombre, 'fecha': minuto * 60})
+
+
+def _cargada(tmp_path, formato):
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 3, formato=formato, indexar=True)
+    unidad = bitacora.cargar()
+    bitacora.cerrar()
+    return unidad.to_dict()
+
+
+@pytest.mark.parametrize('formato', ['json', 'binario'])
+def test_corte_con_operaciones_mientras_se_guarda(tmp_path, formato):
+    bitacora, unidad = _abrir(tmp_path, formato)
+    for i in range(4):
+        _mkdir(bitacora, unidad, f'antes{i}', i)
+    corte = bitacora.sellar(unidad)
+    assert corte.secuencia == 4
+    guardada = unidad.to_dict()
+
+    # Los comandos siguen mientras el escritor guarda el corte
+    _mkdir(bitacora, unidad, 'durante', 10)
+    bitacora.guardar_corte(corte)
+    bitacora.soltar_corte()
+    assert not os.path.exists(bitacora.filename_sellada)
+    indice, secuencia = IndiceNombres.cargar(bitacora.filename_indice)
+    assert secuencia == 4 and [u.nombre for u in indice.buscar('*')] == [f'antes{i}' for i in range(4)]
+    if formato == 'json':
+        with open(bitacora.filename_unidad) as f:
+            texto = f.read().split('\n', 1)[1]
+        # El mismo texto que json.dumps, con los totales de cada carpeta
+        assert texto == json.dumps(json.loads(texto), indent=4)
+        data = json.loads(texto, object_hook=lambda d: {k: v for k, v in d.items() if k != 'resumen'})
+        assert data == dict(guardada, secuencia=4)
+        assert json.loads(texto)['resumen'] == {
+            'archivos': 0, 'carpetas': 4, 'bytes': 0, 'ultima': '01/01/1970 12:03 AM'}
+
+    bitacora.sincronizar()
+    assert bitacora.sellar(unidad) is None
+    assert _cargada(tmp_path, formato) == unidad.to_dict()
+    bitacora.cerrar()
+
+
+def test_corte_sin_guardar_se_recupera_y_se_reintenta(tmp_path):
+    bitacora, unidad = _abrir(tmp_path, 'json')
+    for i in range(3):
+        _mkdir(bitacora, unidad, f'primero{i}', i)
+    assert bitacora.sellar(unidad).secuencia == 3
+    bitacora.soltar_corte()
+    _mkdir(bitacora, unidad, 'despues', 5)
+    bitacora.sincronizar()
+    # Como si el guardado del corte hubiera fallado: la unidad sale de las dos bitácoras
+    assert _cargada(tmp_path, 'json') == unidad.to_dict()
+
+    # El próximo corte agrega las operaciones nuevas a la bitácora sellada pendiente
+    corte = bitacora.sellar(unidad)
+    assert corte.secuencia == 4
+    bitacora.guardar_corte(corte)
+    bitacora.soltar_corte()
+    assert _cargada(tmp_path, 'json') == unidad.to_dict()
+    bitacora.cerrar()
+
+
+@pytest.mark.parametrize('formato', ['json', 'binario'])
+def test_corte_de_una_unidad_diferida_copia_lo_que_no_cambio(tmp_path, formato):
+    bitacora, unidad = _abrir(tmp_path, formato)
+    for nombre in ('a', 'b'):
+        _mkdir(bitacora, unidad, nombre, 1)
+        carpeta = unidad.buscar_carpeta(nombre)
+        carpeta.crear_archivo('dentro.txt', f'en {nombre}', 120)
+        carpeta.crear_carpeta('sub', 180)
+    bitacora.checkpoint(unidad)
+    bitacora.cerrar()
+
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 1, True, formato, indexar=True)
+    bitacora.diferida = True
+    unidad = bitacora.cargar()
+    unidad.buscar_carpeta('a').crear_carpeta('nueva', 600)
+    bitacora.registrar(unidad, {'op': 'mkdir', 'ruta': ['a'], 'nombre': 'nueva', 'fecha': 600})
+    corte = bitacora.sellar(unidad)
+    esperada = unidad.to_dict()
+    assert unidad.indice_carpetas['b'].dato._pendiente is not None
+
+    # Desmontar mientras se guarda el corte no cierra el archivo del que se copia
+    bitacora.cerrar()
+    assert bitacora.lector is not None
+    bitacora.guardar_corte(corte)
+    bitacora.soltar_corte()
+    assert bitacora.lector is None
+    assert _cargada(tmp_path, formato) == esperada
+
+
+def test_corte_copia_el_indice_de_contenidos(tmp_path):
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 1, indexar_contenidos=True)
+    bitacora.diferida = True
+    unidad = Carpeta('C:', 0)
+    bitacora.checkpoint(unidad)
+
+    def escribir(nombre, contenido):
+        unidad.crear_archivo(nombre, contenido, 0)
+        bitacora.registrar(unidad, {'op': 'type', 'ruta': [], 'nombre': nombre, 'fecha': 0, 'contenido': contenido})
+
+    escribir('uno.txt', 'hola mundo')
+    corte = bitacora.sellar(unidad)
+    # Cambios después del corte, sobre los arrays que comparte la copia
+    escribir('dos.txt', 'hola otra vez')
+    bitacora.guardar_corte(corte)
+    bitacora.soltar_corte()
+
+    guardado, secuencia = IndiceContenidos.cargar(bitacora.filename_indice_contenidos)
+    assert secuencia == 1
+    assert [u.nombre for u in guardado.buscar({'hola'})] == ['uno.txt']
+    assert sorted(u.nombre for u in bitacora.indice_contenidos.buscar({'hola'})) == ['dos.txt', 'uno.txt']
+    bitacora.cerrar()
+
+
+def _armar(unidad):
+    unidad.crear_carpeta('a', 60)
+    a = unidad.buscar_carpeta('a')
+    a.crear_archivo('dentro.txt', 'hola', 120)
+    a.crear_carpeta('sub', 180)
+    a.buscar_carpeta('sub').crear_archivo('x.txt', 'chau!', 240)
+    unidad.crear_carpeta('b', 300)
+
+
+@pytest.mark.parametrize('formato', ['json', 'binario'])
+def test_totales_guardados_con_la_unidad(tmp_path, formato):
+    bitacora, unidad = _abrir(tmp_path, formato)
+    _armar(unidad)
+    bitacora.checkpoint(unidad)
+    bitacora.cerrar()
+
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 1, True, formato)
+    unidad = bitacora.cargar()
+    a = unidad.indice_carpetas['a'].dato
+    # Los totales salen del archivo sin cargar la carpeta
+    assert a.resumen() == Resumen(2, 1, 9, 240)
+    assert a._pendiente is not None
+    assert unidad.resumen() == Carpeta.resumen_dict(unidad.to_dict()) == Resumen(2, 3, 9, 300)
+    bitacora.cerrar()
+
+
+def test_unidad_sin_totales_los_guarda_en_el_proximo_punto_de_control(tmp_path):
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 1, True)
+    unidad = Carpeta('C:', 0)
+    _armar(unidad)
+    unidad.guardar_json(bitacora.filename_unidad)  # Como lo guardaban las versiones anteriores
+
+    unidad = bitacora.cargar()
+    assert unidad.indice_carpetas['a'].dato.total_archivos is None
+    unidad.crear_carpeta('c', 360)
+    bitacora.checkpoint(unidad)
+    bitacora.cerrar()
+
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 1, True)
+    unidad = bitacora.cargar()
+    a = unidad.indice_carpetas['a'].dato
+    assert a._pendiente is not None and a.total_archivos == 2
+    assert unidad.resumen() == Resumen(2, 4, 9, 360)
+    bitacora.cerrar()
+
+
+def _registrada(tmp_path, cantidad):
+    # Una unidad con un punto de control vacío y 'cantidad' mkdir solo en la bitácora
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 100)
+    unidad = Carpeta('C:', 0)
+    bitacora.checkpoint(unidad)
+    for i in range(cantidad):
+        _mkdir(bitacora, unidad, f'carpeta{i}', i)
+    bitacora.cerrar()
+    return bitacora
+
+
+def _nombres(unidad):
+    return [dato.nombre for _, dato, _ in unidad.recorrer()]
+
+
+def test_reproducir_la_bitacora_al_cargar(tmp_path):
+    _registrada(tmp_path, 3)
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 100)
+    unidad = bitacora.cargar()
+    assert _nombres(unidad) == ['carpeta0', 'carpeta1', 'carpeta2']
+    assert bitacora.secuencia == 3 and bitacora.operaciones_sin_checkpoint == 3
+    bitacora.cerrar()
+
+
+def test_lineas_ya_incluidas_en_la_unidad_no_se_reaplican(tmp_path):
+    bitacora = _registrada(tmp_path, 2)
+    with open(bitacora.filename, 'rb') as f:
+        lineas = f.read()
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 100)
+    bitacora.checkpoint(bitacora.cargar())
+    bitacora.cerrar()
+    # Como si el punto de control no hubiera llegado a vaciar la bitácora
+    with open(bitacora.filename, 'wb') as f:
+        f.write(lineas)
+
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 100)
+    assert _nombres(bitacora.cargar()) == ['carpeta0', 'carpeta1']
+    assert bitacora.operaciones_sin_checkpoint == 0
+    bitacora.cerrar()
+
+
+@pytest.mark.parametrize('danio', ['cortada', 'crc', 'basura'])
+def test_linea_daniada_termina_la_bitacora(tmp_path, danio):
+    bitacora = _registrada(tmp_path, 3)
+    with open(bitacora.filename, 'rb') as f:
+        lineas = f.read().splitlines(keepends=True)
+    if danio == 'cortada':  # Escritura interrumpida a mitad de la última línea
+        lineas[2] = lineas[2][:20]
+    elif danio == 'crc':  # Un byte cambiado en una línea del medio
+        lineas[1] = lineas[1].replace(b'carpeta1', b'carpetaX')
+    else:
+        lineas[1] = b'no es una linea\n'
+    with open(bitacora.filename, 'wb') as f:
+        f.writelines(lineas)
+
+    esperadas = 2 if danio == 'cortada' else 1
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 100)
+    unidad = bitacora.cargar()
+    assert _nombres(unidad) == [f'carpeta{i}' for i in range(esperadas)]
+    # La cola dañada se descarta, así lo que se registra después queda legible
+    assert os.path.getsize(bitacora.filename) == sum(map(len, lineas[:esperadas]))
+    _mkdir(bitacora, unidad, 'despues', 9)
+    bitacora.cerrar()
+    assert _nombres(Bitacora(str(tmp_path / 'C.json'), 100).cargar())[-1] == 'despues'
+
+
+def test_bitacora_sellada_daniada_descarta_la_actual(tmp_path):
+    bitacora = _registrada(tmp_path, 2)
+    with open(bitacora.filename, 'rb') as f:
+        lineas = f.read()
+    with open(bitacora.filename_sellada, 'wb') as f:
+        f.write(lineas[:-5])  # La segunda operación quedó a medias
+    with open(bitacora.filename, 'wb') as f:
+        f.write(Bitacora._codificar({'op': 'mkdir', 'ruta': [], 'nombre': 'otra', 'fecha': 0, 'secuencia': 3}))
+
+    bitacora = Bitacora(str(tmp_path / 'C.json'), 100)
+    assert _nombres(bitacora.cargar()) == ['carpeta0']
+    assert os.path.getsize(bitacora.filename) == 0
+    bitacora.cerrar()
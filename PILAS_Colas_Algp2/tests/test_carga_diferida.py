@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from carga_diferida import FormatoNoDiferible, LectorDiferido, serializar_json
+from carpeta import Carpeta
+from escritura_segura import ArchivoDaniado, escribir_atomico
+
+
+def _unidad():
+    # Contenidos con saltos de línea, comillas y llaves, que el JSON escapa
+    raiz = Carpeta('C:', 0)
+    raiz.crear_archivo('raiz.txt', 'hola', 60)
+    raiz.crear_carpeta('año', 120)
+    anio = raiz.buscar_carpeta('año')
+    anio.crear_archivo('notas.txt', 'línea 1\n        }\n"fin"', 180)
+    anio.crear_carpeta('vacía', 240)
+    anio.crear_carpeta('sub', 300)
+    anio.buscar_carpeta('sub').crear_archivo('x.txt', '{}', 360)
+    raiz.crear_carpeta('b', 420)
+    return raiz
+
+
+def _cargar(filename):
+    lector = LectorDiferido(filename)
+    raiz, adicionales = lector.cargar_raiz()
+    return lector, raiz, adicionales
+
+
+def test_subcarpetas_pendientes_hasta_usarlas(tmp_path):
+    filename = str(tmp_path / 'C.json')
+    original = _unidad()
+    original.guardar_json(filename)
+
+    lector, raiz, _ = _cargar(filename)
+    anio = raiz.indice_carpetas['año'].dato
+    assert raiz.buscar_archivo('raiz.txt').leer_contenido(None) == 'hola'
+    assert anio._pendiente is not None and raiz.indice_carpetas['b'].dato._pendiente is not None
+
+    assert anio.buscar_archivo('notas.txt').leer_contenido(None) == 'línea 1\n        }\n"fin"'
+    assert anio._pendiente is None
+    assert anio.indice_carpetas['sub'].dato._pendiente is not None
+    assert raiz.to_dict() == original.to_dict()
+    lector.cerrar()
+
+
+def test_serializar_json_con_totales_y_secuencia(tmp_path):
+    filename = str(tmp_path / 'C.json')
+    original = _unidad()
+    escribir_atomico(filename, serializar_json(original.instantanea(), 7), suma=True)
+
+    lector, raiz, adicionales = _cargar(filename)
+    assert adicionales == {'secuencia': 7} and lector.con_resumen
+    anio = raiz.indice_carpetas['año'].dato
+    # Los totales se leen sin cargar la carpeta
+    assert anio.resumen() == original.buscar_carpeta('año').resumen()
+    assert anio._pendiente is not None
+    assert raiz.to_dict() == original.to_dict()
+
+    # Una instantánea con carpetas todavía pendientes copia sus bytes tal cual
+    raiz.buscar_carpeta('b').crear_archivo('nuevo.txt', 'nuevo', 480)
+    copia = str(tmp_path / 'copia.json')
+    escribir_atomico(copia, serializar_json(raiz.instantanea(), 8), suma=True)
+    esperada = raiz.to_dict()
+    lector.cerrar()
+    otro, cargada, _ = _cargar(copia)
+    assert cargada.to_dict() == esperada
+    otro.cerrar()
+
+
+@pytest.mark.parametrize('texto', ['', '{"nombre": "C:", "fecha_hora": null, "archivos": []}'])
+def test_formato_no_diferible(tmp_path, texto):
+    filename = tmp_path / 'C.json'
+    filename.write_text(texto)
+    with pytest.raises(FormatoNoDiferible):
+        _cargar(str(filename))
+
+
+def test_archivo_daniado(tmp_path):
+    filename = tmp_path / 'C.json'
+    _unidad().guardar_json(str(filename))
+    datos = filename.read_bytes()
+    filename.write_bytes(datos[:-10])
+    with pytest.raises(ArchivoDaniado):
+        _cargar(str(filename))
+    filename.write_bytes(datos.replace(b'hola', b'HOLA'))
+    with pytest.raises(ArchivoDaniado):
+        _cargar(str(filename))
+    # Sin cabecera se carga igual (unidades guardadas por versiones anteriores)
+    filename.write_text(json.dumps(_unidad().to_dict(), indent=4))
+    lector, raiz, _ = _cargar(str(filename))
+    assert raiz.to_dict() == _unidad().to_dict()
+    lector.cerrar()
@@ -0,0 +1,135 @@
+import random
+import sys
+
+import pytest
+
+from carpeta import LARGO_MAXIMO_NOMBRE, Carpeta, Resumen
+from formato_binario import cargar_binario, guardar_binario
+
+
+def _arbol_profundo(profundidad):
+    # Como una serie de mkdir, cada uno dentro de la carpeta anterior. Las marcas son
+    # minutos enteros porque to_dict guarda las fechas sin segundos
+    raiz = carpeta = Carpeta('C:', 0)
+    for nivel in range(profundidad):
+        carpeta.crear_archivo(f'archivo{nivel}.txt', f'contenido {nivel}', nivel * 60)
+        carpeta.crear_carpeta(f'carpeta{nivel}', nivel * 60)
+        carpeta = carpeta.buscar_carpeta(f'carpeta{nivel}')
+    return raiz
+
+
+def _filas(carpeta):
+    # Se comparan los recorridos: comparar los diccionarios también sería recursivo
+    return [(profundidad, type(dato).__name__, dato.nombre, dato.marca_tiempo, ultimo)
+            for profundidad, dato, ultimo in carpeta.recorrer()]
+
+
+def test_ida_y_vuelta_mas_profunda_que_el_limite_de_recursion(tmp_path):
+    profundidad = sys.getrecursionlimit() + 500
+    raiz = _arbol_profundo(profundidad)
+    filas = _filas(raiz)
+    assert max(fila[0] for fila in filas) == profundidad
+
+    copia = Carpeta.from_dict(raiz.to_dict())
+    assert _filas(copia) == filas
+    assert copia.resumen() == raiz.resumen()
+
+    filename = str(tmp_path / 'C.bin')
+    guardar_binario(copia, filename)
+    cargada, _ = cargar_binario(filename)
+    assert _filas(cargada) == filas
+
+
+def _resumen_bruto(carpeta):
+    # Los totales recorriendo todo el subárbol, sin usar los que guarda cada carpeta
+    archivos = carpetas = tamano = 0
+    marcas = [carpeta.marca_tiempo]
+    for hijo in carpeta.listar():
+        if isinstance(hijo, Carpeta):
+            resumen = _resumen_bruto(hijo)
+            archivos += resumen.archivos
+            carpetas += resumen.carpetas + 1
+            tamano += resumen.bytes
+            marcas.append(resumen.ultima)
+        else:
+            archivos += 1
+            tamano += hijo.tamano or 0
+            marcas.append(hijo.marca_tiempo)
+    return Resumen(archivos, carpetas, tamano, max(m for m in marcas if m is not None))
+
+
+def test_eliminar_lo_mas_reciente_de_una_carpeta_ancha():
+    raiz = Carpeta('C:', 0)
+    raiz.crear_carpeta('ancha', 0)
+    ancha = raiz.buscar_carpeta('ancha')
+    for i in range(1000):
+        ancha.crear_archivo(f'archivo{i}.txt', 'x', i % 500)
+        ancha.crear_carpeta(f'carpeta{i}', i % 400)
+    assert raiz.resumen() == _resumen_bruto(raiz)
+
+    # Dos archivos empatan con la marca más reciente: quitar uno no la cambia
+    ancha.eliminar_archivo('archivo999.txt')
+    assert raiz.resumen() == _resumen_bruto(raiz)
+    assert raiz.resumen().ultima == 499
+
+    # Quitar el último que la tenía obliga a recalcularla con las carpetas
+    ancha.eliminar_archivo('archivo499.txt')
+    assert raiz.resumen() == _resumen_bruto(raiz)
+    ancha.crear_carpeta('nueva', 1000)
+    ancha.eliminar_carpeta('nueva')
+    assert raiz.resumen() == _resumen_bruto(raiz)
+    ancha.eliminar_carpeta('carpeta399')
+    assert raiz.resumen() == _resumen_bruto(raiz)
+
+    raiz.eliminar_carpeta('ancha')
+    assert raiz.resumen() == Resumen(0, 0, 0, 0)
+
+
+def test_totales_con_marcas_repetidas():
+    # Con pocas marcas distintas hay muchos empates; algunas carpetas se agregan
+    # armadas, sin totales calculados
+    azar = random.Random(23)
+    raiz = Carpeta('C:', 0)
+    raiz.resumen()
+    for _ in range(3000):
+        carpeta, padre = raiz, None
+        while True:
+            subcarpetas = list(carpeta.indice_carpetas)
+            if not subcarpetas or azar.random() < 0.3:
+                break
+            padre, carpeta = carpeta, carpeta.buscar_carpeta(azar.choice(subcarpetas))
+        marca = azar.randint(0, 6)
+        opcion = azar.random()
+        if opcion < 0.25:
+            nombre = f'c{azar.randint(0, 5)}'
+            if carpeta.buscar_carpeta(nombre) is None:
+                carpeta.crear_carpeta(nombre, marca)
+        elif opcion < 0.3:
+            armada = Carpeta(f'a{azar.randint(0, 5)}', marca)
+            armada.crear_archivo('dentro.txt', 'xy', azar.randint(0, 6))
+            if carpeta.buscar_carpeta(armada.nombre) is None:
+                carpeta.agregar_carpeta(armada)
+        elif opcion < 0.65:
+            nombre = f'f{azar.randint(0, 5)}.txt'
+            if carpeta.buscar_archivo(nombre) is None:
+                carpeta.crear_archivo(nombre, 'z' * azar.randint(0, 3), marca)
+        elif opcion < 0.9:
+            carpeta.eliminar_archivo(f'f{azar.randint(0, 5)}.txt')
+        elif padre is not None:
+            padre.eliminar_carpeta(carpeta.nombre)
+        assert raiz.resumen() == _resumen_bruto(raiz)
+
+
+def test_nombre_mas_largo_que_el_formato_binario(tmp_path):
+    raiz = Carpeta('C:', 0)
+    with pytest.raises(ValueError):
+        raiz.crear_carpeta('ñ' * (LARGO_MAXIMO_NOMBRE // 2 + 1), 0)
+    with pytest.raises(ValueError):
+        raiz.crear_archivo('a' * LARGO_MAXIMO_NOMBRE + '.txt', 'hola', 0)
+    assert raiz.resumen() == Resumen(0, 0, 0, 0)
+
+    # El más largo que entra se guarda y se lee igual
+    nombre = 'ñ' * (LARGO_MAXIMO_NOMBRE // 2)
+    raiz.crear_carpeta(nombre, 60)
+    guardar_binario(raiz, str(tmp_path / 'C.bin'))
+    assert _filas(cargar_binario(str(tmp_path / 'C.bin'))[0]) == _filas(raiz)
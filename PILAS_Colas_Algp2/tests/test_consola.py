@@ -0,0 +1,62 @@
+import json
+import os
+
+from consola import Consola
+
+
+def _consola(configuracion):
+    consola = Consola('C:', configuracion)
+    consola.cargar()
+    return consola
+
+
+def _bitacora(configuracion):
+    return os.path.join(configuracion['ruta_unidades'], 'Unidad C.bitacora')
+
+
+def _registros(configuracion):
+    filename = os.path.join(configuracion['ruta_operaciones_errores'],
+                            configuracion['nombre_archivo_operaciones_errores'])
+    with open(filename, encoding='utf-8') as f:
+        return [(data['tipo'], data['comando'], data['argumentos'])
+                for data in map(json.loads, f) if data['tipo'] in ('error', 'operacion')]
+
+
+def test_script_guarda_la_unidad_una_sola_vez_al_terminar(configuracion, capsys):
+    consola = _consola(configuracion)
+    consola.ejecutar_script([
+        '# Comentario\n',
+        'mkdir uno\n',
+        '\n',
+        'cd uno\n',
+        'type notas.txt "hola"\n',
+        'mkdir uno/no\n',  # Error: no detiene el script
+        'exit\n',
+        'mkdir despues\n',
+    ])
+    assert "Carpeta 'uno' creada" in capsys.readouterr().out
+
+    # Todo quedó en la unidad y la bitácora quedó vacía
+    assert os.path.getsize(_bitacora(configuracion)) == 0
+    consola = _consola(configuracion)
+    raiz = consola.sistema.actual.raiz
+    assert [carpeta.nombre for carpeta in raiz.listar()] == ['uno']
+    assert raiz.buscar_carpeta('uno').buscar_archivo('notas.txt') is not None
+    assert [registro[:2] for registro in _registros(configuracion)] == [
+        ('operacion', 'mkdir'), ('operacion', 'cd'), ('operacion', 'type'), ('error', 'mkdir')]
+    consola.sistema.cerrar()
+
+
+def test_script_sincroniza_cada_tantos_comandos(configuracion):
+    consola = _consola(configuracion)
+    tamanos = []
+
+    def lineas():
+        for i in range(5):
+            yield f'mkdir carpeta{i}'
+            tamanos.append(os.path.getsize(_bitacora(configuracion)) if i else 0)
+
+    consola.ejecutar_script(lineas(), guardar_cada=2)
+    # La bitácora llega al disco solo en los guardados intermedios (cada 2 comandos)
+    assert tamanos[1] > 0 and tamanos[2] == tamanos[1] and tamanos[3] > tamanos[2]
+    assert len(_registros(configuracion)) == 5
@@ -0,0 +1,39 @@
+import threading
+
+from escritor import EscritorSegundoPlano
+
+
+def _tomar_en_otro_hilo(escritor):
+    # Como un comando: toma el candado desde otro hilo, si puede, y lo suelta
+    tomado = []
+
+    def tomar():
+        if escritor.candado.acquire(timeout=0.5):
+            tomado.append(True)
+            escritor.candado.release()
+
+    hilo = threading.Thread(target=tomar)
+    hilo.start()
+    hilo.join()
+    return bool(tomado)
+
+
+def test_lo_lento_del_guardado_se_hace_sin_el_candado():
+    resultados = []
+
+    def tarea():
+        resultados.append(_tomar_en_otro_hilo(escritor))
+        return lambda: resultados.append(_tomar_en_otro_hilo(escritor))
+
+    escritor = EscritorSegundoPlano([tarea], intervalo=60)
+    escritor.marcar()
+    escritor.detener()
+    assert resultados == [False, True]
+
+
+def test_sin_candado_libera_el_candado_mientras_espera():
+    escritor = EscritorSegundoPlano([], intervalo=60)
+    with escritor.candado:
+        assert escritor.sin_candado(_tomar_en_otro_hilo, escritor)
+        assert not _tomar_en_otro_hilo(escritor)
+    escritor.detener()
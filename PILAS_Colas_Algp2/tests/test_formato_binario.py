@@ -0,0 +1,84 @@
+import pytest
+
+from almacen_contenidos import AlmacenContenidos
+from carpeta import Carpeta
+from escritura_segura import ArchivoDaniado
+from formato_binario import (LectorBinario, binario_a_json, cargar_binario, guardar_binario,
+                             json_a_binario)
+
+
+def _unidad(almacen=None):
+    # Marcas con segundos: el formato binario no las trunca al minuto como el JSON
+    raiz = Carpeta('C:', 0)
+    raiz.crear_archivo('raiz.txt', 'hola', 61, almacen=almacen)
+    raiz.crear_carpeta('año', 122)
+    anio = raiz.buscar_carpeta('año')
+    anio.crear_archivo('notas.txt', 'ñandú\n' * 100, 183, almacen=almacen)
+    anio.crear_carpeta('vacía', 244)
+    anio.buscar_carpeta('vacía').crear_archivo('vacio.txt', '', 305, almacen=almacen)
+    raiz.crear_carpeta('b', 366)
+    return raiz
+
+
+def test_carga_diferida_con_totales(tmp_path):
+    filename = str(tmp_path / 'C.bin')
+    original = _unidad()
+    guardar_binario(original, filename, secuencia=5)
+
+    lector = LectorBinario(filename)
+    raiz, adicionales = lector.cargar_raiz(diferida=True)
+    assert adicionales == {'secuencia': 5} and lector.con_resumen
+    anio = raiz.indice_carpetas['año'].dato
+    assert anio._pendiente is not None
+    assert anio.resumen() == original.buscar_carpeta('año').resumen()
+    assert anio._pendiente is not None
+
+    assert anio.buscar_archivo('notas.txt').leer_contenido(None) == 'ñandú\n' * 100
+    assert anio.buscar_archivo('notas.txt').marca_tiempo == 183
+    assert anio._pendiente is None
+    assert raiz.to_dict() == original.to_dict()
+    lector.cerrar()
+
+
+def test_contenidos_en_el_almacen(tmp_path):
+    almacen = AlmacenContenidos(str(tmp_path / 'contenidos'))
+    filename = str(tmp_path / 'C.bin')
+    original = _unidad(almacen)
+    guardar_binario(original, filename)
+
+    cargada, _ = cargar_binario(filename)
+    archivo = cargada.buscar_carpeta('año').buscar_archivo('notas.txt')
+    assert archivo.hash == original.buscar_carpeta('año').buscar_archivo('notas.txt').hash
+    assert archivo.leer_contenido(almacen) == 'ñandú\n' * 100
+    assert cargada.resumen() == original.resumen()
+
+
+def test_conversion_entre_formatos(tmp_path):
+    original = _unidad()
+    original.guardar_json(str(tmp_path / 'C.json'))
+    json_a_binario(str(tmp_path / 'C.json'), str(tmp_path / 'C.bin'))
+    cargada, adicionales = cargar_binario(str(tmp_path / 'C.bin'))
+    assert cargada.to_dict() == original.to_dict() and adicionales == {'secuencia': 0}
+
+    binario_a_json(str(tmp_path / 'C.bin'), str(tmp_path / 'otra.json'))
+    assert Carpeta.cargar_json(str(tmp_path / 'otra.json')).to_dict() == original.to_dict()
+
+
+@pytest.mark.parametrize('danio', ['cortado', 'byte', 'json', 'vacio'])
+def test_archivo_daniado_o_ajeno(tmp_path, danio):
+    filename = tmp_path / 'C.bin'
+    guardar_binario(_unidad(), str(filename))
+    datos = bytearray(filename.read_bytes())
+    if danio == 'cortado':
+        datos = datos[:-7]
+    elif danio == 'byte':
+        datos[len(datos) // 2] ^= 0xFF
+    elif danio == 'json':
+        datos = b'{"nombre": "C:", "archivos": []}'
+    else:
+        datos = b''
+    filename.write_bytes(bytes(datos))
+
+    error = ArchivoDaniado if danio in ('cortado', 'byte') else ValueError
+    with pytest.raises(error):
+        LectorBinario(str(filename))
@@ -0,0 +1,21 @@
+import random
+
+from historial import Historial, RegistroComando
+
+
+def test_consultar_por_comando_igual_que_recorrer_todo():
+    aleatorio = random.Random(19)
+    historial = Historial(50)
+    for marca in range(2000):
+        if historial and aleatorio.random() < 0.1:
+            historial.quitar_ultimo()
+        else:
+            comando = aleatorio.choice(['mkdir', 'MKDIR', 'dir', 'cd', 'type'])
+            historial.agregar(RegistroComando(marca, comando, '', 0))
+
+        desde, hasta = sorted(aleatorio.randrange(marca + 1) for _ in range(2))
+        for comando in ('mkdir', 'dir', 'cd', 'type', 'rmdir'):
+            esperados = [registro for registro in historial
+                         if registro.comando.lower() == comando and desde <= registro.marca <= hasta]
+            assert list(historial.consultar(desde, hasta, comando)) == esperados
+    assert sorted(historial.por_comando) == sorted({registro.comando.lower() for registro in historial})
@@ -0,0 +1,32 @@
+from metricas import Metricas
+
+
+def test_percentiles_por_rango_mas_cercano():
+    metricas = Metricas()
+    for microsegundos in (46, 50, 52, 60, 299):
+        metricas.agregar('mkdir', 'modificar', microsegundos)
+
+    fase = metricas.resumen()['mkdir']['modificar']
+    assert fase['cantidad'] == 5
+    assert fase['p50'] == 52
+    assert fase['p90'] == 299
+    assert fase['p99'] == fase['max'] == 299
+
+
+def test_percentiles_con_dos_muestras():
+    metricas = Metricas()
+    metricas.agregar('dir', 'resolver', 10)
+    metricas.agregar('dir', 'resolver', 500)
+
+    fase = metricas.resumen()['dir']['resolver']
+    assert fase['p50'] == 10
+    assert fase['p90'] == fase['p99'] == fase['max'] == 500
+
+
+def test_percentiles_con_cien_muestras():
+    metricas = Metricas()
+    for microsegundos in range(1, 101):
+        metricas.agregar('type', 'persistir', microsegundos)
+
+    fase = metricas.resumen()['type']['persistir']
+    assert (fase['p50'], fase['p90'], fase['p99'], fase['max']) == (50, 90, 99, 100)
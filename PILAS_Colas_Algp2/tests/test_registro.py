@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from historial import RegistroComando
+from registro import Registro
+
+
+def _operacion(i):
+    return RegistroComando(i * 60, 'mkdir', f'carpeta{i}', 5, None)
+
+
+def _lineas(filename):
+    # Los registros del archivo, sin las líneas de los lotes archivados
+    with open(filename, encoding='utf-8') as f:
+        return [data['argumentos'] for data in map(json.loads, f) if data['tipo'] in ('error', 'operacion')]
+
+
+def test_comandos_mientras_se_guarda_el_corte(tmp_path):
+    filename = str(tmp_path / 'registros.jsonl')
+    registro = Registro(capacidad=3)
+    for i in range(2):
+        registro.agregar(_operacion(i))
+    corte = registro.cortar()
+    # Los comandos siguen mientras el escritor guarda el corte sin el candado
+    registro.agregar(_operacion(2))
+    registro.guardar_corte(corte, filename)
+    assert _lineas(filename) == ['carpeta0', 'carpeta1']
+
+    registro.guardar_registros(filename)
+    assert _lineas(filename) == ['carpeta0', 'carpeta1', 'carpeta2']
+
+    # El que sale del historial queda para archivarse al compactar
+    registro.agregar(_operacion(3))
+    registro.guardar_registros(filename)
+    assert registro.desalojados == [('operacion', _operacion(0))]
+
+
+def test_corte_que_compacta_archiva_los_desalojados(tmp_path):
+    filename = str(tmp_path / 'registros.jsonl')
+    registro = Registro(capacidad=2)
+    for i in range(5):
+        registro.agregar(_operacion(i))
+    corte = registro.cortar()
+    assert corte.vigentes is not None and not registro.requiere_compactar
+    registro.agregar(_operacion(5))
+    registro.guardar_corte(corte, filename)
+
+    assert _lineas(filename) == ['carpeta3', 'carpeta4']
+    assert _lineas(str(tmp_path / 'registros.1.jsonl')) == ['carpeta0', 'carpeta1', 'carpeta2']
+    assert registro.desalojados == [('operacion', _operacion(3))]
+
+
+def test_corte_que_falla_queda_pendiente(tmp_path):
+    filename = str(tmp_path / 'registros.jsonl')
+    registro = Registro(capacidad=3)
+    registro.agregar(_operacion(0))
+    corte = registro.cortar()
+    registro.agregar(_operacion(1))
+    with pytest.raises(OSError):
+        registro.guardar_corte(corte, str(tmp_path / 'no existe' / 'registros.jsonl'))
+
+    registro.guardar_registros(filename)
+    assert _lineas(filename) == ['carpeta0', 'carpeta1']
+
+
+def test_compactacion_interrumpida_no_pierde_ni_duplica(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'registros.jsonl')
+    registro = Registro(capacidad=2)
+    registro.agregar(_operacion(0))
+    registro.guardar_registros(filename)
+    for i in range(1, 5):
+        registro.agregar(_operacion(i))
+    registro.requiere_compactar = True
+
+    # Se corta después de archivar y antes de confirmar el lote
+    archivar = Registro.archivar
+
+    def archivar_y_cortar(self, *argumentos):
+        archivar(self, *argumentos)
+        with open(str(tmp_path / 'registros.1.jsonl'), 'a', encoding='utf-8') as f:
+            f.write('{"tipo": "operacion", "marca": 0, "comando": "mkd')  # Línea a medias
+        raise OSError('corte de energía')
+
+    monkeypatch.setattr(Registro, 'archivar', archivar_y_cortar)
+    with pytest.raises(OSError):
+        registro.guardar_registros(filename)
+    monkeypatch.undo()
+
+    recuperado = Registro(capacidad=2)
+    recuperado.cargar_registros(filename)
+    assert [registro.argumentos for _, registro in recuperado.desalojados] == ['carpeta0', 'carpeta1', 'carpeta2']
+    recuperado.guardar_registros(filename)
+    assert _lineas(str(tmp_path / 'registros.1.jsonl')) == ['carpeta0', 'carpeta1', 'carpeta2']
+
+    # Con el lote confirmado, volver a cargar no lo archiva de nuevo
+    otra_vez = Registro(capacidad=2)
+    otra_vez.cargar_registros(filename)
+    assert otra_vez.desalojados == [] and not otra_vez.requiere_compactar
+    assert [r.argumentos for r in otra_vez.ver_operaciones()] == ['carpeta4', 'carpeta3']
+
+
+def test_sin_archivos_de_registros(tmp_path):
+    filename = str(tmp_path / 'registros.jsonl')
+    registro = Registro(capacidad=1, max_archivos=0)
+    for i in range(3):
+        registro.agregar(_operacion(i))
+    registro.compactar_registros(filename)
+    assert _lineas(filename) == ['carpeta2']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['registros.jsonl']
+
+    with pytest.raises(ValueError):
+        Registro(max_archivos=-1)
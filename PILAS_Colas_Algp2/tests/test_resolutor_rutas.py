@@ -0,0 +1,84 @@
+import pytest
+
+from carpeta import Carpeta
+from resolutor_rutas import ResolutorRutas
+
+
+def _unidad():
+    # C:/a/b/c y C:/x
+    raiz = Carpeta('C:', 0)
+    carpeta = raiz
+    for nombre in 'abc':
+        carpeta.crear_carpeta(nombre, 0)
+        carpeta = carpeta.buscar_carpeta(nombre)
+    raiz.crear_carpeta('x', 0)
+    return raiz
+
+
+def _guardadas(resolutor):
+    # Las rutas con su carpeta guardada, de la menos a la más usada
+    rutas = []
+    for entrada in resolutor.cache:
+        partes = []
+        while entrada is not resolutor.raiz:
+            partes.append(entrada.nombre)
+            entrada = entrada.padre
+        rutas.append('/'.join(reversed(partes)))
+    return rutas
+
+
+def test_resolver_guarda_cada_carpeta_recorrida():
+    raiz = _unidad()
+    resolutor = ResolutorRutas(raiz)
+    assert resolutor.resolver([]) is raiz
+    c = resolutor.resolver(['a', 'b', 'c'])
+    assert c is raiz.buscar_carpeta('a').buscar_carpeta('b').buscar_carpeta('c')
+    assert _guardadas(resolutor) == ['a', 'a/b', 'a/b/c']
+
+    # Se parte de la carpeta guardada, sin volver a buscar en las anteriores
+    raiz.buscar_carpeta('a').eliminar_carpeta('b')
+    assert resolutor.resolver(['a', 'b', 'c']) is c
+
+
+def test_ruta_inexistente():
+    resolutor = ResolutorRutas(_unidad())
+    with pytest.raises(ValueError):
+        resolutor.resolver(['a', 'no', 'c'])
+    assert _guardadas(resolutor) == ['a']
+
+
+def test_invalidar_quita_solo_la_rama():
+    raiz = _unidad()
+    resolutor = ResolutorRutas(raiz)
+    resolutor.resolver(['a', 'b', 'c'])
+    resolutor.resolver(['x'])
+    resolutor.invalidar(['a', 'b'])
+    assert _guardadas(resolutor) == ['a', 'x']
+    assert list(resolutor.raiz.hijos['a'].hijos) == []
+
+    # Después de eliminar la carpeta la ruta ya no se resuelve
+    raiz.buscar_carpeta('a').eliminar_carpeta('b')
+    with pytest.raises(ValueError):
+        resolutor.resolver(['a', 'b', 'c'])
+
+    resolutor.invalidar(['no', 'existe'])
+    resolutor.invalidar([])
+    assert _guardadas(resolutor) == [] and resolutor.raiz.hijos == {}
+
+
+def test_capacidad_descarta_la_menos_usada():
+    raiz = _unidad()
+    resolutor = ResolutorRutas(raiz, capacidad=2)
+    resolutor.resolver(['a', 'b', 'c'])
+    assert _guardadas(resolutor) == ['a/b', 'a/b/c']
+    # 'a' queda en el árbol sin carpeta, solo porque hay rutas guardadas debajo
+    assert resolutor.raiz.hijos['a'].carpeta is None
+
+    resolutor.resolver(['a', 'b'])
+    resolutor.resolver(['x'])
+    assert _guardadas(resolutor) == ['a/b', 'x']
+    assert list(resolutor.raiz.hijos['a'].hijos) == ['b']
+
+    resolutor.invalidar(['a', 'b'])
+    # La entrada vacía de 'a' también se quita
+    assert list(resolutor.raiz.hijos) == ['x']
@@ -0,0 +1,28 @@
+import os
+
+from carpeta import Carpeta
+from escritura_segura import guardar_json
+from respaldos import Respaldos
+
+
+def test_listar_lee_solo_los_datos_y_acepta_respaldos_de_antes(tmp_path):
+    # Un respaldo guardado antes de la línea de datos: JSON completo con cabecera
+    vieja = Carpeta('vieja', 0)
+    guardar_json(os.path.join(tmp_path, "1 Eliminación de carpeta 'vieja' en Unidad C.json"),
+                 {'ruta': ['carpeta1'], 'fecha': 0, 'carpeta': vieja.to_dict()})
+
+    respaldos = Respaldos(str(tmp_path), 'C:')
+    nueva = Carpeta('nueva', 0)
+    nueva.crear_archivo('archivo.txt', 'contenido', 0)
+    version = respaldos.respaldar(nueva, ['carpeta1', 'sub'])
+
+    datos = respaldos.leer_datos(version)
+    assert (datos['ruta'], datos['nombre']) == (['carpeta1', 'sub'], 'nueva')
+    assert respaldos.leer_datos(1)['nombre'] == 'vieja'
+    lineas = respaldos.listar()
+    assert lineas[0].endswith('C:\\carpeta1\\sub\\nueva')
+    assert lineas[1].endswith('C:\\carpeta1\\vieja')
+
+    carpeta, ruta = respaldos.cargar(version)
+    assert ruta == ['carpeta1', 'sub'] and carpeta.to_dict() == nueva.to_dict()
+    assert respaldos.cargar(1)[0].to_dict() == vieja.to_dict()
@@ -0,0 +1,230 @@
+import itertools
+
+import pytest
+
+from almacen_contenidos import AlmacenContenidos
+from bitacora import Bitacora
+from consola import Consola
+from sistema_archivos import SistemaArchivos
+
+
+def _espiar_sincronizar(monkeypatch, clase, llamadas):
+    # Anota en 'llamadas' cada vez que se sincroniza un objeto de la clase
+    original = clase.sincronizar
+
+    def sincronizar(self):
+        llamadas.append(clase.__name__)
+        original(self)
+    monkeypatch.setattr(clase, 'sincronizar', sincronizar)
+
+
+def test_unidad_desmontada_por_memoria_se_vuelve_a_montar(configuracion, monkeypatch):
+    configuracion['unidades'].append({'nombre': 'E:', 'nombre_archivo': 'Unidad E.json'})
+    configuracion['memoria_maxima_unidades_mb'] = 0  # Solo quedan montadas la actual y la nueva
+    sistema = SistemaArchivos('C:', configuracion)
+    sistema.diferir(True)  # Como con el guardado en segundo plano
+    sistema.mkdir('uno')
+    sistema.type('uno/nota.txt', 'hola mundo')
+    sistema.cd('uno')
+
+    sistema.cambiar_unidad('D:')
+    assert sistema.unidades['C:'].montada
+    sincronizados = []
+    for clase in (AlmacenContenidos, Bitacora):
+        _espiar_sincronizar(monkeypatch, clase, sincronizados)
+    sistema.cambiar_unidad('E:')
+    assert not sistema.unidades['C:'].montada and sistema.unidades['D:'].montada
+    # Primero los contenidos, así la bitácora nunca referencia uno que no esté en el disco
+    assert sincronizados == ['AlmacenContenidos', 'Bitacora']
+    monkeypatch.undo()
+
+    # Al desmontarse se sincronizaron el contenido y la bitácora, sin esperar al guardado
+    otro = SistemaArchivos('C:', configuracion)
+    assert otro.grep('mundo')[0].ruta == 'C:\\uno\\nota.txt'
+    otro.cerrar()
+
+    assert sistema.cambiar_unidad('C:') == 'C:\\uno'
+    assert sistema.unidades['C:'].montada
+    assert [c.ruta for c in sistema.find('nota*')] == ['C:\\uno\\nota.txt']
+    sistema.mkdir('dos')
+    assert [entrada.nombre for entrada in sistema.dir().entradas] == ['dos', 'nota.txt']
+    sistema.diferir(False)
+    sistema.guardar()
+    sistema.cerrar()
+
+
+def _armar(sistema):
+    # C:\Docs\Notas.txt, C:\Docs\viejas\nota vieja.txt, C:\Fotos y C:\raiz.txt
+    sistema.mkdir('Docs')
+    sistema.type('Docs/Notas.txt', 'hola mundo\nsegunda línea\nMundo, hola otra vez')
+    sistema.mkdir('Docs/viejas')
+    sistema.type('Docs/viejas/nota vieja.txt', 'adiós mundo')
+    sistema.mkdir('Fotos')
+    sistema.type('raiz.txt', 'nada que ver')
+
+
+def _rutas(coincidencias):
+    return [coincidencia.ruta for coincidencia in coincidencias]
+
+
+def test_find_con_comodines(configuracion):
+    sistema = SistemaArchivos('C:', configuracion)
+    _armar(sistema)
+    assert _rutas(sistema.find('nota*')) == ['C:\\Docs\\Notas.txt', 'C:\\Docs\\viejas\\nota vieja.txt']
+    assert _rutas(sistema.find('*.TXT')) == [
+        'C:\\Docs\\Notas.txt', 'C:\\Docs\\viejas\\nota vieja.txt', 'C:\\raiz.txt']
+    assert [(c.ruta, c.es_carpeta) for c in sistema.find('?otos')] == [('C:\\Fotos', True)]
+    assert sistema.find('no existe') == []
+
+    # El índice sigue a rmdir y restore
+    version = sistema.rmdir('Docs').respaldo
+    assert _rutas(sistema.find('nota*')) == []
+    sistema.restore(version)
+    assert len(sistema.find('nota*')) == 2
+    sistema.cerrar()
+
+
+def test_find_con_el_indice_guardado(configuracion):
+    sistema = SistemaArchivos('C:', configuracion)
+    _armar(sistema)
+    sistema.guardar()
+    sistema.cerrar()
+
+    # Al volver a montar la unidad el índice se carga del archivo, sin recorrerla
+    sistema = SistemaArchivos('C:', configuracion)
+    sistema.abrir()
+    unidad = sistema.actual
+    assert unidad.raiz.indice_carpetas['Docs'].dato._pendiente is not None
+    assert _rutas(sistema.find('*vieja*')) == ['C:\\Docs\\viejas', 'C:\\Docs\\viejas\\nota vieja.txt']
+    assert unidad.raiz.indice_carpetas['Docs'].dato._pendiente is not None
+    sistema.cerrar()
+
+
+def test_find_sin_indice(configuracion):
+    configuracion['indice_nombres'] = False
+    sistema = SistemaArchivos('C:', configuracion)
+    with pytest.raises(ValueError):
+        sistema.find('*')
+    sistema.cerrar()
+
+
+def _grep(sistema, texto, ruta=''):
+    return [(c.ruta, c.lineas) for c in sistema.grep(texto, ruta)]
+
+
+def test_grep_palabras_completas(configuracion):
+    sistema = SistemaArchivos('C:', configuracion)
+    _armar(sistema)
+    assert _grep(sistema, 'MUNDO hola') == [
+        ('C:\\Docs\\Notas.txt', [(1, 'hola mundo'), (3, 'Mundo, hola otra vez')])]
+    assert _grep(sistema, 'mundo', 'Docs/viejas') == [('C:\\Docs\\viejas\\nota vieja.txt', [(1, 'adiós mundo')])]
+    assert _grep(sistema, 'mund') == []
+
+    sistema.cd('Docs')
+    assert [ruta for ruta, _ in _grep(sistema, 'mundo')] == ['C:\\Docs\\Notas.txt', 'C:\\Docs\\viejas\\nota vieja.txt']
+    with pytest.raises(ValueError):
+        sistema.grep(' ,. ')
+    sistema.cerrar()
+
+
+def test_grep_saltea_lo_que_el_indice_tiene_de_mas(configuracion):
+    sistema = SistemaArchivos('C:', configuracion)
+    _armar(sistema)
+    # Cambios que no pasan por los comandos, así el índice de contenidos queda desactualizado
+    docs = sistema.actual.raiz.buscar_carpeta('Docs')
+    docs.eliminar_archivo('Notas.txt')
+    docs.eliminar_carpeta('viejas')
+    sistema.actual.resolutor.invalidar(['Docs', 'viejas'])
+    assert _grep(sistema, 'mundo') == []
+    sistema.cerrar()
+
+
+def test_grep_sin_indice(configuracion):
+    configuracion['indice_contenidos'] = False
+    sistema = SistemaArchivos('C:', configuracion)
+    with pytest.raises(ValueError):
+        sistema.grep('hola')
+    sistema.cerrar()
+
+
+def _armar_listado(sistema, monkeypatch):
+    # Cada comando con una marca un minuto posterior a la del anterior
+    marcas = itertools.count(60, 60)
+    monkeypatch.setattr('sistema_archivos.marca_actual', lambda: next(marcas))
+    sistema.mkdir('b')
+    sistema.mkdir('A')
+    sistema.type('grande.txt', 'x' * 10)
+    sistema.type('chico.txt', 'x')
+    sistema.type('b/dentro.txt', 'hola')
+    sistema.mkdir('b/sub')
+    sistema.type('b/sub/hondo.txt', 'hondo')
+
+
+def _nombres(listado):
+    return [entrada.nombre for entrada in listado.entradas]
+
+
+@pytest.mark.parametrize('orden, esperados', [
+    (None, ['b', 'A', 'grande.txt', 'chico.txt']),
+    ('n', ['A', 'b', 'chico.txt', 'grande.txt']),
+    ('-n', ['b', 'A', 'grande.txt', 'chico.txt']),
+    ('s', ['A', 'b', 'chico.txt', 'grande.txt']),
+    ('-s', ['b', 'A', 'grande.txt', 'chico.txt']),
+    ('d', ['b', 'A', 'grande.txt', 'chico.txt']),
+    ('-d', ['A', 'b', 'chico.txt', 'grande.txt']),
+])
+def test_dir_ordenado(configuracion, monkeypatch, orden, esperados):
+    sistema = SistemaArchivos('C:', configuracion)
+    _armar_listado(sistema, monkeypatch)
+    listado = sistema.dir('', orden)
+    assert listado.ruta == 'C:'
+    assert _nombres(listado) == esperados
+    sistema.cerrar()
+
+
+def test_dir_filtrado_y_recursivo(configuracion, monkeypatch):
+    sistema = SistemaArchivos('C:', configuracion)
+    _armar_listado(sistema, monkeypatch)
+    assert _nombres(sistema.dir(atributo='d')) == ['b', 'A']
+    assert _nombres(sistema.dir(atributo='-d', orden='n')) == ['chico.txt', 'grande.txt']
+    # El tamaño de una carpeta es el de todo su contenido
+    assert [(e.nombre, e.tamano) for e in sistema.dir('b').entradas] == [('sub', 5), ('dentro.txt', 4)]
+
+    # En preorden y en el orden en que se crearon
+    assert _nombres(sistema.dir(recursivo=True)) == [
+        'b', 'b\\dentro.txt', 'b\\sub', 'b\\sub\\hondo.txt', 'A', 'grande.txt', 'chico.txt']
+    assert _nombres(sistema.dir(recursivo=True, profundidad=2, atributo='d')) == ['b', 'b\\sub', 'A']
+    assert _nombres(sistema.dir('b', recursivo=True, atributo='-d')) == ['dentro.txt', 'sub\\hondo.txt']
+
+    for argumentos in ({'orden': 'x'}, {'atributo': 'h'}, {'orden': 'n', 'recursivo': True},
+                       {'recursivo': True, 'profundidad': 0}):
+        with pytest.raises(ValueError):
+            sistema.dir(**argumentos)
+    sistema.cerrar()
+
+
+def test_dir_en_la_consola(configuracion, monkeypatch, capsys):
+    consola = Consola('C:', configuracion)
+    _armar_listado(consola.sistema, monkeypatch)
+    capsys.readouterr()
+
+    def nombres():
+        return [linea.split()[-1] for linea in capsys.readouterr().out.splitlines()
+                if linea.startswith(('d-----', '-a----'))]
+
+    consola.procesar('dir /O:-s /a:-d')
+    assert nombres() == ['grande.txt', 'chico.txt']
+    consola.procesar('dir b /s /l:1')
+    assert nombres() == ['dentro.txt', 'sub']
+    for entrada in ('dir /l:1', 'dir /s /l:x', 'dir /x', 'dir b A'):
+        consola.procesar(entrada)
+        assert capsys.readouterr().out.startswith('Uso incorrecto del comando.')
+
+    # Paginado: se detiene en cada página y 'q' deja de mostrar
+    consola.interactiva = True
+    consola.lineas_pagina = 8
+    preguntas = []
+    consola.preguntar = lambda texto: preguntas.append(texto) or 'q'
+    consola.procesar('dir /p')
+    assert len(preguntas) == 1 and nombres() == ['b']
+    consola.sistema.cerrar()
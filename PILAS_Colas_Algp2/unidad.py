@@ -0,0 +1,215 @@
+from almacen_contenidos import AlmacenContenidos
+from bitacora import Bitacora
+from carpeta import Carpeta
+from fecha import marca_actual
+from pila import Pila
+from resolutor_rutas import ResolutorRutas
+from respaldos import Respaldos
+from typing import Optional, Union
+import os
+
+
+class Unidad:
+    """
+    Una unidad configurada (C:, D:, ...) con su archivo, su bitácora, sus respaldos
+    y su propia ruta actual.
+
+    La unidad se monta (se carga en memoria) recién cuando se usa, y puede desmontarse
+    para liberar memoria: como cada operación ya quedó en la bitácora, desmontar solo
+    sincroniza con el disco lo registrado en modo diferido y al volver a montarla se
+    recupera el mismo estado.
+    """
+
+    # Bytes en memoria por cada byte del archivo de la unidad, según su formato
+    # (aproximado con benchmarks/benchmark_formatos.py: ~140 bytes por entrada en
+    # memoria, ~296 en JSON y ~44 en binario).
+    FACTOR_MEMORIA = {'json': 0.5, 'binario': 3.2}
+
+    def __init__(self, nombre: str, filename: str, configuracion: dict,
+                 almacen: Optional[AlmacenContenidos] = None) -> None:
+        """
+        Constructor de la clase Unidad. No accede al disco.
+
+        Parámetros:
+        - nombre (str): El nombre de la unidad (por ejemplo 'D:').
+        - filename (str): El archivo de la unidad.
+        - configuracion (dict): La configuración cargada de config.json.
+        - almacen (AlmacenContenidos | None): El almacén de los contenidos de los archivos
+          (None para guardarlos dentro de la unidad).
+        """
+        self.nombre = nombre
+        self.filename = filename
+        self.configuracion = configuracion
+        self.almacen = almacen
+
+        self.raiz: Optional[Carpeta] = None  # None mientras la unidad no está montada
+        self.bitacora: Optional[Bitacora] = None
+        self.respaldos: Optional[Respaldos] = None
+        self.resolutor: Optional[ResolutorRutas] = None
+
+        # Ruta actual de la unidad (La que se mostrará en consola)
+        self.ruta_actual: str = nombre
+        # Carpetas de la ruta actual, desde la raíz (fondo) hasta la carpeta actual (tope)
+        self.carpetas_ruta: Pila = Pila()
+
+    @property
+    def montada(self) -> bool:
+        """
+        True si la unidad está cargada en memoria.
+        """
+        return self.raiz is not None
+
+    def montar(self) -> bool:
+        """
+        Carga la unidad y le aplica la bitácora. Si no existe su archivo, crea una unidad
+        vacía. No hace nada si ya está montada.
+
+        Retorna:
+        - bool: False si la unidad no existía y se creó, True en caso contrario.
+        """
+        if self.raiz is not None:
+            return True
+        configuracion = self.configuracion
+
+        # Respaldos de las carpetas eliminadas, con retención de los más recientes
+        self.respaldos = Respaldos(
+            configuracion['ruta_respaldo'], self.nombre, configuracion.get('max_respaldos', 100))
+
+        # Las modificaciones se agregan a la bitácora en lugar de reescribir la unidad
+        self.bitacora = Bitacora(
+            self.filename, configuracion.get('intervalo_checkpoint', 500),
+            configuracion.get('carga_diferida', False),
+            configuracion.get('formato_unidad', 'json'),
+            configuracion.get('indice_nombres', True),
+            configuracion.get('indice_contenidos', True),
+            self.almacen)
+
+        existia = True
+        try:
+            self.raiz = self.bitacora.cargar()
+        except FileNotFoundError:
+            existia = False
+            self.raiz = Carpeta(self.nombre, marca_actual())
+            self.bitacora.checkpoint(self.raiz)
+
+        # Caché LRU de las rutas ya resueltas (ver resolutor_rutas)
+        self.resolutor = ResolutorRutas(
+            self.raiz, configuracion.get('capacidad_cache_rutas', 1024))
+
+        # Se vuelve a la ruta actual que tenía la unidad antes de desmontarse
+        partes = self.partes_ruta(self.ruta_actual)
+        self.carpetas_ruta = Pila()
+        self.carpetas_ruta.push(self.raiz)
+        try:
+            for i in range(1, len(partes) + 1):
+                self.carpetas_ruta.push(self.resolutor.resolver(partes[:i]))
+        except ValueError:
+            self.carpetas_ruta = Pila()
+            self.carpetas_ruta.push(self.raiz)
+            partes = []
+        self.ruta_actual = self.ruta_mostrada(partes)
+        return existia
+
+    def desmontar(self) -> None:
+        """
+        Libera la unidad de la memoria y cierra sus archivos. Conserva la ruta actual.
+
+        Antes sincroniza los contenidos y las operaciones registradas en modo diferido,
+        en ese orden (ver SistemaArchivos.sincronizar): la unidad puede desmontarse en
+        cualquier momento para liberar memoria, no solo al guardar. Si la sincronización
+        falla, la unidad sigue montada.
+
+        Retorna:
+        - None
+        """
+        if self.bitacora is not None:
+            if self.almacen is not None:
+                self.almacen.sincronizar()
+            self.bitacora.sincronizar()
+            self.bitacora.cerrar()
+        self.raiz = None
+        self.bitacora = None
+        self.respaldos = None
+        self.resolutor = None
+        self.carpetas_ruta = Pila()
+
+    def memoria_estimada(self) -> int:
+        """
+        Estima la memoria que ocupa la unidad montada a partir del tamaño de sus archivos.
+        Con carga diferida es una cota superior, porque solo se cargan las carpetas usadas.
+
+        Retorna:
+        - int: La memoria estimada en bytes (0 si no está montada).
+        """
+        if self.bitacora is None:
+            return 0
+        tamano = 0
+        for filename in (self.bitacora.filename_unidad, self.bitacora.filename):
+            try:
+                tamano += os.path.getsize(filename)
+            except OSError:
+                pass
+        return int(tamano * self.FACTOR_MEMORIA[self.bitacora.formato])
+
+    def ruta_mostrada(self, partes: list[str]) -> str:
+        """
+        Arma la ruta absoluta que se muestra en consola.
+
+        Parámetros:
+        - partes (list[str]): Los nombres de las carpetas desde la raíz.
+
+        Retorna:
+        - str: La ruta con separadores '\\' (por ejemplo C:\\carpeta1\\sub).
+        """
+        return '\\'.join([self.nombre] + partes)
+
+    def partes_ruta(self, ruta: str) -> list[str]:
+        """
+        Obtiene los nombres de las carpetas de una ruta absoluta, sin la unidad.
+
+        Parámetros:
+        - ruta (str): La ruta absoluta con separadores '\\' (por ejemplo C:\\carpeta1\\sub).
+
+        Retorna:
+        - list[str]: Los nombres de las carpetas desde la raíz.
+        """
+        return [parte for parte in ruta.split('\\')[1:] if parte]
+
+    def salir_de_carpeta_eliminada(self, carpeta: Carpeta) -> None:
+        """
+        Si la carpeta eliminada es parte de la ruta actual, vuelve a su carpeta padre.
+
+        Parámetros:
+        - carpeta (Carpeta): La carpeta que se eliminó.
+
+        No retorna ningún valor.
+        """
+        if not any(nodo is carpeta for nodo in self.carpetas_ruta):
+            return
+
+        componentes_ruta = self.ruta_actual.split('\\')
+        while self.carpetas_ruta.pop() is not carpeta:
+            componentes_ruta.pop()
+        componentes_ruta.pop()
+        self.ruta_actual = '\\'.join(componentes_ruta)
+
+    def obtener_nodo_padre(self) -> Union[None, Carpeta]:
+        """
+        Obtiene el nodo padre de la carpeta actual.
+
+        Retorna:
+        - Carpeta | None: La carpeta padre si existe, None si la carpeta actual es la raíz.
+        """
+        # El padre está justo debajo del tope en la pila de carpetas de la ruta
+        carpetas = iter(self.carpetas_ruta)
+        next(carpetas, None)
+        return next(carpetas, None)
+
+    def obtener_nodo_ruta_actual(self) -> Carpeta:
+        """
+        Obtiene el nodo correspondiente a la ruta actual.
+
+        Retorna:
+        - Carpeta: La carpeta correspondiente a la ruta actual.
+        """
+        return self.carpetas_ruta.ver_tope()